@@ -1,7 +1,181 @@
 #!/usr/bin/env python3
 import os
-import subprocess
 import sys
+import time
+
+class _LazyModule(object):
+    """
+    延迟导入的模块代理
+    启动时只登记模块名，第一次访问属性时才真正导入，
+    避免每次启动都为用不到的功能付出导入开销
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            __import__(self._name)
+            self._module = sys.modules[self._name]
+        return getattr(self._module, attr)
+
+argparse = _LazyModule('argparse')
+bisect = _LazyModule('bisect')
+json = _LazyModule('json')
+logging = _LazyModule('logging')
+shutil = _LazyModule('shutil')
+subprocess = _LazyModule('subprocess')
+threading = _LazyModule('threading')
+
+COLORS = {
+    'red': '\033[91m',
+    'green': '\033[92m',
+    'yellow': '\033[93m',
+    'blue': '\033[94m',
+    'purple': '\033[95m',
+    'cyan': '\033[96m',
+    'end': '\033[0m'
+}
+
+# 输出缓冲区累计超过该字节数或距上次刷新超过该秒数时写出
+OUTPUT_BUFFER_LIMIT = 64 * 1024
+OUTPUT_FLUSH_INTERVAL = 0.1
+
+# 输出状态: 待写出的文本、缓冲嵌套层数、上次刷新时间、是否使用颜色(None 表示尚未检测)
+_OUTPUT = {'buffer': [], 'size': 0, 'depth': 0, 'last_flush': 0.0, 'color': None}
+
+def use_color():
+    """
+    判断是否输出 ANSI 颜色：设置了 NO_COLOR 或输出不是终端时不使用
+    @return: bool 是否使用颜色
+    """
+    if _OUTPUT['color'] is None:
+        enabled = 'NO_COLOR' not in os.environ and sys.stdout.isatty()
+        if enabled and os.name == 'nt':
+            enabled = _enable_windows_ansi()
+        _OUTPUT['color'] = enabled
+    return _OUTPUT['color']
+
+def colorize(text, color):
+    """
+    为文本加上颜色转义序列，不使用颜色时原样返回
+    @param text: str 文本内容
+    @param color: str 颜色名称
+    @return: str 处理后的文本
+    """
+    if not use_color():
+        return str(text)
+    return f"{COLORS.get(color, '')}{text}{COLORS['end']}"
+
+def flush_output():
+    """
+    写出缓冲区中的所有文本
+    @return: None
+    """
+    if _OUTPUT['buffer']:
+        sys.stdout.write(''.join(_OUTPUT['buffer']))
+        _OUTPUT['buffer'] = []
+        _OUTPUT['size'] = 0
+    sys.stdout.flush()
+    _OUTPUT['last_flush'] = time.monotonic()
+
+def echo(text='', color=None):
+    """
+    输出一行文本，在 buffered_output() 范围内会先写入缓冲区
+    @param text: str 文本内容
+    @param color: str 颜色名称(可选)
+    @return: None
+    """
+    line = (colorize(text, color) if color else str(text)) + '\n'
+    if not _OUTPUT['depth']:
+        sys.stdout.write(line)
+        return
+    _OUTPUT['buffer'].append(line)
+    _OUTPUT['size'] += len(line)
+    if (_OUTPUT['size'] >= OUTPUT_BUFFER_LIMIT or
+            time.monotonic() - _OUTPUT['last_flush'] >= OUTPUT_FLUSH_INTERVAL):
+        flush_output()
+
+class _BufferedOutput(object):
+    """
+    buffered_output() 返回的上下文对象，退出时写出缓冲区
+    """
+    def __enter__(self):
+        if not _OUTPUT['depth']:
+            _OUTPUT['last_flush'] = time.monotonic()
+        _OUTPUT['depth'] += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        _OUTPUT['depth'] -= 1
+        flush_output()
+        return False
+
+def buffered_output():
+    """
+    在 with 语句范围内缓冲 echo/print_colored 的输出，
+    按大小或时间间隔批量写出，退出范围(如等待用户输入前)时全部写出
+    @return: _BufferedOutput 上下文对象
+    """
+    return _BufferedOutput()
+
+def get_pager_command():
+    """
+    获取分页程序命令，优先使用 $PAGER
+    @return: list 命令及参数，没有可用的分页程序时返回 None
+    """
+    import shlex
+    pager = os.environ.get('PAGER')
+    if pager:
+        return shlex.split(pager)
+    if shutil.which('less'):
+        return ['less', '-R']
+    if os.name == 'nt':
+        return ['more']
+    return None
+
+def page_output(lines):
+    """
+    输出多行文本，超过一屏且在终端中时交给分页程序，否则批量写出
+    @param lines: iterable 文本行(可以是生成器)
+    @return: None
+    """
+    lines = iter(lines)
+    head = []
+    height = shutil.get_terminal_size().lines - 1
+    pager = get_pager_command() if sys.stdout.isatty() and sys.stdin.isatty() else None
+    if pager:
+        for line in lines:
+            head.append(line)
+            if len(head) > height:
+                break
+    if not pager or len(head) <= height:
+        with buffered_output():
+            for line in head:
+                echo(line)
+            for line in lines:
+                echo(line)
+        return
+
+    flush_output()
+    try:
+        proc = subprocess.Popen(pager, stdin=subprocess.PIPE, text=True, encoding='utf-8')
+    except OSError:
+        with buffered_output():
+            for line in head:
+                echo(line)
+            for line in lines:
+                echo(line)
+        return
+    try:
+        proc.stdin.write('\n'.join(head) + '\n')
+        for line in lines:
+            proc.stdin.write(line + '\n')
+        proc.stdin.close()
+    except BrokenPipeError:
+        # 用户在读完之前退出了分页程序
+        pass
+    proc.wait()
 
 def print_colored(text, color):
     """
@@ -10,16 +184,7 @@ def print_colored(text, color):
     @param color: str 颜色名称
     @return: None
     """
-    colors = {
-        'red': '\033[91m',
-        'green': '\033[92m',
-        'yellow': '\033[93m',
-        'blue': '\033[94m',
-        'purple': '\033[95m',
-        'cyan': '\033[96m',
-        'end': '\033[0m'
-    }
-    print(f"{colors.get(color, '')}{text}{colors['end']}")
+    echo(text, _COLOR_ALIASES.get(color, color))
 
 def execute_git(command):
     """
@@ -37,36 +202,90 @@ def execute_git(command):
                               text=True,
                               encoding='utf-8',
                               env=env)
-        if result.stdout:
+        if result.stdout and get_setting('show_output'):
             print(result.stdout)
-        if result.stderr:
-            if "no upstream branch" in result.stderr:
-                print("首次推送分支，正在设置上游分支...")
-                current_branch = subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                                             capture_output=True,
-                                             text=True,
-                                             encoding='utf-8').stdout.strip()
-                push_result = subprocess.run(['git', 'push', '--set-upstream', 'origin', current_branch],
-                                          capture_output=True,
-                                          text=True,
-                                          encoding='utf-8')
-                if push_result.stdout:
-                    print(push_result.stdout)
-                if push_result.stderr:
-                    print(push_result.stderr)
-            else:
-                print(result.stderr)
+        if result.stderr and "no upstream branch" in result.stderr:
+            # 无论是否显示错误输出，首次推送都需要设置上游分支
+            print("首次推送分支，正在设置上游分支...")
+            current_branch = subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
+                                         capture_output=True,
+                                         text=True,
+                                         encoding='utf-8').stdout.strip()
+            push_result = subprocess.run(['git', 'push', '--set-upstream', 'origin', current_branch],
+                                      capture_output=True,
+                                      text=True,
+                                      encoding='utf-8')
+            if push_result.stdout and get_setting('show_output'):
+                print(push_result.stdout)
+            if push_result.stderr and get_setting('show_errors'):
+                print(push_result.stderr)
+            return push_result.returncode == 0
+        if result.stderr and get_setting('show_errors'):
+            print(result.stderr)
         return result.returncode == 0
     except Exception as e:
         print_colored(f"执行出错: {str(e)}", "red")
         return False
 
-def show_menu():
+def print_stream_line(text, is_progress):
     """
-    显示主菜单
+    默认的流式输出方式：进度行在终端中原地刷新
+    @param text: str 一行输出
+    @param is_progress: bool 是否为以回车结尾的进度行
     @return: None
     """
-    logo = """
+    if is_progress:
+        if sys.stdout.isatty():
+            sys.stdout.write(f"\r{text}\033[K")
+            sys.stdout.flush()
+    else:
+        sys.stdout.write(f"\r{text}\033[K\n" if sys.stdout.isatty() else f"{text}\n")
+        sys.stdout.flush()
+
+def run_git_streaming(command, cwd=None, on_line=None):
+    """
+    执行 Git 命令并实时输出，不缓存全部结果
+    标准错误合并到标准输出，进度信息(以 \\r 结尾)单独标记
+    @param command: list Git 命令及参数
+    @param cwd: str 工作目录(可选)
+    @param on_line: function 每行输出的回调 (文本, 是否进度行)，默认直接打印
+    @return: int 进程返回码
+    """
+    env = os.environ.copy()
+    env['PYTHONIOENCODING'] = 'utf-8'
+    env['LANG'] = 'en_US.UTF-8'
+    on_line = on_line or print_stream_line
+    try:
+        proc = subprocess.Popen(['git'] + command, cwd=cwd, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError as e:
+        print_colored(f"执行出错: {str(e)}", "red")
+        return -1
+    try:
+        pending = b''
+        while True:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                break
+            pending += chunk
+            while True:
+                cr, lf = pending.find(b'\r'), pending.find(b'\n')
+                end = min(pos for pos in (cr, lf, len(pending)) if pos >= 0)
+                if end == len(pending):
+                    break
+                line, pending = pending[:end], pending[end + 1:]
+                on_line(line.decode('utf-8', 'replace'), end == cr)
+        if pending:
+            on_line(pending.decode('utf-8', 'replace'), False)
+        return proc.wait()
+    except KeyboardInterrupt:
+        proc.terminate()
+        proc.wait()
+        raise
+    finally:
+        proc.stdout.close()
+
+LOGO = r"""
  _____     _____ _ _   
 |  ___|   / ____(_) |  
 | |__ ____| |  __ _| |_ 
@@ -74,40 +293,89 @@ def show_menu():
 | |___/ / | |__| | | |_ 
 |____/___|\_____|_|\__|
 """
-    print("\n" + "="*50)
-    print_colored(logo, "cyan")
-    print_colored("让Git操作变得简单! 作者: SoKei", "purple")
-    print("="*50)
-
-    print_colored("\n[常用操作]", "yellow")
-    print("1. 仓库状态     (git status/init/clone)")
-    print("2. 暂存更改     (git add)")
-    print("3. 提交更改     (git commit)")
-    print("4. 历史查看     (git log)")
-    print("5. 推送更改     (git push)")
-    print("6. 拉取更新     (git pull)")
-
-    print_colored("\n[分支操作]", "yellow")
-    print("7. 分支管理     (git branch)")
-    print("8. 切换分支     (git checkout)")
-    print("9. 合并分支     (git merge)")
-    print("10. 变基操作    (git rebase)")
-
-    print_colored("\n[远程操作]", "yellow")
-    print("11. 远程配置    (git remote)")
-    print("12. 标签管理    (git tag)")
-
-    print_colored("\n[高级操作]", "yellow")
-    print("13. 储藏操作    (git stash)")
-    print("14. 版本管理    (reset/revert/restore)")
-    print("15. 仓库维护    (clean/gc)")
-    print("16. 分析工具    (stats/search/diff)")
-    print("17. 配置管理    (config/alias)")
-
-    print_colored("\n[其他选项]", "yellow")
-    print("h. 显示帮助")
-    print("0. 退出程序")
-    print("\n" + "="*50)
+
+# 已渲染的菜单画面，键为菜单名称
+_MENU_FRAME_CACHE = {}
+
+def display_width(text):
+    """
+    计算文本在终端中的显示宽度，中文等宽字符按两列计算
+    @param text: str 文本
+    @return: int 显示宽度
+    """
+    import unicodedata
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+def render_menu_frame(items):
+    """
+    根据菜单项生成完整的菜单画面
+    @param items: list (编号, 名称, 命令说明, 处理函数, 分类) 列表，分类为None的项不显示
+    @return: str 菜单画面文本
+    """
+    lines = ["\n" + "="*50,
+             colorize(LOGO, "cyan"),
+             colorize("让Git操作变得简单! 作者: SoKei", "purple"),
+             "="*50]
+    category = None
+    for menu_id, label, command, _, item_category in items:
+        if item_category is None:
+            continue
+        if item_category != category:
+            category = item_category
+            lines.append(colorize(f"\n[{category}]", "yellow"))
+        text = f"{menu_id}. {label}"
+        if command:
+            text += " " * max(16 - display_width(text), 1) + f"({command})"
+        lines.append(text)
+    lines.append("\n" + "="*50)
+    return "\n".join(lines) + "\n"
+
+def show_menu(items=None, name='main'):
+    """
+    显示主菜单
+    画面只在第一次显示时生成，之后直接输出缓存
+    @param items: list 菜单项列表，默认使用 MENU_REGISTRY
+    @param name: str 菜单名称，用作缓存键
+    @return: None
+    """
+    frame = _MENU_FRAME_CACHE.get(name)
+    if frame is None:
+        frame = _MENU_FRAME_CACHE[name] = render_menu_frame(items or MENU_REGISTRY)
+    sys.stdout.write(frame)
+    sys.stdout.flush()
+
+def clear_screen():
+    """
+    使用 ANSI 转义序列清屏，不启动外部进程
+    @return: None
+    """
+    if not sys.stdout.isatty():
+        return
+    if os.name == 'nt' and not _enable_windows_ansi():
+        os.system('cls')
+        return
+    sys.stdout.write("\033[H\033[2J\033[3J")
+    sys.stdout.flush()
+
+_WINDOWS_ANSI = []
+
+def _enable_windows_ansi():
+    """
+    在 Windows 控制台开启虚拟终端序列支持(只尝试一次)
+    @return: bool 是否支持 ANSI 转义序列
+    """
+    if not _WINDOWS_ANSI:
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetStdHandle(-11)
+            mode = ctypes.c_uint32()
+            ok = (kernel32.GetConsoleMode(handle, ctypes.byref(mode)) and
+                  kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+            _WINDOWS_ANSI.append(bool(ok))
+        except Exception:
+            _WINDOWS_ANSI.append(False)
+    return _WINDOWS_ANSI[0]
 
 def show_help():
     """
@@ -136,16 +404,400 @@ def show_help():
     
     input("\n按回车键返回主菜单...")
 
-def confirm_action(message):
+def confirm_action(message, setting=None):
     """
     通用的操作确认函数
     @param message: str 确认信息
+    @param setting: str 控制此类确认的设置项(如 confirm_dangerous)，关闭时直接确认
     @return: bool 是否确认
     """
+    if setting and not get_setting(setting):
+        return True
     print_colored(f"\n{message}", "yellow")
     choice = input("确认执行？(y/n): ").lower()
     return choice == 'y'
 
+def iter_git_records(command, cwd=None, input_text=None):
+    """
+    流式读取以 \\0 分隔记录的 git 输出(-z 模式)，边读边产出，
+    生成器关闭时终止仍在运行的 git 进程
+    @param command: list 完整的 git 命令
+    @param cwd: str 执行目录(可选)
+    @param input_text: str 写入 git 标准输入的内容(可选，用于 --stdin)
+    @return: generator 逐条产出 bytes 记录
+    """
+    proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL)
+    if input_text is not None:
+        # git log --stdin 会先读完全部输入再开始输出，可以直接一次写入
+        proc.stdin.write(input_text.encode('utf-8'))
+        proc.stdin.close()
+    try:
+        pending = b''
+        while True:
+            chunk = proc.stdout.read1(65536)
+            if not chunk:
+                break
+            records = (pending + chunk).split(b'\0')
+            pending = records.pop()
+            yield from records
+        if pending:
+            yield pending
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+def iter_status_entries(paths=None, untracked='all', cwd=None):
+    """
+    流式解析 git status --porcelain -z 的输出
+    边读边产出，不会把整个状态列表一次性读入内存
+    @param paths: list 限定的路径(可选)
+    @param untracked: str 未跟踪文件显示方式(no/normal/all)
+    @param cwd: str 执行目录(可选)
+    @return: generator 逐条产出 (状态码XY, 路径, 原路径或None)
+    """
+    command = ['git', 'status', '--porcelain=v1', '-z', f'--untracked-files={untracked}']
+    if paths:
+        command += ['--'] + list(paths)
+    rename_entry = None
+    for field in iter_git_records(command, cwd):
+        if rename_entry:
+            # 重命名/复制条目的下一个字段是原路径
+            yield rename_entry[0], rename_entry[1], os.fsdecode(field)
+            rename_entry = None
+            continue
+        if len(field) < 4:
+            continue
+        code = field[:2].decode('ascii', 'replace')
+        path = os.fsdecode(field[3:])
+        if 'R' in code or 'C' in code:
+            rename_entry = (code, path)
+        else:
+            yield code, path, None
+
+def key_pending(timeout=0):
+    """
+    检查是否有按键等待读取
+    @param timeout: float 等待秒数
+    @return: bool 是否有按键
+    """
+    if os.name == 'nt':
+        import msvcrt
+        return msvcrt.kbhit()
+    import select
+    ready, _, _ = select.select([sys.stdin], [], [], timeout)
+    return bool(ready)
+
+def read_key():
+    """
+    读取一个按键(终端需已处于原始模式)
+    方向键等转义序列会被转换为名称
+    @return: str 按键名称或字符
+    """
+    if os.name == 'nt':
+        import msvcrt
+        ch = msvcrt.getwch()
+        if ch in ('\x00', '\xe0'):
+            return {'H': 'up', 'P': 'down', 'I': 'pgup', 'Q': 'pgdn',
+                    'G': 'home', 'O': 'end'}.get(msvcrt.getwch(), '')
+    else:
+        fd = sys.stdin.fileno()
+        ch = os.read(fd, 1).decode('latin-1')
+        if ch == '\x1b':
+            seq = ''
+            while key_pending(0.02) and len(seq) < 6:
+                seq += os.read(fd, 1).decode('latin-1')
+                if seq[-1].isalpha() or seq[-1] == '~':
+                    break
+            if not seq:
+                return 'esc'
+            return {'[A': 'up', '[B': 'down', '[5~': 'pgup', '[6~': 'pgdn',
+                    '[H': 'home', '[F': 'end', 'OA': 'up', 'OB': 'down',
+                    'OH': 'home', 'OF': 'end'}.get(seq, '')
+        elif ch and ord(ch) >= 0x80:
+            # 读取多字节 UTF-8 字符的剩余部分
+            data = ch.encode('latin-1')
+            while key_pending(0.01) and len(data) < 4:
+                data += os.read(fd, 1)
+                try:
+                    return data.decode('utf-8')
+                except UnicodeDecodeError:
+                    continue
+            return ''
+    return {'\r': 'enter', '\n': 'enter', '\x1b': 'esc', '\x7f': 'backspace',
+            '\x08': 'backspace', '\t': 'tab', ' ': 'space', '\x01': 'ctrl-a',
+            '\x03': 'ctrl-c'}.get(ch, ch)
+
+class _RawKeySession(object):
+    """
+    raw_key_session() 返回的上下文对象
+    """
+    def __enter__(self):
+        if os.name != 'nt':
+            import termios
+            import tty
+            self.fd = sys.stdin.fileno()
+            self.saved_mode = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+        sys.stdout.write("\033[?1049h\033[?25l")
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.stdout.write("\033[?25h\033[?1049l")
+        sys.stdout.flush()
+        if os.name != 'nt':
+            import termios
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved_mode)
+        return False
+
+def raw_key_session():
+    """
+    在 with 语句范围内切换到备用屏幕、隐藏光标并让终端逐键读取，
+    退出范围时(包括异常)恢复终端状态，供选择器和内置分页器共用
+    @return: _RawKeySession 上下文对象
+    """
+    return _RawKeySession()
+
+def filter_picker_items(picker, query):
+    """
+    增量筛选候选项
+    新关键词是旧关键词的延伸时只在上次结果中继续筛选，
+    删除字符时直接复用之前缓存的结果
+    @param picker: dict 选择器状态
+    @param query: str 筛选关键词
+    @return: None
+    """
+    stack = picker['filters']
+    while len(stack) > 1 and not query.startswith(stack[-1][0]):
+        stack.pop()
+    base_query, base = stack[-1]
+    if query != base_query:
+        needle = query.lower()
+        keys = picker['keys']
+        base = [i for i in base if needle in keys[i]]
+        stack.append((query, base))
+    picker['query'] = query
+    picker['matches'] = base
+    picker['cursor'] = min(picker['cursor'], max(len(base) - 1, 0))
+
+def load_picker_items(picker, limit):
+    """
+    从状态流中继续读取候选项
+    @param picker: dict 选择器状态
+    @param limit: int 本次最多读取的条数
+    @return: int 实际读取的条数
+    """
+    if picker['source'] is None:
+        return 0
+    items, keys = picker['items'], picker['keys']
+    start = len(items)
+    for entry in picker['source']:
+        items.append(entry)
+        keys.append(entry[1].lower())
+        if len(items) - start >= limit:
+            break
+    else:
+        picker['source'] = None
+    # 新读取的条目按当前筛选链依次过滤，保持各级缓存一致
+    new = range(start, len(items))
+    for query, matches in picker['filters']:
+        needle = query.lower()
+        new = [i for i in new if needle in keys[i]]
+        matches.extend(new)
+    picker['matches'] = picker['filters'][-1][1]
+    return len(items) - start
+
+def render_picker(picker, title):
+    """
+    绘制选择器界面，只渲染当前可见的行
+    @param picker: dict 选择器状态
+    @param title: str 标题
+    @return: None
+    """
+    width, height = shutil.get_terminal_size((80, 24))
+    rows = max(height - 5, 3)
+    matches = picker['matches']
+    cursor = picker['cursor']
+    if cursor < picker['offset']:
+        picker['offset'] = cursor
+    elif cursor >= picker['offset'] + rows:
+        picker['offset'] = cursor - rows + 1
+    offset = picker['offset']
+
+    loading = "" if picker['source'] is None else " 加载中..."
+    lines = [
+        f"\033[96m{title}\033[0m  已选 {len(picker['selected'])} / 匹配 {len(matches)} / 共 {len(picker['items'])}{loading}",
+        f"筛选: {picker['query']}",
+        "-" * min(width, 80),
+    ]
+    for row, item_index in enumerate(matches[offset:offset + rows], offset):
+        code, path, orig = picker['items'][item_index]
+        mark = "[x]" if item_index in picker['selected'] else "[ ]"
+        text = f"{mark} {code} {path}" if orig is None else f"{mark} {code} {orig} -> {path}"
+        text = text[:width - 2]
+        if row == cursor:
+            lines.append(f"\033[7m>{text}\033[0m")
+        else:
+            lines.append(f" {text}")
+    lines.append("-" * min(width, 80))
+    lines.append("↑↓/PgUp/PgDn 移动  空格 选择  Ctrl-A 全选  输入字符筛选  回车 确认  Esc 取消")
+    sys.stdout.write("\033[H" + "\033[K\n".join(lines) + "\033[K\033[J")
+    sys.stdout.flush()
+
+def pick_files_fallback(picker, title):
+    """
+    非终端环境下的选择方式：列出编号后输入序号
+    @param picker: dict 选择器状态
+    @param title: str 标题
+    @return: list 选中的路径列表或None
+    """
+    load_picker_items(picker, float('inf'))
+    items = picker['items']
+    if not items:
+        return []
+    print_colored(f"\n{title}", "cyan")
+    for i, (code, path, orig) in enumerate(items, 1):
+        print(f"{i}. {code} {path}")
+    answer = input("\n请输入序号(如 1,3,5-7，a 表示全部，回车取消): ").strip().lower()
+    if not answer:
+        return None
+    if answer == 'a':
+        return [path for _, path, _ in items]
+    chosen = []
+    for part in answer.split(','):
+        part = part.strip()
+        try:
+            if '-' in part:
+                low, high = part.split('-', 1)
+                chosen.extend(range(int(low), int(high) + 1))
+            elif part:
+                chosen.append(int(part))
+        except ValueError:
+            print_colored(f"忽略无效的序号: {part}", "yellow")
+    return [items[i - 1][1] for i in sorted(set(chosen)) if 1 <= i <= len(items)]
+
+def pick_files(entries, title="选择文件"):
+    """
+    键盘驱动的多选文件选择器
+    候选项从生成器中按需读取，空闲时在后台继续加载，
+    支持增量筛选和虚拟滚动，数万个文件也能保持流畅
+    @param entries: iterable 产出 (状态码, 路径, 原路径) 的可迭代对象
+    @param title: str 标题
+    @return: list 选中的路径列表，取消时返回None
+    """
+    picker = {
+        'source': iter(entries),
+        'items': [],
+        'keys': [],
+        'filters': [('', [])],
+        'matches': [],
+        'query': '',
+        'cursor': 0,
+        'offset': 0,
+        'selected': set(),
+    }
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        return pick_files_fallback(picker, title)
+
+    load_picker_items(picker, 500)
+    if picker['source'] is None and not picker['items']:
+        return []
+
+    with raw_key_session():
+        while True:
+            render_picker(picker, title)
+            # 没有按键时继续加载剩余候选项，界面保持可响应
+            while picker['source'] is not None and not key_pending(0):
+                load_picker_items(picker, 2000)
+                render_picker(picker, title)
+            key = read_key()
+            page = max(shutil.get_terminal_size((80, 24))[1] - 5, 3)
+            last = max(len(picker['matches']) - 1, 0)
+            if key in ('esc', 'ctrl-c'):
+                return None
+            elif key == 'enter':
+                break
+            elif key == 'up':
+                picker['cursor'] = max(picker['cursor'] - 1, 0)
+            elif key == 'down':
+                picker['cursor'] = min(picker['cursor'] + 1, last)
+            elif key == 'pgup':
+                picker['cursor'] = max(picker['cursor'] - page, 0)
+            elif key == 'pgdn':
+                picker['cursor'] = min(picker['cursor'] + page, last)
+            elif key == 'home':
+                picker['cursor'] = 0
+            elif key == 'end':
+                picker['cursor'] = last
+            elif key in ('space', 'tab'):
+                if picker['matches']:
+                    picker['selected'] ^= {picker['matches'][picker['cursor']]}
+                    picker['cursor'] = min(picker['cursor'] + 1, last)
+            elif key == 'ctrl-a':
+                matched = set(picker['matches'])
+                if matched <= picker['selected']:
+                    picker['selected'] -= matched
+                else:
+                    picker['selected'] |= matched
+            elif key == 'backspace':
+                filter_picker_items(picker, picker['query'][:-1])
+            elif len(key) == 1 and key.isprintable():
+                filter_picker_items(picker, picker['query'] + key)
+    items = picker['items']
+    return [items[i][1] for i in sorted(picker['selected'])]
+
+def apply_to_paths(command, paths):
+    """
+    对一批路径执行同一个 Git 命令
+    支持 --pathspec-from-file 的命令只启动一个进程，其余命令分批传参
+    @param command: list Git 命令及参数(不含路径)
+    @param paths: list 路径列表
+    @return: bool 是否执行成功
+    """
+    if not paths:
+        return True
+    if command[0] in ('add', 'restore', 'reset', 'rm', 'checkout'):
+        data = b'\0'.join(os.fsencode(path) for path in paths)
+        result = subprocess.run(['git', '--literal-pathspecs'] + command +
+                                ['--pathspec-from-file=-', '--pathspec-file-nul'],
+                                input=data, capture_output=True)
+        if result.stderr:
+            print(result.stderr.decode('utf-8', 'replace'))
+        return result.returncode == 0
+    ok = True
+    batch, size = [], 0
+    for path in paths:
+        batch.append(path)
+        size += len(path) + 1
+        if size > 30000:
+            ok = execute_git(['--literal-pathspecs'] + command + ['--'] + batch) and ok
+            batch, size = [], 0
+    if batch:
+        ok = execute_git(['--literal-pathspecs'] + command + ['--'] + batch) and ok
+    return ok
+
+def pick_and_apply(title, predicate, command, done_message):
+    """
+    从状态流中挑选文件并批量执行操作
+    @param title: str 选择器标题
+    @param predicate: function 判断状态码是否可作为候选项
+    @param command: list 要执行的 Git 命令(不含路径)
+    @param done_message: str 完成提示
+    @return: None
+    """
+    entries = (entry for entry in iter_status_entries() if predicate(entry[0]))
+    paths = pick_files(entries, title)
+    if paths is None:
+        print_colored("\n已取消", "yellow")
+    elif not paths:
+        print_colored("\n没有可选择的文件", "yellow")
+    elif len(paths) > 1 and not confirm_action(f"将对 {len(paths)} 个文件执行 git {command[0]}", 'confirm_batch'):
+        print_colored("\n已取消", "yellow")
+    elif apply_to_paths(command, paths):
+        print_colored(f"\n✓ {done_message} ({len(paths)} 个文件)", "green")
+
 def handle_add():
     """
     处理git add命令的优化版本
@@ -158,15 +810,17 @@ def handle_add():
         print("1. 暂存所有更改   (git add .)")
         print("2. 暂存指定文件   (git add <file>)")
         print("3. 交互式暂存     (git add -p)")
-        print("\n说明: 交互式暂存可以让你逐块审查并选择要暂存的更改")
-        print("     每块更改都可以选择:")
-        print("     y - 暂存这块更改")
-        print("     n - 不暂存这块更改")
-        print("     s - 将这块拆分成更小的块")
-        print("     q - 退出")
+        print("4. 选择文件暂存   (从变更列表中勾选)")
+        if get_setting('show_hints'):
+            print("\n说明: 交互式暂存可以让你逐块审查并选择要暂存的更改")
+            print("     每块更改都可以选择:")
+            print("     y - 暂存这块更改")
+            print("     n - 不暂存这块更改")
+            print("     s - 将这块拆分成更小的块")
+            print("     q - 退出")
         print("\n0. 返回主菜单")
         
-        choice = input("\n请选择 (0-3): ")
+        choice = input("\n请选择 (0-4): ")
         
         if choice == "0":
             return
@@ -182,6 +836,10 @@ def handle_add():
             print("你可以逐块审查更改并决定是否暂存")
             execute_git(['add', '-p'])
             print_colored("\n✓ 交互式暂存完成", "green")
+        elif choice == "4":
+            pick_and_apply("选择要暂存的文件",
+                           lambda code: code[1] != ' ' and code != '!!',
+                           ['add', '--all'], "已暂存所选文件")
         else:
             print_colored("无效的选择，请重试", "yellow")
             continue
@@ -211,6 +869,287 @@ def handle_commit():
                     print_colored("\n✗ 提交失败", "red")
                     input("\n按回车键继续...")
 
+BRANCH_RECORD_FIELDS = [('name', '%(refname:strip=2)'), ('oid', '%(objectname)'),
+                        ('date', '%(committerdate:unix)'), ('author', '%(authorname)')]
+
+def get_checked_out_branches():
+    """
+    获取所有工作区中已检出的分支，批量操作会跳过这些分支
+    @return: set 分支名集合
+    """
+    result = subprocess.run(['git', 'worktree', 'list', '--porcelain'], capture_output=True, text=True, encoding='utf-8')
+    return {line[len('branch refs/heads/'):] for line in result.stdout.splitlines()
+            if line.startswith('branch refs/heads/')}
+
+def get_protected_branches(target=None):
+    """
+    获取批量删除时必须保留的分支: 所有工作区中已检出的分支、默认分支以及 target 对应的本地分支
+    远程跟踪分支(如 origin/main)对应同名的本地分支
+    @param target: str 合并目标(可选)
+    @return: set 分支名集合
+    """
+    protected = get_checked_out_branches()
+    for name in [get_default_branch()] + ([target] if target else []):
+        result = subprocess.run(['git', 'rev-parse', '--symbolic-full-name', name],
+                                capture_output=True, text=True, encoding='utf-8')
+        full = result.stdout.strip() if result.returncode == 0 else ''
+        if full.startswith('refs/heads/'):
+            protected.add(full[len('refs/heads/'):])
+        elif full.startswith('refs/remotes/') and full.count('/') >= 3:
+            protected.add(full.split('/', 3)[3])
+        else:
+            protected.add(name)
+    return protected
+
+def plan_branch_deletion(mode, value, now=None):
+    """
+    用一次 git for-each-ref 找出要批量删除的分支，
+    已检出的分支、默认分支和合并目标对应的分支会被跳过
+    @param mode: str 筛选方式: merged(已合并到 value)、pattern(名称匹配 value)、age(超过 value 天未提交)
+    @param value: str 目标分支、名称模式或天数
+    @param now: float 当前时间戳(可选，默认当前时间)
+    @return: list 分支记录字典列表
+    """
+    import fnmatch
+    options = [f'--merged={value}'] if mode == 'merged' else []
+    protected = get_protected_branches(value if mode == 'merged' else None)
+    cutoff = (now or time.time()) - int(value) * 86400 if mode == 'age' else None
+    branches = []
+    for record in iter_ref_records(['refs/heads'], BRANCH_RECORD_FIELDS, options):
+        if record['name'] in protected:
+            continue
+        if mode == 'pattern' and not fnmatch.fnmatchcase(record['name'], value):
+            continue
+        if mode == 'age' and int(record['date']) >= cutoff:
+            continue
+        branches.append(record)
+    return branches
+
+def plan_branch_rename(pattern, replacement):
+    """
+    按模式计算批量重命名，模式和替换中各含一个 *，如 feature/* -> archive/feature/*
+    新名称与现有分支(含本次被重命名的原分支)或其他新名称相同、互为目录前缀时
+    结果会依赖重命名的先后顺序，这些分支会被列为冲突而不重命名
+    @param pattern: str 原分支名模式
+    @param replacement: str 新分支名模式
+    @return: tuple (可重命名的 (分支记录字典, 新分支名) 列表, 冲突的 (分支记录字典, 新分支名) 列表)，
+             已检出的分支会被跳过
+    """
+    import collections
+    if pattern.count('*') != 1 or replacement.count('*') != 1:
+        return [], []
+    prefix, suffix = pattern.split('*')
+    protected = get_checked_out_branches()
+    candidates = []
+    existing = set()
+    for record in iter_ref_records(['refs/heads'], BRANCH_RECORD_FIELDS):
+        name = record['name']
+        existing.add(name)
+        if (name in protected or not name.startswith(prefix) or not name.endswith(suffix)
+                or len(name) < len(prefix) + len(suffix)):
+            continue
+        candidates.append((record, replacement.replace('*', name[len(prefix):len(name) - len(suffix)])))
+
+    targets = collections.Counter(new_name for _, new_name in candidates)
+    names = existing | set(targets)
+    directories = {name[:i] for name in names for i, char in enumerate(name) if char == '/'}
+    renames, conflicts = [], []
+    for record, new_name in candidates:
+        parents = {new_name[:i] for i, char in enumerate(new_name) if char == '/'}
+        if new_name in existing or targets[new_name] > 1 or new_name in directories or parents & names:
+            conflicts.append((record, new_name))
+        else:
+            renames.append((record, new_name))
+    return renames, conflicts
+
+def delete_branches(branches):
+    """
+    用一个 git update-ref 事务删除分支，分支在此期间被移动时整个事务失败
+    @param branches: list 分支记录字典列表
+    @return: bool 是否删除成功
+    """
+    if not update_refs([f"delete refs/heads/{branch['name']} {branch['oid']}" for branch in branches]):
+        return False
+    remove_branch_config([branch['name'] for branch in branches])
+    return True
+
+def rename_branches(renames):
+    """
+    逐个用 git branch -m 重命名分支，git 会同时迁移引用日志和 branch.<名称>.* 配置
+    @param renames: list (分支记录字典, 新分支名) 列表
+    @return: bool 是否全部重命名成功
+    """
+    failed = []
+    for branch, new_name in renames:
+        result = subprocess.run(['git', 'branch', '-m', branch['name'], new_name],
+                                capture_output=True, text=True, encoding='utf-8')
+        if result.returncode != 0:
+            failed.append(branch['name'])
+            print_colored(f"无法重命名 {branch['name']}: {result.stderr.strip()}", "red")
+    invalidate_git_config()
+    return not failed
+
+def get_branch_config_names():
+    """
+    从配置快照中找出带有 branch.<名称>.* 配置的分支
+    @return: set 分支名集合
+    """
+    names = set()
+    for _, _, name, _ in get_git_config_snapshot():
+        if name.startswith('branch.') and name.count('.') >= 2:
+            names.add(name[len('branch.'):name.rindex('.')])
+    return names
+
+def remove_branch_config(names):
+    """
+    删除已删除分支的 branch.<名称>.* 配置，只对确实有配置的分支启动进程
+    @param names: list 分支名列表
+    @return: None
+    """
+    configured = get_branch_config_names()
+    for name in names:
+        if name in configured:
+            subprocess.run(['git', 'config', '--remove-section', f'branch.{name}'], capture_output=True)
+    invalidate_git_config()
+
+def print_branch_plan(branches, renames=None):
+    """
+    预览批量分支操作
+    @param branches: list 分支记录字典列表
+    @param renames: list 新分支名列表(可选，与 branches 一一对应)
+    @return: None
+    """
+    lines = []
+    for i, branch in enumerate(branches):
+        date = time.strftime('%Y-%m-%d', time.localtime(int(branch['date'])))
+        target = f" -> {renames[i]}" if renames else ''
+        lines.append(f"  {branch['name']}{target}  ({date}, {branch['author']})")
+    page_output(lines)
+    print_colored(f"\n共 {len(branches)} 个分支", "cyan")
+
+# 没有 commit-graph 时逐个分支调用 git rev-list 计算领先/落后的分支数上限
+BRANCH_RELATION_FALLBACK_LIMIT = 200
+
+# 超过此天数未提交的分支在分析报告中标记为过期
+BRANCH_STALE_DAYS = 90
+
+def get_default_branch():
+    """
+    获取默认分支: 优先使用 origin/HEAD，其次是设置中的默认分支，最后是当前分支
+    @return: str 分支名
+    """
+    result = subprocess.run(['git', 'symbolic-ref', '-q', '--short', 'refs/remotes/origin/HEAD'],
+                            capture_output=True, text=True)
+    if result.returncode == 0:
+        return result.stdout.strip()
+    configured = get_setting('default_branch')
+    if configured and subprocess.run(['git', 'rev-parse', '--verify', '-q', f'refs/heads/{configured}'],
+                                     capture_output=True).returncode == 0:
+        return configured
+    return subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], capture_output=True, text=True).stdout.strip()
+
+def git_supports_ahead_behind():
+    """
+    检查 git for-each-ref 是否支持 %(ahead-behind:...) (git 2.41 起)
+    @return: bool 是否支持
+    """
+    # 输出形如 "git version 2.45.1" 或 "git version 2.45.1 (Apple Git-154)"，版本号固定是第三个字段
+    fields = subprocess.run(['git', 'version'], capture_output=True, text=True).stdout.split()
+    numbers = [int(part) for part in fields[2].split('.')[:2] if part.isdigit()] if len(fields) > 2 else []
+    return len(numbers) == 2 and tuple(numbers) >= (2, 41)
+
+def fill_branch_relations(branches, base_oid):
+    """
+    为没有 %(ahead-behind) 的 git 计算各分支相对基准的领先/落后提交数
+    优先用 commit-graph 在进程内计算：每个不同的分支提交各做一次与基准的染色遍历(不是单次遍历)，
+    父提交信息在各次遍历间共享缓存；没有 commit-graph 且分支过多时不计算
+    @param branches: list 分支记录字典列表，结果写入 ahead 和 behind 字段
+    @param base_oid: str 基准提交ID
+    @return: bool 是否全部计算完成
+    """
+    relations = {}
+    graph = open_commit_graph()
+    try:
+        base_pos = graph_find(graph, base_oid) if graph is not None else None
+        pending = []
+        for branch in branches:
+            oid = branch['oid']
+            if oid not in relations and base_pos is not None:
+                pos = graph_find(graph, oid)
+                if pos is not None:
+                    behind, ahead, _ = paint_commit_graph(graph, base_pos, pos)
+                    relations[oid] = (ahead, behind)
+            if oid not in relations:
+                pending.append(oid)
+    finally:
+        if graph is not None:
+            close_commit_graph(graph)
+    pending = list(dict.fromkeys(pending))
+    complete = len(pending) <= BRANCH_RELATION_FALLBACK_LIMIT
+    if complete:
+        for oid in pending:
+            behind, ahead, _ = get_branch_relation(base_oid, oid)
+            relations[oid] = (ahead, behind)
+    for branch in branches:
+        branch['ahead'], branch['behind'] = relations.get(branch['oid'], (None, None))
+    return complete
+
+def analyze_branches(base, include_remote=False):
+    """
+    分析所有分支的最后提交、领先/落后和合并状态
+    分支信息来自一次 git for-each-ref，合并状态来自一次 git for-each-ref --merged
+    @param base: str 基准分支
+    @param include_remote: bool 是否包含远程跟踪分支
+    @return: dict 包含 base、branches(分支记录列表)、complete(领先/落后是否全部算出)，基准无效时返回 None
+    """
+    result = subprocess.run(['git', 'rev-parse', '--verify', '-q', f'{base}^{{commit}}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    base_oid = result.stdout.strip()
+    patterns = ['refs/heads'] + (['refs/remotes'] if include_remote else [])
+    fields = BRANCH_RECORD_FIELDS + [('ref', '%(refname)')]
+    native = git_supports_ahead_behind()
+    if native:
+        fields = fields + [('relation', f'%(ahead-behind:{base_oid})')]
+    merged = {record['ref'] for record in iter_ref_records(patterns, [('ref', '%(refname)')], [f'--merged={base_oid}'])}
+    branches = []
+    for record in iter_ref_records(patterns, fields):
+        if record['ref'].startswith('refs/remotes/') and record['ref'].endswith('/HEAD'):
+            continue
+        record['merged'] = record['ref'] in merged
+        if native:
+            ahead, behind = record.pop('relation').split()
+            record['ahead'], record['behind'] = int(ahead), int(behind)
+        branches.append(record)
+    complete = True if native else fill_branch_relations(branches, base_oid)
+    return {'base': base, 'branches': branches, 'complete': complete}
+
+def print_branch_analysis(analysis, now=None):
+    """
+    显示分支分析报告，按最后提交时间从旧到新排列
+    @param analysis: dict analyze_branches 的结果
+    @param now: float 当前时间戳(可选，默认当前时间)
+    @return: None
+    """
+    branches = sorted(analysis['branches'], key=lambda branch: int(branch['date']))
+    cutoff = (now or time.time()) - BRANCH_STALE_DAYS * 86400
+    stale = sum(1 for branch in branches if int(branch['date']) < cutoff)
+    merged = sum(1 for branch in branches if branch['merged'])
+    width = min(40, max((display_width(branch['name']) for branch in branches), default=0))
+    lines = []
+    for branch in branches:
+        date = time.strftime('%Y-%m-%d', time.localtime(int(branch['date'])))
+        relation = '-' if branch['ahead'] is None else f"+{branch['ahead']}/-{branch['behind']}"
+        flags = ('已合并 ' if branch['merged'] else '') + ('过期' if int(branch['date']) < cutoff else '')
+        padding = ' ' * max(0, width - display_width(branch['name']))
+        lines.append(f"  {branch['name']}{padding}  {date}  {relation:>13}  {branch['author'][:16]:<16}  {flags}")
+    print_colored(f"\n相对 {analysis['base']} 的分支分析 (领先/落后)", "cyan")
+    page_output(lines)
+    print_colored(f"\n共 {len(branches)} 个分支，已合并 {merged} 个，超过 {BRANCH_STALE_DAYS} 天未更新 {stale} 个", "cyan")
+    if not analysis['complete']:
+        print_colored("分支较多且没有 commit-graph，部分领先/落后未计算，可在仓库维护中更新提交图", "yellow")
+
 def handle_branch():
     """
     处理分支管理
@@ -227,9 +1166,14 @@ def handle_branch():
         print("\n1. 创建新分支")
         print("2. 删除分支")
         print("3. 重命名分支")
+        print("4. 批量删除已合并分支")
+        print("5. 按名称模式批量删除分支")
+        print("6. 批量删除长期未更新的分支")
+        print("7. 按名称模式批量重命名分支")
+        print("8. 分支分析(过期与合并状态)")
         print("\n0. 返回主菜单")
         
-        choice = input("\n请选择 (0-3): ")
+        choice = input("\n请选择 (0-8): ")
         
         if choice == "0":
             return
@@ -250,12 +1194,215 @@ def handle_branch():
             new = input("请输入新分支名: ")
             if execute_git(['branch', '-m', old, new]):
                 print_colored(f"\n✓ 已将分支 {old} 重命名为 {new}", "green")
+        elif choice in ("4", "5", "6"):
+            if choice == "4":
+                mode, value = 'merged', input("\n请输入目标分支(回车使用当前分支): ").strip() or 'HEAD'
+            elif choice == "5":
+                mode, value = 'pattern', input("\n请输入分支名模式(如 feature/*): ").strip()
+            else:
+                mode, value = 'age', input("\n删除超过多少天未提交的分支: ").strip()
+            if not value or (mode == 'age' and not value.isdigit()):
+                print_colored("无效的输入", "yellow")
+            else:
+                branches = plan_branch_deletion(mode, value)
+                if not branches:
+                    print_colored("没有符合条件的分支", "yellow")
+                else:
+                    print_branch_plan(branches)
+                    confirmed = confirm_action(f"确定要删除以上 {len(branches)} 个分支吗？", 'confirm_dangerous')
+                    if confirmed and delete_branches(branches):
+                        print_colored(f"\n✓ 已删除 {len(branches)} 个分支", "green")
+        elif choice == "7":
+            pattern = input("\n请输入原分支名模式(如 feature/*): ").strip()
+            replacement = input("请输入新分支名模式(如 archive/feature/*): ").strip()
+            renames, conflicts = plan_branch_rename(pattern, replacement)
+            if conflicts:
+                print_colored(f"\n以下 {len(conflicts)} 个分支的新名称与现有分支冲突，将被跳过:", "yellow")
+                print_branch_plan([branch for branch, _ in conflicts], [name for _, name in conflicts])
+            if not renames:
+                print_colored("没有可重命名的分支，模式中需各含一个 *", "yellow")
+            else:
+                print_branch_plan([branch for branch, _ in renames], [name for _, name in renames])
+                confirmed = confirm_action(f"确定要重命名以上 {len(renames)} 个分支吗？", 'confirm_batch')
+                if confirmed and rename_branches(renames):
+                    print_colored(f"\n✓ 已重命名 {len(renames)} 个分支", "green")
+        elif choice == "8":
+            default = get_default_branch()
+            base = input(f"\n请输入基准分支(回车使用 {default}): ").strip() or default
+            include_remote = input("包含远程跟踪分支？(y/N): ").lower() == 'y'
+            analysis = analyze_branches(base, include_remote)
+            if analysis is None:
+                print_colored(f"无效的基准分支: {base}", "red")
+            else:
+                print_branch_analysis(analysis)
         else:
             print_colored("无效的选择", "yellow")
             continue
         
         input("\n按回车键继续...")
 
+CLONE_PRESETS = {
+    "1": ("完整克隆", {}),
+    "2": ("部分克隆     (--filter=blob:none)", {'filter': 'blob:none'}),
+    "3": ("浅克隆       (--depth 1)", {'depth': 1}),
+    "4": ("单分支克隆   (--single-branch)", {'single_branch': True}),
+    "5": ("稀疏检出     (--sparse --filter=blob:none)", {'filter': 'blob:none', 'sparse': True}),
+}
+
+def get_remote_head(url):
+    """
+    查询远程仓库的默认分支
+    @param url: str 仓库地址
+    @return: str 默认分支名或None
+    """
+    result = subprocess.run(['git', 'ls-remote', '--symref', url, 'HEAD'],
+                            capture_output=True, text=True, encoding='utf-8')
+    for line in result.stdout.splitlines():
+        if line.startswith('ref: refs/heads/'):
+            return line[len('ref: refs/heads/'):].split('\t')[0]
+    return None
+
+def clone_repository(url, dest, options=None, retries=2, on_line=None):
+    """
+    可断点续传的克隆
+    以 init + fetch + checkout 的方式完成克隆，中断或失败后再次对同一目录
+    执行会跳过已完成的步骤，通过 fetch 继续拉取
+    @param url: str 仓库地址
+    @param dest: str 目标目录
+    @param options: dict 克隆选项(filter/depth/single_branch/branch/sparse)
+    @param retries: int fetch 失败后的重试次数
+    @param on_line: function 输出回调，参见 run_git_streaming
+    @return: bool 是否克隆成功
+    """
+    options = options or {}
+    on_line = on_line or print_stream_line
+    git = lambda *args: subprocess.run(['git', '-C', dest] + list(args),
+                                       capture_output=True, text=True, encoding='utf-8')
+
+    checked_out = False
+    if os.path.isdir(os.path.join(dest, '.git')):
+        origin = git('config', '--get', 'remote.origin.url').stdout.strip()
+        if origin != url:
+            on_line(f"目标目录已是其他仓库 ({origin or '无 origin'})", False)
+            return False
+        # 已检出的仓库只补充拉取，不再重置本地分支
+        checked_out = git('rev-parse', '--verify', '-q', 'HEAD').returncode == 0
+        on_line("检测到已有的克隆，继续拉取...", False)
+    else:
+        if os.path.isdir(dest) and os.listdir(dest):
+            on_line(f"目标目录 {dest} 不为空", False)
+            return False
+        os.makedirs(dest, exist_ok=True)
+        if subprocess.run(['git', 'init', '-q', dest]).returncode != 0:
+            return False
+        git('remote', 'add', 'origin', url)
+
+    branch = options.get('branch') or get_remote_head(url)
+    if branch and (options.get('single_branch') or options.get('depth')):
+        git('config', 'remote.origin.fetch', f'+refs/heads/{branch}:refs/remotes/origin/{branch}')
+    if options.get('filter'):
+        git('config', 'remote.origin.promisor', 'true')
+        git('config', 'remote.origin.partialclonefilter', options['filter'])
+
+    fetch = ['-C', dest, 'fetch', '--progress', 'origin']
+    if options.get('depth'):
+        fetch.append(f"--depth={options['depth']}")
+    if options.get('filter'):
+        fetch.append(f"--filter={options['filter']}")
+    for attempt in range(retries + 1):
+        if run_git_streaming(fetch, on_line=on_line) == 0:
+            break
+        if attempt < retries:
+            wait = 2 ** attempt
+            on_line(f"拉取失败，{wait} 秒后重试 ({attempt + 1}/{retries})...", False)
+            time.sleep(wait)
+    else:
+        on_line("拉取失败，可稍后对同一目录重新执行克隆以继续", False)
+        return False
+
+    if not branch or checked_out:
+        # 远程仓库为空或已完成检出，只保留已拉取的内容
+        return True
+    git('remote', 'set-head', 'origin', branch)
+    if options.get('sparse'):
+        git('sparse-checkout', 'init', '--cone')
+    checkout = ['-C', dest, 'checkout', '--progress', '-B', branch, '--track', f'origin/{branch}']
+    return run_git_streaming(checkout, on_line=on_line) == 0
+
+def clone_many(jobs, options=None, workers=4, retries=2):
+    """
+    并发克隆多个仓库
+    @param jobs: list (仓库地址, 目标目录) 列表
+    @param options: dict 克隆选项，参见 clone_repository
+    @param workers: int 最大并发数
+    @param retries: int 每个仓库的重试次数
+    @return: list (仓库地址, 目标目录, 是否成功, 耗时秒数) 列表
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    lock = threading.Lock()
+
+    def run(job):
+        url, dest = job
+        name = os.path.basename(dest.rstrip('/\\')) or dest
+
+        def on_line(text, is_progress):
+            # 并发时只输出完整的行，避免多个进度行互相覆盖
+            if not is_progress and text.strip():
+                with lock:
+                    print(f"[{name}] {text}")
+
+        start = time.time()
+        try:
+            ok = clone_repository(url, dest, options, retries, on_line)
+        except Exception as e:
+            on_line(f"克隆出错: {str(e)}", False)
+            ok = False
+        return url, dest, ok, time.time() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, jobs))
+
+def read_clone_list(list_file):
+    """
+    读取批量克隆列表，每行格式: 仓库地址 [目标目录]
+    @param list_file: str 列表文件路径
+    @return: list (仓库地址, 目标目录) 列表
+    """
+    jobs = []
+    with open(list_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            url = parts[0]
+            dest = parts[1] if len(parts) > 1 else os.path.basename(url.rstrip('/'))
+            if dest.endswith('.git'):
+                dest = dest[:-4]
+            jobs.append((url, dest))
+    return jobs
+
+def choose_clone_options():
+    """
+    选择克隆预设
+    @return: dict 克隆选项，取消时返回None
+    """
+    print("\n克隆模式:")
+    for key, (label, _) in CLONE_PRESETS.items():
+        print(f"{key}. {label}")
+    preset = input("\n请选择克隆模式 (1-5，默认 1): ") or "1"
+    if preset not in CLONE_PRESETS:
+        print_colored("无效的选择", "yellow")
+        return None
+    options = dict(CLONE_PRESETS[preset][1])
+    if 'depth' in options:
+        depth = input("请输入克隆深度(默认 1): ")
+        if depth.isdigit() and int(depth) > 0:
+            options['depth'] = int(depth)
+    branch = input("请输入要克隆的分支(留空使用默认分支): ")
+    if branch:
+        options['branch'] = branch
+    return options
+
 def handle_clone():
     """
     处理git clone命令
@@ -296,6 +1443,256 @@ def handle_clone():
         
         input("\n按回车键继续...")
 
+# git config 快照缓存: 当前目录 -> 配置项列表，写入配置后失效
+_GIT_CONFIG_CACHE = {}
+
+RECOMMENDED_ALIASES = {
+    'st': 'status',
+    'co': 'checkout',
+    'br': 'branch',
+    'ci': 'commit',
+    'unstage': 'reset HEAD --',
+    'last': 'log -1 HEAD',
+    'lg': 'log --color --graph --pretty=format:"%Cred%h%Creset -%C(yellow)%d%Creset %s %Cgreen(%cr) %C(bold blue)<%an>%Creset" --abbrev-commit'
+}
+
+def parse_config_list(data, fields):
+    """
+    解析 git config --list -z 的输出
+    @param data: str 命令输出
+    @param fields: int 每个配置项前附带的字段数(--show-scope/--show-origin 各一个)
+    @return: list (附带字段..., 配置名, 配置值) 列表，无值的配置项值为 None
+    """
+    parts = data.split('\0')
+    entries = []
+    for i in range(0, len(parts) - fields - 1, fields + 1):
+        key, sep, value = parts[i + fields].partition('\n')
+        entries.append(tuple(parts[i:i + fields]) + (key, value if sep else None))
+    return entries
+
+def get_git_config_snapshot(refresh=False):
+    """
+    用一次 git config --list 调用读取所有配置
+    结果按当前目录缓存，之后的读取都从缓存中获取
+    @param refresh: bool 是否强制重新读取
+    @return: list (作用域, 来源, 配置名, 配置值) 列表，按 Git 的读取顺序排列
+    """
+    cwd = os.getcwd()
+    if refresh or cwd not in _GIT_CONFIG_CACHE:
+        result = subprocess.run(['git', 'config', '--list', '-z', '--show-scope', '--show-origin'],
+                                capture_output=True, text=True, encoding='utf-8', errors='replace')
+        _GIT_CONFIG_CACHE[cwd] = parse_config_list(result.stdout, 2)
+    return _GIT_CONFIG_CACHE[cwd]
+
+def invalidate_git_config():
+    """
+    写入配置后清空 git config 快照缓存
+    @return: None
+    """
+    _GIT_CONFIG_CACHE.clear()
+
+def git_config_get(key, default=None):
+    """
+    从配置快照中读取配置值，多次定义时以最后一次为准
+    @param key: str 配置名，节名和键名不区分大小写
+    @param default: str 未配置时的默认值
+    @return: str 配置值
+    """
+    key = key.lower()
+    value = default
+    for _, _, name, val in get_git_config_snapshot():
+        if name == key:
+            value = val
+    return value
+
+def git_config_get_prefix(prefix):
+    """
+    从配置快照中读取某个前缀下的所有配置
+    @param prefix: str 配置名前缀，如 alias.
+    @return: dict 去掉前缀后的配置名 -> (配置值, 来源)
+    """
+    prefix = prefix.lower()
+    values = {}
+    for _, origin, name, value in get_git_config_snapshot():
+        if name.startswith(prefix):
+            values[name[len(prefix):]] = (value, origin)
+    return values
+
+def normalize_config_key(key):
+    """
+    规范化配置名: 节名和键名转为小写，子节名保持原样
+    @param key: str 配置名，如 branch.Main.remote
+    @return: str 规范化后的配置名
+    """
+    section, _, rest = key.partition('.')
+    subsection, _, name = rest.rpartition('.')
+    return '.'.join(part for part in (section.lower(), subsection, name.lower()) if part)
+
+def set_git_config(values, scope='global'):
+    """
+    批量写入配置，与快照中已有值相同的项会被跳过
+    只为有变化的配置项调用 git config --<作用域>，直接写入该作用域自己的配置文件
+    @param values: dict 配置名 -> 配置值
+    @param scope: str 作用域，global 或 local
+    @return: bool 是否全部写入成功
+    """
+    current = {name: value for sc, _, name, value in get_git_config_snapshot() if sc == scope}
+    changed = {key: value for key, value in values.items()
+               if current.get(normalize_config_key(key)) != value}
+    if not changed:
+        return True
+    ok = True
+    for key, value in changed.items():
+        ok = execute_git(['config', f'--{scope}', key, value]) and ok
+    invalidate_git_config()
+    return ok
+
+def read_config_values(path):
+    """
+    读取 gitconfig 格式文件中的所有配置
+    @param path: str 文件路径
+    @return: dict 配置名 -> 配置值
+    """
+    if not os.path.exists(path):
+        return {}
+    result = subprocess.run(['git', 'config', '--file', path, '--list', '-z'],
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        print_colored(f"无法读取配置文件 {path}: {result.stderr.strip()}", "red")
+        return {}
+    return {key: value or '' for key, value in parse_config_list(result.stdout, 0)}
+
+def read_alias_file(path):
+    """
+    读取 gitconfig 格式文件中的别名
+    @param path: str 文件路径
+    @return: dict 别名 -> 命令
+    """
+    return {key[len('alias.'):]: value for key, value in read_config_values(path).items()
+            if key.startswith('alias.')}
+
+def quote_config_value(value):
+    """
+    按 gitconfig 语法转义配置值
+    @param value: str 配置值
+    @return: str 加引号并转义后的值
+    """
+    value = value.replace('\\', '\\\\').replace('"', '\\"')
+    value = value.replace('\n', '\\n').replace('\t', '\\t')
+    return f'"{value}"'
+
+def write_config_file(path, values, header):
+    """
+    以 gitconfig 格式原子地写入配置文件
+    @param path: str 文件路径
+    @param values: dict 配置名 -> 配置值，配置名可含子节，如 branch.main.remote
+    @param header: str 文件开头的注释
+    @return: None
+    """
+    lines = [header]
+    last = None
+    for key, value in sorted(values.items()):
+        section, _, name = key.rpartition('.')
+        if section != last:
+            base, _, subsection = section.partition('.')
+            lines.append(f"[{base} {quote_config_value(subsection)}]" if subsection else f"[{base}]")
+            last = section
+        lines.append(f"\t{name} = {quote_config_value(value)}")
+    write_file_atomic(path, '\n'.join(lines) + '\n')
+
+def write_alias_file(path, aliases):
+    """
+    以 gitconfig 格式原子地写入别名文件
+    @param path: str 文件路径
+    @param aliases: dict 别名 -> 命令
+    @return: None
+    """
+    write_config_file(path, {f'alias.{name}': cmd for name, cmd in aliases.items()}, "# 由 EzGit 管理的 Git 别名")
+
+def update_aliases(add=None, remove=()):
+    """
+    批量添加或删除别名
+    新别名写入全局配置，已有相同值的别名会被跳过；
+    删除时在别名实际所在的每个作用域中调用 git config --unset-all
+    @param add: dict 要添加的别名 -> 命令
+    @param remove: iterable 要删除的别名
+    @return: bool 是否全部成功
+    """
+    ok = True
+    snapshot = get_git_config_snapshot()
+    for name in remove:
+        key = normalize_config_key(f'alias.{name}')
+        scopes = []
+        for scope, _, found, _ in snapshot:
+            if found == key and scope not in scopes:
+                scopes.append(scope)
+        if not scopes:
+            print_colored(f"别名不存在: {name}", "yellow")
+            ok = False
+        for scope in scopes:
+            if scope == 'command':
+                print_colored(f"别名 {name} 来自命令行参数或环境变量，无法删除", "yellow")
+                ok = False
+            else:
+                ok = execute_git(['config', f'--{scope}', '--unset-all', f'alias.{name}']) and ok
+    invalidate_git_config()
+    if add:
+        ok = set_git_config({f'alias.{name}': cmd for name, cmd in add.items()}, 'global') and ok
+    return ok
+
+def print_aliases():
+    """
+    显示所有别名及其来源
+    @return: None
+    """
+    aliases = git_config_get_prefix('alias.')
+    if not aliases:
+        print_colored("\n暂无别名", "yellow")
+        return
+    width = max(len(name) for name in aliases)
+    for name, (cmd, origin) in sorted(aliases.items()):
+        print(f"git {name.ljust(width)} => git {cmd}  ({origin})")
+
+def export_aliases(path):
+    """
+    导出所有别名到 gitconfig 格式文件
+    @param path: str 导出文件路径
+    @return: int 导出的别名数量，失败返回 -1
+    """
+    aliases = {name: value or '' for name, (value, _) in git_config_get_prefix('alias.').items()}
+    try:
+        write_alias_file(path, aliases)
+    except OSError as e:
+        print_colored(f"无法写入文件: {e}", "red")
+        return -1
+    return len(aliases)
+
+def import_aliases(path):
+    """
+    从 gitconfig 格式文件批量导入别名
+    @param path: str 导入文件路径
+    @return: int 导入的别名数量，失败返回 -1
+    """
+    if not os.path.exists(path):
+        print_colored(f"文件不存在: {path}", "red")
+        return -1
+    aliases = read_alias_file(path)
+    if aliases and not update_aliases(add=aliases):
+        return -1
+    return len(aliases)
+
+def print_git_config():
+    """
+    按来源分组显示配置快照
+    @return: None
+    """
+    last = None
+    for scope, origin, key, value in get_git_config_snapshot(refresh=True):
+        if (scope, origin) != last:
+            print_colored(f"\n[{scope}] {origin}", "cyan")
+            last = (scope, origin)
+        print(key if value is None else f"{key}={value}")
+
 def handle_config():
     """
     处理 Git 配置
@@ -316,22 +1713,27 @@ def handle_config():
         if choice == "0":
             return
         elif choice == "1":
-            execute_git(['config', '--list'])
+            print_git_config()
         elif choice == "2":
+            print(f"\n当前用户: {git_config_get('user.name', '未设置')} <{git_config_get('user.email', '未设置')}>")
             username = input("\n请输入Git用户名: ")
             email = input("请输入Git邮箱: ")
+            values = {}
             if username:
-                execute_git(['config', '--global', 'user.name', username])
+                values['user.name'] = username
             if email:
-                execute_git(['config', '--global', 'user.email', email])
+                values['user.email'] = email
+            set_git_config(values)
         elif choice == "3":
+            print(f"\n当前编辑器: {git_config_get('core.editor', '未设置')}")
             editor = input("\n请输入编辑器命令(如 vim, nano): ")
             if editor:
-                execute_git(['config', '--global', 'core.editor', editor])
+                set_git_config({'core.editor': editor})
         elif choice == "4":
+            print(f"\n当前默认分支名: {git_config_get('init.defaultBranch', '未设置')}")
             branch = input("\n请输入默认分支名(如 main): ")
             if branch:
-                execute_git(['config', '--global', 'init.defaultBranch', branch])
+                set_git_config({'init.defaultBranch': branch})
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -408,7 +1810,7 @@ def handle_remote():
             print("\n当前远程仓库列表:")
             execute_git(['remote', '-v'])
             remote_name = input("\n请输入要删除的远程仓库名称: ")
-            if confirm_action(f"确定要删除远程仓库 {remote_name} 吗？"):
+            if confirm_action(f"确定要删除远程仓库 {remote_name} 吗？", 'confirm_dangerous'):
                 execute_git(['remote', 'remove', remote_name])
                 print_colored(f"\n成功删除远程仓库: {remote_name}", "green")
         elif choice == "5":
@@ -487,7 +1889,7 @@ def handle_push():
                             print_colored("\n× 储藏失败", "red")
                             continue
                     elif subchoice == "3":
-                        if confirm_action("警告：这将丢失所有未保存的更改！确定要继续吗？"):
+                        if confirm_action("警告：这将丢失所有未保存的更改！确定要继续吗？", 'confirm_dangerous'):
                             execute_git(['checkout', '.'])
                             print_colored("\n✓ 已放弃所有更改", "green")
                         else:
@@ -555,8 +1957,8 @@ def handle_push():
                 continue
         elif choice == "3":
             print("\n当前标签列表:")
-            execute_git(['tag', '-l'])
-            tag = input("\n请输入要推送的标签名(回车推送所有标签): ")
+            page_output(name for name, _ in find_tags())
+            tag = input("\n请输入要推送的标签名(回车推送远程缺少的标签): ")
             if tag:
                 result = execute_git(['push', 'origin', tag])
                 if result:
@@ -564,11 +1966,13 @@ def handle_push():
                 else:
                     print_colored(f"\n× 推送标签失败，请检查标签名是否正确", "red")
             else:
-                result = execute_git(['push', '--tags', 'origin'])
-                if result:
-                    print_colored("\n✓ 成功推送所有标签到远程仓库", "green")
+                pushed = push_missing_tags('origin')
+                if pushed > 0:
+                    print_colored(f"\n✓ 成功推送 {pushed} 个标签到远程仓库", "green")
+                elif pushed == 0:
+                    print_colored("\n✓ 远程仓库的标签已是最新", "green")
                 else:
-                    print_colored("\n× 推送标签失败，请检查是否有标签存在", "red")
+                    print_colored("\n× 推送标签失败，请检查远程仓库是否可用", "red")
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -615,7 +2019,7 @@ def handle_log():
             execute_git(['log', '--graph', '--oneline', '--all'])
         elif choice == "4":
             file = input("\n请输入文件路径: ")
-            execute_git(['log', '--follow', '--', file])
+            show_file_history(file)
         elif choice == "5":
             keyword = input("\n请输入搜索关键词: ")
             execute_git(['log', '--grep', keyword, '--all'])
@@ -628,6 +2032,185 @@ def handle_log():
         
         input("\n按回车键继续...")
 
+def iter_ref_records(patterns, fields, options=()):
+    """
+    用一次 git for-each-ref 流式读取引用
+    @param patterns: list 引用模式(如 refs/tags/v1.*)
+    @param fields: list (字段名, for-each-ref 格式占位符) 列表
+    @param options: list 额外的 for-each-ref 参数(如 --merged=main)
+    @return: generator 逐条产出 字段名 -> 值 的字典
+    """
+    fmt = '%1f'.join(atom for _, atom in fields) + '%00'
+    return iter_git_fields(['git', 'for-each-ref', f'--format={fmt}'] + list(options) + ['--'] + list(patterns),
+                           [name for name, _ in fields])
+
+def update_refs(commands, message=None):
+    """
+    通过一次 git update-ref --stdin 事务更新引用，任一命令失败时全部不生效
+    @param commands: list update-ref 指令行(如 'delete refs/tags/v1 <oid>')
+    @param message: str 写入引用日志的说明(可选)
+    @return: bool 是否执行成功
+    """
+    if not commands:
+        return True
+    result = subprocess.run(['git', 'update-ref'] + (['-m', message] if message else []) + ['--stdin'],
+                            input='\n'.join(commands) + '\n', capture_output=True, text=True, encoding='utf-8')
+    if result.returncode != 0:
+        print_colored(result.stderr.strip() or "引用更新失败", "red")
+    return result.returncode == 0
+
+def push_refspecs(remote, refspecs):
+    """
+    用一次 git push --atomic 推送所有 refspec，任一引用被拒绝时远程仓库不做任何更新
+    @param remote: str 远程仓库名
+    @param refspecs: list refspec 列表
+    @return: bool 是否推送成功
+    """
+    return execute_git(['push', '--porcelain', '--atomic', remote] + list(refspecs))
+
+def get_remote_tags(remote):
+    """
+    用一次 git ls-remote 读取远程仓库的所有标签
+    @param remote: str 远程仓库名
+    @return: dict 标签名 -> 对象ID，查询失败时返回 None
+    """
+    result = subprocess.run(['git', 'ls-remote', '--tags', remote], capture_output=True, text=True, encoding='utf-8')
+    if result.returncode != 0:
+        print_colored(result.stderr.strip() or "无法读取远程标签", "red")
+        return None
+    tags = {}
+    for line in result.stdout.splitlines():
+        oid, _, ref = line.partition('\t')
+        if ref.startswith('refs/tags/') and not ref.endswith('^{}'):
+            tags[ref[len('refs/tags/'):]] = oid
+    return tags
+
+def read_tag_list(path):
+    """
+    读取标签列表文件，每行为 "标签名 [版本]"，省略版本时使用 HEAD，# 开头的行为注释
+    @param path: str 文件路径
+    @return: list (标签名, 版本) 列表
+    """
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                entries.append((fields[0], fields[1] if len(fields) > 1 else 'HEAD'))
+    return entries
+
+def check_ref_name(name):
+    """
+    按 git check-ref-format 的规则检查引用名(不含 refs/xxx/ 前缀)，避免为每个名称启动一个进程
+    @param name: str 分支名或标签名
+    @return: str 不合法的原因，合法时返回 None
+    """
+    if not name or name == '@' or name.startswith('/') or name.endswith('/') or '//' in name:
+        return "名称为空或斜杠位置不合法"
+    if name.endswith('.') or '..' in name or '@{' in name:
+        return "不能以 . 结尾或包含 .. 和 @{"
+    if any(ord(char) < 0x20 or ord(char) == 0x7f or char in ' ~^:?*[\\' for char in name):
+        return "包含空白、控制字符或 ~^:?*[\\ 等字符"
+    if any(part.startswith('.') or part.endswith('.lock') for part in name.split('/')):
+        return "路径的每一段不能以 . 开头或以 .lock 结尾"
+    return None
+
+def create_tags(entries):
+    """
+    批量创建指向提交的轻量标签
+    先在本地检查所有名称，再用一次 git cat-file --batch-check 把所有版本解析为提交(<版本>^{commit})，
+    最后用一个 update-ref 事务创建
+    任一条目有问题时整批都不创建，并指出是哪一条
+    @param entries: list (标签名, 版本) 列表
+    @return: int 创建的标签数，失败时返回 0
+    """
+    if not entries:
+        return 0
+    existing = {name for name, _ in find_tags()}
+    seen = set()
+    for number, (name, rev) in enumerate(entries, 1):
+        reason = check_ref_name(name)
+        if reason is None and (name in existing or name in seen):
+            reason = "标签已存在"
+        if reason:
+            print_colored(f"第 {number} 条 ({name} {rev}) 无效: {reason}", "red")
+            return 0
+        seen.add(name)
+    result = subprocess.run(['git', 'cat-file', '--batch-check=%(objectname)'],
+                            input=''.join(f"{rev}^{{commit}}\n" for _, rev in entries),
+                            capture_output=True, text=True, encoding='utf-8')
+    commands = []
+    for number, ((name, rev), line) in enumerate(zip(entries, result.stdout.splitlines()), 1):
+        if line.endswith(' missing') or line.endswith(' ambiguous'):
+            print_colored(f"第 {number} 条 ({name} {rev}) 无效: 无法解析为提交", "red")
+            return 0
+        commands.append(f"create refs/tags/{name} {line}")
+    return len(commands) if update_refs(commands, f"tag: created {len(commands)} tags from list") else 0
+
+def find_tags(pattern=None):
+    """
+    查找匹配模式的本地标签，模式按 fnmatch 规则匹配，与远程标签的匹配方式一致
+    @param pattern: str 标签名模式(如 v1.*)，省略时返回所有标签
+    @return: list (标签名, 对象ID) 列表
+    """
+    import fnmatch
+    return [(record['name'], record['oid'])
+            for record in iter_ref_records(['refs/tags'], [('name', '%(refname:strip=2)'), ('oid', '%(objectname)')])
+            if pattern is None or fnmatch.fnmatchcase(record['name'], pattern)]
+
+def plan_tag_deletion(pattern, remote=None):
+    """
+    找出按模式要删除的本地标签和远程标签
+    @param pattern: str 标签名模式
+    @param remote: str 同时删除标签的远程仓库名(可选)
+    @return: tuple (本地 (标签名, 对象ID) 列表, 远程标签名列表)，读取远程失败时返回 None
+    """
+    import fnmatch
+    remote_names = []
+    if remote:
+        remote_tags = get_remote_tags(remote)
+        if remote_tags is None:
+            return None
+        remote_names = sorted(name for name in remote_tags if fnmatch.fnmatchcase(name, pattern))
+    return find_tags(pattern), remote_names
+
+def delete_tags(local, remote=None, remote_names=()):
+    """
+    批量删除标签，本地用一个 update-ref 事务，远程用批量推送
+    @param local: list 本地 (标签名, 对象ID) 列表
+    @param remote: str 远程仓库名(可选)
+    @param remote_names: list 要在远程删除的标签名
+    @return: bool 是否全部删除成功
+    """
+    if not update_refs([f"delete refs/tags/{name} {oid}" for name, oid in local]):
+        return False
+    if remote and remote_names:
+        return push_refspecs(remote, [f":refs/tags/{name}" for name in remote_names])
+    return True
+
+def push_missing_tags(remote):
+    """
+    只推送远程仓库缺少的标签，远程已有但指向不同对象的标签不会被覆盖
+    @param remote: str 远程仓库名
+    @return: int 推送的标签数，失败返回 -1
+    """
+    remote_tags = get_remote_tags(remote)
+    if remote_tags is None:
+        return -1
+    missing = []
+    conflicts = 0
+    for name, oid in find_tags():
+        if name not in remote_tags:
+            missing.append(f"refs/tags/{name}:refs/tags/{name}")
+        elif remote_tags[name] != oid:
+            conflicts += 1
+    if conflicts:
+        print_colored(f"有 {conflicts} 个标签与远程不一致，已跳过", "yellow")
+    if not missing:
+        return 0
+    print(f"需要推送 {len(missing)} 个标签")
+    return len(missing) if push_refspecs(remote, missing) else -1
+
 def handle_tag():
     """
     处理标签管理
@@ -643,9 +2226,11 @@ def handle_tag():
         print("3. 删除标签")
         print("4. 推送标签")
         print("5. 检出标签")
+        print("6. 从列表文件批量创建标签")
+        print("7. 按模式批量删除标签")
         print("\n0. 返回上级菜单")
         
-        choice = input("\n请选择 (0-5): ")
+        choice = input("\n请选择 (0-7): ")
         
         if choice == "0":
             return
@@ -657,17 +2242,46 @@ def handle_tag():
             execute_git(['tag', '-a', tag_name, '-m', message])
         elif choice == "3":
             tag_name = input("\n请输入要删除的标签名称: ")
-            if confirm_action(f"确定要删除标签 {tag_name} 吗？"):
+            if confirm_action(f"确定要删除标签 {tag_name} 吗？", 'confirm_dangerous'):
                 execute_git(['tag', '-d', tag_name])
         elif choice == "4":
-            tag_name = input("\n请输入要推送的标签名称(回车推送所有标签): ")
+            tag_name = input("\n请输入要推送的标签名称(回车推送远程缺少的标签): ")
             if tag_name:
                 execute_git(['push', 'origin', tag_name])
             else:
-                execute_git(['push', 'origin', '--tags'])
+                pushed = push_missing_tags('origin')
+                if pushed >= 0:
+                    print_colored(f"\n✓ 已推送 {pushed} 个远程缺少的标签", "green")
         elif choice == "5":
             tag_name = input("\n请输入要检出的标签名称: ")
             execute_git(['checkout', tag_name])
+        elif choice == "6":
+            path = input("\n请输入列表文件路径(每行: 标签名 [版本]): ").strip()
+            try:
+                entries = read_tag_list(path)
+            except OSError as e:
+                print_colored(f"无法读取文件: {e}", "red")
+            else:
+                created = create_tags(entries)
+                if created:
+                    print_colored(f"\n✓ 已创建 {created} 个标签", "green")
+        elif choice == "7":
+            pattern = input("\n请输入标签名模式(如 v1.*): ").strip()
+            if pattern:
+                remote = 'origin' if input("同时删除 origin 上的匹配标签？(y/N): ").lower() == 'y' else None
+                plan = plan_tag_deletion(pattern, remote)
+                if plan is not None and not plan[0] and not plan[1]:
+                    print_colored("没有匹配的标签", "yellow")
+                elif plan is not None:
+                    local, remote_names = plan
+                    lines = [f"  本地: {name}" for name, _ in local]
+                    lines += [f"  {remote}: {name}" for name in remote_names]
+                    page_output(lines)
+                    message = f"确定要删除 {len(local)} 个本地标签"
+                    if remote:
+                        message += f"和 {len(remote_names)} 个 {remote} 上的标签"
+                    if confirm_action(message + "吗？", 'confirm_dangerous') and delete_tags(local, remote, remote_names):
+                        print_colored(f"\n✓ 已删除匹配 {pattern} 的标签", "green")
         else:
             print_colored("\n无效的选择，请重试", "yellow")
             continue
@@ -715,7 +2329,7 @@ def handle_stash():
             print("\n储藏列表:")
             execute_git(['stash', 'list'])
             stash_id = input("\n请输入要删除的储藏ID: ")
-            if confirm_action(f"确定要删除储藏 {stash_id} 吗？"):
+            if confirm_action(f"确定要删除储藏 {stash_id} 吗？", 'confirm_dangerous'):
                 execute_git(['stash', 'drop', stash_id])
         elif choice == "5":
             print("\n储藏列表:")
@@ -734,6 +2348,9 @@ def check_git_repo():
     检查当前目录是否为Git仓库
     @return: bool 是否为Git仓库
     """
+    response = daemon_request('repo')
+    if response is not None:
+        return response['ok']
     try:
         result = subprocess.run(['git', 'rev-parse', '--is-inside-work-tree'],
                               capture_output=True,
@@ -781,9 +2398,10 @@ def handle_status():
         print("1. 查看仓库状态")
         print("2. 初始化新仓库")
         print("3. 克隆远程仓库")
+        print("4. 批量克隆仓库")
         print("\n0. 返回主菜单")
         
-        choice = input("\n请选择 (0-3): ")
+        choice = input("\n请选择 (0-4): ")
         
         if choice == "0":
             return
@@ -803,16 +2421,74 @@ def handle_status():
             url = input("\n请输入仓库地址: ")
             if url:
                 dir_name = input("请输入目标目录(留空使用当前目录): ")
-                if dir_name:
-                    if execute_git(['clone', url, dir_name]):
-                        print_colored(f"\n✓ 克隆成功! 目标目录: {dir_name}", "green")
-                else:
-                    if execute_git(['clone', url, '.']):
-                        print_colored("\n✓ 克隆成功! 目标目录: 当前目录", "green")
+                options = choose_clone_options()
+                if options is not None:
+                    if clone_repository(url, dir_name or '.', options):
+                        print_colored(f"\n✓ 克隆成功! 目标目录: {dir_name or '当前目录'}", "green")
+                    else:
+                        print_colored("\n✗ 克隆失败", "red")
                 input("\n按回车键继续...")
+        elif choice == "4":
+            print("\n列表文件每行一个仓库，格式: 仓库地址 [目标目录]")
+            list_file = input("请输入列表文件路径: ")
+            try:
+                jobs = read_clone_list(list_file)
+            except OSError as e:
+                print_colored(f"\n读取列表失败: {str(e)}", "red")
+                jobs = []
+            options = choose_clone_options() if jobs else None
+            if options is not None:
+                workers = input("请输入并发数(默认 4): ")
+                workers = int(workers) if workers.isdigit() else 4
+                results = clone_many(jobs, options, workers)
+                print_colored("\n批量克隆结果:", "cyan")
+                for url, dest, ok, seconds in results:
+                    print_colored(f"{'✓' if ok else '✗'} {dest:<30} {seconds:6.1f}s  {url}",
+                                  "green" if ok else "red")
+            input("\n按回车键继续...")
         else:
             print_colored("无效的选择", "yellow")
 
+DEFAULT_CONFIG = {
+    "author": "",
+    "email": "",
+    "default_branch": "main",
+    "auto_push": False,
+    "theme": "default",
+    "log_level": "INFO",
+    "show_output": True,
+    "show_errors": True,
+    "show_hints": True,
+    "confirm_dangerous": True,
+    "confirm_batch": True,
+    "color_success": "green",
+    "color_warning": "yellow",
+    "color_error": "red",
+    "color_info": "cyan",
+}
+
+COLOR_CHOICES = ['red', 'green', 'yellow', 'blue', 'purple', 'cyan']
+
+# 工具设置: 键 -> (说明, 可选值)，可选值为 None 表示开关
+SETTINGS_SCHEMA = {
+    "show_output": ("显示命令输出", None),
+    "show_errors": ("显示错误信息", None),
+    "show_hints": ("显示操作提示", None),
+    "confirm_dangerous": ("危险操作确认", None),
+    "confirm_batch": ("批量操作确认", None),
+    "color_success": ("成功消息颜色", COLOR_CHOICES),
+    "color_warning": ("警告消息颜色", COLOR_CHOICES),
+    "color_error": ("错误消息颜色", COLOR_CHOICES),
+    "color_info": ("提示消息颜色", COLOR_CHOICES),
+    "log_level": ("日志级别", ['DEBUG', 'INFO', 'WARNING', 'ERROR']),
+}
+
+# 合并后的配置缓存，按各配置文件的修改时间失效
+_CONFIG_CACHE = {'stamp': None, 'config': None}
+
+# 语义颜色映射，由颜色设置生成
+_COLOR_ALIASES = {}
+
 def get_config_dir():
     """
     获取配置目录
@@ -827,33 +2503,118 @@ def get_config_dir():
     user_config = os.path.expanduser('~/.ezgit')
     return user_config
 
-def load_config():
+def get_config_files():
     """
-    加载配置文件
-    @return: dict 配置信息
+    获取按优先级从低到高排列的配置文件列表
+    @return: list 配置文件路径列表(用户配置，以及存在时的当前目录配置)
     """
+    files = [os.path.join(os.path.expanduser('~/.ezgit'), 'config.json')]
     config_dir = get_config_dir()
-    config_file = os.path.join(config_dir, 'config.json')
-    
-    # 确保配置目录存在
-    os.makedirs(config_dir, exist_ok=True)
-    
-    # 加载或创建配置
-    if os.path.exists(config_file):
-        with open(config_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    else:
-        # 默认配置
-        default_config = {
-            "author": "",
-            "email": "",
-            "default_branch": "main",
-            "auto_push": False,
-            "theme": "default"
-        }
-        # 保存默认配置
-        save_config(default_config)
-        return default_config
+    if os.path.abspath(config_dir) != os.path.abspath(os.path.dirname(files[0])):
+        files.append(os.path.join(config_dir, 'config.json'))
+    return files
+
+def read_config_file(path):
+    """
+    读取单个配置文件
+    @param path: str 配置文件路径
+    @return: dict 配置内容，文件不存在或格式错误时返回空字典
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except OSError:
+        return {}
+    except ValueError as e:
+        print_colored(f"配置文件 {path} 格式错误，已忽略: {str(e)}", "yellow")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def load_config():
+    """
+    加载配置
+    依次合并默认配置、~/.ezgit/config.json 和当前目录的 .ezgit/config.json，
+    结果缓存在内存中，配置文件修改时间变化时才重新读取
+    @return: dict 配置信息，调用方修改前应先复制
+    """
+    files = get_config_files()
+    stamp = []
+    for path in files:
+        try:
+            stamp.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            stamp.append((path, None))
+    stamp = tuple(stamp)
+    if _CONFIG_CACHE['config'] is not None and _CONFIG_CACHE['stamp'] == stamp:
+        return _CONFIG_CACHE['config']
+
+    config = dict(DEFAULT_CONFIG)
+    for path, mtime in stamp:
+        if mtime is not None:
+            config.update(read_config_file(path))
+    _CONFIG_CACHE.update(stamp=stamp, config=config)
+    _COLOR_ALIASES.clear()
+    _COLOR_ALIASES.update({
+        'green': config['color_success'],
+        'yellow': config['color_warning'],
+        'red': config['color_error'],
+        'cyan': config['color_info'],
+    })
+    return config
+
+def save_config(config):
+    """
+    保存配置到当前生效的配置目录
+    只写入与默认值及上层配置不同的项，写入采用临时文件加重命名的方式
+    @param config: dict 完整的配置信息
+    @return: None
+    """
+    files = get_config_files()
+    target = files[-1]
+    base = dict(DEFAULT_CONFIG)
+    for path in files[:-1]:
+        base.update(read_config_file(path))
+    raw = read_config_file(target)
+    for key, value in config.items():
+        if key in base and base[key] == value:
+            raw.pop(key, None)
+        else:
+            raw[key] = value
+    write_json_atomic(target, raw)
+    _CONFIG_CACHE.update(stamp=None, config=None)
+    load_config()
+
+def get_setting(key):
+    """
+    读取一项设置
+    @param key: str 设置名称
+    @return: object 设置值
+    """
+    return load_config().get(key, DEFAULT_CONFIG.get(key))
+
+def set_setting(key, value):
+    """
+    修改一项设置并保存，值会按设置类型校验
+    @param key: str 设置名称
+    @param value: object 新的设置值
+    @return: bool 是否保存成功
+    """
+    _, choices = SETTINGS_SCHEMA.get(key, (None, None))
+    if key in SETTINGS_SCHEMA:
+        if choices is None and not isinstance(value, bool):
+            print_colored(f"设置 {key} 只能是开或关", "red")
+            return False
+        if choices is not None and value not in choices:
+            print_colored(f"设置 {key} 的可选值: {', '.join(choices)}", "red")
+            return False
+    config = dict(load_config())
+    config[key] = value
+    try:
+        save_config(config)
+    except OSError as e:
+        print_colored(f"保存配置失败: {str(e)}", "red")
+        return False
+    return True
 
 def setup_logging():
     """
@@ -864,7 +2625,7 @@ def setup_logging():
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
     
     logger = logging.getLogger('ezgit')
-    logger.setLevel(logging.INFO)
+    logger.setLevel(getattr(logging, get_setting('log_level'), logging.INFO))
     
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     
@@ -874,6 +2635,522 @@ def setup_logging():
     
     return logger
 
+# 守护进程空闲超过该秒数后自动退出
+DAEMON_IDLE_TIMEOUT = 1800
+
+# 守护进程内的仓库状态: 仓库根目录 -> 状态字典
+_DAEMON_REPOS = {}
+
+# 守护进程内的目录映射: 请求的工作目录 -> (仓库根目录, 工作目录的 inode)，每次使用前重新校验
+_DAEMON_CWDS = {}
+
+def get_daemon_socket_path():
+    """
+    获取守护进程的 Unix 套接字路径
+    @return: str 套接字路径
+    """
+    return os.path.expanduser('~/.ezgit/daemon.sock')
+
+def daemon_request(method, params=None, cwd=None, timeout=2.0):
+    """
+    向守护进程发送一次请求(一行 JSON 请求，一行 JSON 响应)
+    守护进程未运行或平台不支持 Unix 套接字时返回 None，调用方应回退到直接执行 git
+    @param method: str 请求方法
+    @param params: dict 请求参数
+    @param cwd: str 请求对应的工作目录，默认为当前目录
+    @param timeout: float 超时秒数
+    @return: dict 响应(ok, result/error)，不可用时返回 None
+    """
+    path = get_daemon_socket_path()
+    if not os.path.exists(path):
+        return None
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    request = {'method': method, 'params': params or {}, 'cwd': cwd or os.getcwd()}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+    return json.loads(line) if line else None
+
+def is_daemon_cwd_valid(cwd, root, inode):
+    """
+    检查缓存的 工作目录 -> 仓库根目录 映射是否仍然有效:
+    目录没有被删除或替换、仓库的 .git 仍然存在，且两者之间没有新建的嵌套仓库
+    @param cwd: str 工作目录
+    @param root: str 缓存的仓库根目录
+    @param inode: int 登记时工作目录的 inode
+    @return: bool 是否有效
+    """
+    try:
+        if os.stat(cwd).st_ino != inode or not os.path.exists(os.path.join(root, '.git')):
+            return False
+    except OSError:
+        return False
+    path = os.path.realpath(cwd)
+    while path != root:
+        if os.path.exists(os.path.join(path, '.git')):
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return True
+
+def drop_daemon_repo(root):
+    """
+    移除守护进程内的仓库状态并结束其 cat-file 进程
+    @param root: str 仓库根目录
+    @return: None
+    """
+    repo = _DAEMON_REPOS.pop(root, None)
+    if repo is not None and repo['cat_file'] is not None:
+        repo['cat_file'].kill()
+        repo['cat_file'].wait()
+
+def close_daemon_repos():
+    """
+    结束所有仓库的 cat-file 进程并清空守护进程内的缓存
+    @return: None
+    """
+    for root in list(_DAEMON_REPOS):
+        drop_daemon_repo(root)
+    _DAEMON_CWDS.clear()
+
+def get_daemon_repo(cwd):
+    """
+    查找(必要时登记)工作目录所在仓库的守护进程状态
+    缓存的目录映射每次都会重新校验，目录被删除、重新初始化或移入其他仓库后会重新查找
+    @param cwd: str 工作目录
+    @return: dict 仓库状态，不在仓库中时返回 None
+    """
+    if cwd in _DAEMON_CWDS:
+        root, inode = _DAEMON_CWDS[cwd]
+        if root in _DAEMON_REPOS and is_daemon_cwd_valid(cwd, root, inode):
+            return _DAEMON_REPOS[root]
+        del _DAEMON_CWDS[cwd]
+        if not os.path.exists(os.path.join(root, '.git')):
+            drop_daemon_repo(root)
+    result = subprocess.run(['git', 'rev-parse', '--show-toplevel', '--absolute-git-dir'],
+                            cwd=cwd, capture_output=True, text=True, encoding='utf-8')
+    if result.returncode != 0:
+        return None
+    root, git_dir = result.stdout.splitlines()[:2]
+    _DAEMON_CWDS[cwd] = (root, os.stat(cwd).st_ino)
+    if root in _DAEMON_REPOS:
+        return _DAEMON_REPOS[root]
+    repo = {
+        'root': root,
+        'git_dir': git_dir,
+        'lock': threading.Lock(),
+        'cat_file': None,
+        'files': (None, []),
+    }
+    return _DAEMON_REPOS.setdefault(root, repo)
+
+def read_head_branch(git_dir):
+    """
+    直接读取 HEAD 文件获取当前分支，无需启动 git
+    @param git_dir: str .git 目录
+    @return: str 分支名，分离头指针时返回提交ID
+    """
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    prefix = 'ref: refs/heads/'
+    return head[len(prefix):] if head.startswith(prefix) else head
+
+def daemon_cat_file(repo, obj):
+    """
+    通过常驻的 git cat-file --batch 进程读取对象
+    对象内容可能是二进制，按 base64 编码返回，调用方自行解码
+    @param repo: dict 仓库状态
+    @param obj: str 对象名(提交ID、HEAD:路径等)
+    @return: dict 对象类型、大小和 base64 编码的内容，不存在时返回 None
+    """
+    import base64
+    if '\n' in obj:
+        return None
+    with repo['lock']:
+        proc = repo['cat_file']
+        if proc is None or proc.poll() is not None:
+            proc = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=repo['root'],
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL)
+            repo['cat_file'] = proc
+        proc.stdin.write(obj.encode('utf-8') + b'\n')
+        proc.stdin.flush()
+        # 对象名中可能有空格，不存在时输出 "<对象名> missing"，所以从右侧拆分
+        header = proc.stdout.readline().rstrip(b'\n').decode('utf-8', 'replace')
+        if not header:
+            # 进程已退出(如仓库被删除)，下次请求时重新启动
+            repo['cat_file'] = None
+            return None
+        if header.endswith((' missing', ' ambiguous')):
+            return None
+        oid, kind, size = header.rsplit(' ', 2)
+        content = proc.stdout.read(int(size))
+        proc.stdout.read(1)
+    return {'oid': oid, 'type': kind, 'size': int(size), 'encoding': 'base64',
+            'content': base64.b64encode(content).decode('ascii')}
+
+def daemon_ls_files(repo):
+    """
+    获取已跟踪文件列表，按索引文件修改时间缓存
+    @param repo: dict 仓库状态
+    @return: list 文件路径列表
+    """
+    try:
+        stamp = os.stat(os.path.join(repo['git_dir'], 'index')).st_mtime_ns
+    except OSError:
+        stamp = None
+    with repo['lock']:
+        cached_stamp, files = repo['files']
+        if stamp is None or cached_stamp != stamp:
+            result = subprocess.run(['git', 'ls-files', '-z'], cwd=repo['root'],
+                                    capture_output=True)
+            files = [os.fsdecode(name) for name in result.stdout.split(b'\0') if name]
+            repo['files'] = (stamp, files)
+    return files
+
+def handle_daemon_request(request):
+    """
+    处理一条守护进程请求
+    @param request: dict 请求(method, params, cwd)
+    @return: object 请求结果
+    """
+    method = request.get('method')
+    params = request.get('params') or {}
+    if method == 'ping':
+        return {'pid': os.getpid(), 'repos': sorted(_DAEMON_REPOS)}
+    repo = get_daemon_repo(request.get('cwd') or os.getcwd())
+    if repo is None:
+        raise ValueError("当前目录不是Git仓库")
+    if method == 'repo':
+        return {'root': repo['root'], 'git_dir': repo['git_dir'],
+                'branch': read_head_branch(repo['git_dir'])}
+    elif method == 'ls_files':
+        return daemon_ls_files(repo)
+    elif method == 'status':
+        return [[code, path, orig] for code, path, orig in iter_status_entries(cwd=repo['root'])]
+    elif method == 'cat_file':
+        return daemon_cat_file(repo, params.get('object', ''))
+    raise ValueError(f"未知的请求方法: {method}")
+
+def serve_daemon():
+    """
+    在前台运行守护进程，监听 Unix 套接字直到收到 stop 请求或空闲超时
+    协议为每行一个 JSON 对象: 请求 {"method", "params", "cwd"}，响应 {"ok", "result"/"error"}
+    @return: None
+    """
+    import socketserver
+    path = get_daemon_socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if daemon_request('ping') is not None:
+        print_colored("守护进程已在运行", "yellow")
+        return
+    if os.path.exists(path):
+        os.remove(path)
+
+    stop_event = threading.Event()
+    state = {'last': time.time()}
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                state['last'] = time.time()
+                try:
+                    request = json.loads(line)
+                    if request.get('method') == 'stop':
+                        response = {'ok': True, 'result': None}
+                        stop_event.set()
+                    else:
+                        response = {'ok': True, 'result': handle_daemon_request(request)}
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(path, RequestHandler)
+    finally:
+        os.umask(old_umask)
+    worker = threading.Thread(target=server.serve_forever, daemon=True)
+    worker.start()
+    try:
+        while not stop_event.wait(5):
+            if time.time() - state['last'] > DAEMON_IDLE_TIMEOUT:
+                break
+    finally:
+        server.shutdown()
+        server.server_close()
+        close_daemon_repos()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def start_daemon():
+    """
+    在后台启动守护进程并等待其就绪
+    @return: bool 是否启动成功
+    """
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        print_colored("当前平台不支持 Unix 套接字，无法启动守护进程", "yellow")
+        return False
+    if daemon_request('ping') is not None:
+        print_colored("守护进程已在运行", "yellow")
+        return True
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), '--daemon', 'serve'],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        if daemon_request('ping') is not None:
+            print_colored("守护进程已启动", "green")
+            return True
+        time.sleep(0.05)
+    print_colored("守护进程启动超时", "red")
+    return False
+
+def stop_daemon():
+    """
+    停止守护进程
+    @return: bool 是否已停止
+    """
+    if daemon_request('stop') is None:
+        print_colored("守护进程未运行", "yellow")
+        return False
+    deadline = time.time() + 5
+    while time.time() < deadline and os.path.exists(get_daemon_socket_path()):
+        time.sleep(0.05)
+    print_colored("守护进程已停止", "green")
+    return True
+
+def handle_daemon_command(action):
+    """
+    处理 --daemon 命令行参数
+    @param action: str start/stop/status/serve
+    @return: int 退出码
+    """
+    if action == 'serve':
+        serve_daemon()
+        return 0
+    if action == 'start':
+        return 0 if start_daemon() else 1
+    if action == 'stop':
+        return 0 if stop_daemon() else 1
+    response = daemon_request('ping')
+    if response is None:
+        print_colored("守护进程未运行", "yellow")
+        return 1
+    result = response['result']
+    print_colored(f"守护进程运行中 (PID {result['pid']})", "green")
+    for root in result['repos']:
+        print(f"  {root}")
+    return 0
+
+def handle_call_command(method, argument=None):
+    """
+    处理 --call 命令行参数：通过守护进程执行查询并输出 JSON
+    守护进程未运行时在本进程内直接处理
+    @param method: str 请求方法(repo/ls_files/status/cat_file)
+    @param argument: str 请求参数(cat_file 的对象名)
+    @return: int 退出码
+    """
+    params = {'object': argument} if argument else {}
+    response = daemon_request(method, params)
+    if response is None:
+        try:
+            response = {'ok': True, 'result': handle_daemon_request(
+                {'method': method, 'params': params, 'cwd': os.getcwd()})}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+    sys.stdout.write(json.dumps(response, ensure_ascii=False) + '\n')
+    return 0 if response.get('ok') else 1
+
+# 结构化输出使用的提交字段
+LOG_RECORD_FIELDS = [('oid', '%H'), ('author', '%an'), ('email', '%ae'),
+                     ('date', '%aI'), ('subject', '%s')]
+
+JSON_QUERIES = ['status', 'branches', 'remotes', 'log', 'stats',
+                'search-message', 'search-content', 'search-file', 'search-author']
+
+def iter_git_fields(command, names, cwd=None):
+    """
+    流式读取以 \\0 分隔记录、\\x1f 分隔字段的 git 输出
+    @param command: list 完整的 git 命令
+    @param names: list 字段名列表
+    @param cwd: str 执行目录(可选)
+    @return: generator 逐条产出 字段名 -> 值 的字典
+    """
+    for record in iter_git_records(command, cwd):
+        record = record.lstrip(b'\n')
+        if record:
+            values = record.decode('utf-8', 'replace').split('\x1f')
+            yield dict(zip(names, values))
+
+def iter_commit_records(log_args):
+    """
+    流式产出提交记录
+    @param log_args: list 追加到 git log 的参数
+    @return: generator 逐条产出提交记录
+    """
+    names = [name for name, _ in LOG_RECORD_FIELDS]
+    fmt = '%x1f'.join(placeholder for _, placeholder in LOG_RECORD_FIELDS)
+    for record in iter_git_fields(['git', 'log', '-z', f'--format={fmt}'] + log_args, names):
+        yield dict(type='commit', **record)
+
+def iter_branch_records():
+    """
+    流式产出本地和远程分支记录
+    @return: generator 逐条产出分支记录
+    """
+    names = ['ref', 'name', 'oid', 'upstream', 'head', 'date']
+    fmt = '%1f'.join(['%(refname)', '%(refname:short)', '%(objectname)',
+                      '%(upstream:short)', '%(HEAD)', '%(committerdate:iso-strict)']) + '%00'
+    for record in iter_git_fields(['git', 'for-each-ref', f'--format={fmt}',
+                                   'refs/heads', 'refs/remotes'], names):
+        yield {'type': 'branch', 'name': record['name'], 'ref': record['ref'],
+               'oid': record['oid'], 'upstream': record['upstream'] or None,
+               'remote': record['ref'].startswith('refs/remotes/'),
+               'current': record['head'] == '*', 'date': record['date']}
+
+def iter_remote_records():
+    """
+    从配置快照中产出远程仓库记录
+    @return: generator 逐条产出远程仓库记录
+    """
+    remotes = {}
+    for _, _, key, value in get_git_config_snapshot():
+        section, _, rest = key.partition('.')
+        name, _, field = rest.rpartition('.')
+        if section == 'remote' and name and field in ('url', 'pushurl'):
+            remote = remotes.setdefault(name, {'type': 'remote', 'name': name,
+                                               'fetch': None, 'push': None})
+            if field == 'url':
+                remote['fetch'] = value
+                remote['push'] = remote['push'] or value
+            else:
+                remote['push'] = value
+    for remote in remotes.values():
+        yield remote
+
+def iter_status_records():
+    """
+    流式产出工作区状态记录
+    @return: generator 逐条产出状态记录
+    """
+    for code, path, orig in iter_status_entries():
+        yield {'type': 'status', 'index': code[0], 'worktree': code[1],
+               'path': path, 'orig': orig}
+
+def iter_stats_records():
+    """
+    产出提交统计记录: 先按提交数排列的作者，再按月份排列的提交数
+    只读取一遍提交历史
+    @return: generator 逐条产出统计记录
+    """
+    authors = {}
+    months = {}
+    for record in iter_git_fields(['git', 'log', '--all', '-z', '--format=%an%x1f%ae%x1f%ad',
+                                   '--date=format:%Y-%m'], ['name', 'email', 'month']):
+        key = (record['name'], record.get('email', ''))
+        authors[key] = authors.get(key, 0) + 1
+        month = record.get('month', '')
+        months[month] = months.get(month, 0) + 1
+    for (name, email), count in sorted(authors.items(), key=lambda item: -item[1]):
+        yield {'type': 'author', 'name': name, 'email': email, 'commits': count}
+    for month in sorted(months):
+        yield {'type': 'month', 'month': month, 'commits': months[month]}
+
+def iter_query_records(query, argument=None, limit=None):
+    """
+    根据查询名称产出结构化记录
+    @param query: str 查询名称，见 JSON_QUERIES
+    @param argument: str 查询参数(log 的版本范围、搜索关键词等)
+    @param limit: int 最多返回的提交数
+    @return: generator 逐条产出记录
+    """
+    limit_args = [f'--max-count={limit}'] if limit else []
+    if query == 'status':
+        return iter_status_records()
+    elif query == 'branches':
+        return iter_branch_records()
+    elif query == 'remotes':
+        return iter_remote_records()
+    elif query == 'stats':
+        return iter_stats_records()
+    elif query == 'log':
+        return iter_commit_records(limit_args + ([argument] if argument else []) + ['--'])
+    elif query == 'search-file':
+        return ({'type': 'file', 'path': os.fsdecode(path)} for path in
+                iter_git_records(['git', 'ls-files', '-z', '--', '*' + (argument or '')]) if path)
+    if not argument:
+        raise ValueError(f"查询 {query} 需要提供关键词")
+    if query == 'search-message':
+        return iter_commit_records(limit_args + ['--all', '--grep', argument])
+    elif query == 'search-content':
+        return iter_commit_records(limit_args + ['--all', '-S', argument])
+    elif query == 'search-author':
+        return iter_commit_records(limit_args + ['--all', '--author', argument])
+    raise ValueError(f"未知的查询: {query}")
+
+def emit_ndjson(records, stream=None, flush_interval=0.05):
+    """
+    逐行输出 NDJSON 记录，按时间间隔刷新，使下游可以边读边处理
+    @param records: iterable 记录
+    @param stream: file 输出流，默认为标准输出
+    @param flush_interval: float 刷新间隔秒数
+    @return: int 输出的记录数
+    """
+    stream = stream or sys.stdout
+    count = 0
+    last_flush = time.monotonic()
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            stream.flush()
+            last_flush = now
+    stream.flush()
+    return count
+
+def handle_json_command(query, argument=None, limit=None):
+    """
+    处理 --json 命令行参数
+    @param query: str 查询名称
+    @param argument: str 查询参数
+    @param limit: int 最多返回的提交数
+    @return: int 退出码
+    """
+    try:
+        emit_ndjson(iter_query_records(query, argument, limit))
+    except ValueError as e:
+        sys.stdout.write(json.dumps({'type': 'error', 'error': str(e)}, ensure_ascii=False) + '\n')
+        return 1
+    except BrokenPipeError:
+        # 下游(如 head)提前关闭管道时安静退出: 把标准输出指向 devnull，
+        # 避免解释器退出时刷新缓冲区再次报错，退出码与被 SIGPIPE 终止的进程一致
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 141
+    return 0
+
 def parse_args():
     """
     解析命令行参数
@@ -881,8 +3158,14 @@ def parse_args():
     """
     parser = argparse.ArgumentParser(description='EzGit - 简单易用的Git命令行工具')
     parser.add_argument('-v', '--version', action='version', version='EzGit v1.0.0')
-    parser.add_argument('-c', '--config', help='指定配置文件路径')
-    parser.add_argument('-d', '--debug', action='store_true', help='启用调试模式')
+    parser.add_argument('--daemon', choices=['start', 'stop', 'status', 'serve'],
+                        help='管理后台守护进程')
+    parser.add_argument('--call', metavar='METHOD',
+                        choices=['repo', 'ls_files', 'status', 'cat_file'],
+                        help='执行查询并输出 JSON(守护进程运行时由其处理)')
+    parser.add_argument('--json', metavar='QUERY', choices=JSON_QUERIES,
+                        help='以 NDJSON 格式输出查询结果: ' + ', '.join(JSON_QUERIES))
+    parser.add_argument('-n', '--limit', type=int, help='--json 查询最多返回的提交数')
     parser.add_argument('command', nargs='?', help='直接执行指定的Git命令')
     
     return parser.parse_args()
@@ -898,9 +3181,10 @@ def handle_advanced():
     print("3. 子模块管理")
     print("4. 工作流管理")
     print("5. 清理仓库")
+    print("6. 稀疏检出管理")
     print("0. 返回主菜单")
     
-    choice = input("\n请选择 (0-5): ")
+    choice = input("\n请选择 (0-6): ")
     
     if choice == "1":
         handle_diff()
@@ -912,12 +3196,17 @@ def handle_advanced():
         handle_workflow()
     elif choice == "5":
         handle_clean()
+    elif choice == "6":
+        handle_sparse_checkout()
 
 def get_repo_root():
     """
     获取Git仓库根目录
     @return: str 仓库根目录路径或None
     """
+    response = daemon_request('repo')
+    if response is not None:
+        return response['result']['root'] if response['ok'] else None
     try:
         result = subprocess.run(['git', 'rev-parse', '--show-toplevel'],
                               capture_output=True,
@@ -954,9 +3243,11 @@ def handle_recovery():
         print("1. 恢复工作区文件")
         print("2. 恢复暂存区文件")
         print("3. 恢复已删除的文件")
+        print("4. 选择文件恢复工作区")
+        print("5. 选择文件取消暂存")
         print("\n0. 返回主菜单")
 
-        choice = input("\n请选择 (0-3): ")
+        choice = input("\n请选择 (0-5): ")
 
         if choice == "0":
             return
@@ -978,6 +3269,14 @@ def handle_recovery():
             file = input("\n请输入要恢复的文件路径: ")
             if file:
                 execute_git(['checkout', '--', file])
+        elif choice == "4":
+            pick_and_apply("选择要恢复的文件(将丢弃工作区修改)",
+                           lambda code: code[1] in 'MDT',
+                           ['restore'], "已恢复所选文件")
+        elif choice == "5":
+            pick_and_apply("选择要取消暂存的文件",
+                           lambda code: code[0] not in ' ?!',
+                           ['restore', '--staged'], "已取消暂存所选文件")
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -1005,29 +3304,18 @@ def check_update():
             return
         elif choice == "1":
             try:
-                # 先检查是否安装了 requests
-                try:
-                    import requests
-                except ImportError:
-                    print_colored("\n检查更新需要安装 requests 模块", "yellow")
-                    print("\n您可以：")
-                    print("1. 手动访问项目主页检查更新")
-                    print("2. 安装 requests 模块启用自动检查")
-                    print("\n项目主页：")
-                    print_colored("https://github.com/SoKeiKei/EzGit/releases", "cyan")
-                    print("\n安装命令：")
-                    print_colored(f"{sys.executable} -m pip install requests", "cyan")
-                    continue
+                # 使用标准库请求，首次检查更新时才导入网络相关模块
+                import urllib.error
+                import urllib.request
 
                 print_colored("\n正在检查更新...", "cyan")
                 
                 try:
                     # 获取最新版本信息
                     api_url = "https://api.github.com/repos/SoKeiKei/EzGit/releases/latest"
-                    response = requests.get(api_url, timeout=5)
-                    response.raise_for_status()  # 检查响应状态
-                    
-                    latest = response.json()
+                    request = urllib.request.Request(api_url, headers={'User-Agent': 'EzGit'})
+                    with urllib.request.urlopen(request, timeout=5) as response:
+                        latest = json.loads(response.read().decode('utf-8'))
                     latest_version = latest.get('tag_name', '').lstrip('v')
                     current_version = "1.0.0"  # 当前版本号
                     
@@ -1047,12 +3335,15 @@ def check_update():
                         print_colored("\n当前已是最新版本！", "green")
                         print(f"版本号: v{current_version}")
                         
-                except requests.exceptions.RequestException as e:
-                    if "404" in str(e):
+                except urllib.error.HTTPError as e:
+                    if e.code == 404:
                         print_colored("\n暂无发布版本", "yellow")
                     else:
                         print_colored(f"\n检查更新失败: 网络错误", "red")
                         print(f"错误信息: {str(e)}")
+                except urllib.error.URLError as e:
+                    print_colored(f"\n检查更新失败: 网络错误", "red")
+                    print(f"错误信息: {str(e.reason)}")
                 except Exception as e:
                     print_colored(f"\n检查更新失败: {str(e)}", "red")
                     
@@ -1084,24 +3375,55 @@ def check_dependencies():
     检查必要的依赖是否已安装
     @return: bool 是否所有依赖都已安装
     """
-    required_packages = ['requests']
-    missing_packages = []
-    
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
-    
-    if missing_packages:
-        print("\n缺少必要的依赖包:")
-        for package in missing_packages:
-            print(f"- {package}")
-        print("\n请使用以下命令安装依赖:")
-        print("pip install " + " ".join(missing_packages))
+    # 只依赖标准库，唯一的外部依赖是 git 命令本身
+    if shutil.which('git') is None:
+        print("\n未找到 git 命令")
+        print("请先安装 Git 并将其添加到系统 PATH")
         return False
     return True
 
+def format_setting(key, value):
+    """
+    格式化设置值用于显示
+    @param key: str 设置名称
+    @param value: object 设置值
+    @return: str 显示文本
+    """
+    if SETTINGS_SCHEMA[key][1] is None:
+        return "开" if value else "关"
+    return str(value)
+
+def edit_settings(title, keys):
+    """
+    显示并修改一组设置，开关类设置直接切换，其余从可选值中选择
+    @param title: str 设置组标题
+    @param keys: list 设置名称列表
+    @return: None
+    """
+    print(f"\n当前{title}:")
+    for i, key in enumerate(keys, 1):
+        print(f"{i}. {SETTINGS_SCHEMA[key][0]}: {format_setting(key, get_setting(key))}")
+    if input("\n是否修改设置？(y/N): ").lower() != 'y':
+        return
+    index = input(f"请选择要修改的设置 (1-{len(keys)}): ").strip()
+    if not index.isdigit() or not 1 <= int(index) <= len(keys):
+        print_colored("无效的选择", "yellow")
+        return
+    key = keys[int(index) - 1]
+    label, choices = SETTINGS_SCHEMA[key]
+    if choices is None:
+        value = not get_setting(key)
+    else:
+        for i, option in enumerate(choices, 1):
+            print(f"{i}. {option}")
+        option = input(f"请选择 (1-{len(choices)}): ").strip()
+        if not option.isdigit() or not 1 <= int(option) <= len(choices):
+            print_colored("无效的选择", "yellow")
+            return
+        value = choices[int(option) - 1]
+    if set_setting(key, value):
+        print_colored(f"{label}已设置为: {format_setting(key, value)}", "green")
+
 def handle_settings():
     """
     处理工具设置
@@ -1121,35 +3443,275 @@ def handle_settings():
         if choice == "0":
             return
         elif choice == "1":
-            print("\n当前显示设置:")
-            print("1. 显示命令输出")
-            print("2. 显示错误信息")
-            print("3. 显示操作提示")
-            if input("\n是否修改设置？(y/N): ").lower() == 'y':
-                # 这里可以添加设置修改逻辑
-                pass
+            edit_settings("显示设置", ["show_output", "show_errors", "show_hints"])
         elif choice == "2":
-            print("\n当前确认设置:")
-            print("1. 危险操作确认")
-            print("2. 批量操作确认")
-            if input("\n是否修改设置？(y/N): ").lower() == 'y':
-                # 这里可以添加设置修改逻辑
-                pass
+            edit_settings("确认设置", ["confirm_dangerous", "confirm_batch"])
         elif choice == "3":
-            print("\n当前颜色设置:")
-            print("1. 成功消息: 绿色")
-            print("2. 警告消息: 黄色")
-            print("3. 错误消息: 红色")
-            print("4. 提示消息: 青色")
-            if input("\n是否修改设置？(y/N): ").lower() == 'y':
-                # 这里可以添加设置修改逻辑
-                pass
+            edit_settings("颜色设置", ["color_success", "color_warning", "color_error", "color_info"])
         else:
             print_colored("无效的选择", "yellow")
             continue
 
         input("\n按回车键继续...")
 
+DEFAULT_CUSTOM_MENU = {
+    "常用操作": [
+        ("1", "查看状态", "git status"),
+        ("2", "暂存更改", "git add"),
+        ("3", "提交更改", "git commit"),
+        ("4", "推送更改", "git push"),
+        ("5", "拉取更新", "git pull")
+    ]
+}
+
+# 自定义菜单配置缓存，按文件修改时间失效
+_MENU_CONFIG_CACHE = {'mtime': None, 'config': None, 'menu': None}
+
+def get_menu_config_path():
+    """
+    获取自定义菜单配置文件路径
+    @return: str 配置文件路径
+    """
+    return os.path.expanduser('~/.ezgit/menu_config.json')
+
+def write_json_atomic(path, data):
+    """
+    原子地写入 JSON 文件
+    @param path: str 目标文件路径
+    @param data: object 要写入的数据
+    @return: None
+    """
+    write_file_atomic(path, json.dumps(data, indent=4, ensure_ascii=False))
+
+def write_file_atomic(path, text):
+    """
+    原子地写入文本文件：先写临时文件再重命名，避免中途失败留下损坏的文件
+    @param path: str 目标文件路径
+    @param text: str 文件内容
+    @return: None
+    """
+    import tempfile
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def validate_menu_config(data):
+    """
+    校验并规范化自定义菜单配置
+    无效的条目会被丢弃，缺少的常用操作分类使用默认值补齐
+    @param data: object 从配置文件读取的数据
+    @return: tuple (规范化后的配置, 错误信息列表)
+    """
+    errors = []
+    if not isinstance(data, dict):
+        return {'mode': 'full', 'custom_menu': dict(DEFAULT_CUSTOM_MENU)}, ["配置文件格式错误，应为 JSON 对象"]
+    mode = data.get('mode', 'full')
+    if mode not in ('full', 'custom'):
+        errors.append(f"未知的菜单模式: {mode}")
+        mode = 'full'
+    menu = data.get('custom_menu', {})
+    if not isinstance(menu, dict):
+        errors.append("custom_menu 应为对象")
+        menu = {}
+
+    custom_menu = {"常用操作": list(DEFAULT_CUSTOM_MENU["常用操作"])}
+    used = {item[0] for item in custom_menu["常用操作"]}
+    for category, items in menu.items():
+        if category == "常用操作":
+            continue
+        if not isinstance(category, str) or not category.strip() or not isinstance(items, list):
+            errors.append(f"忽略无效的分类: {category}")
+            continue
+        valid = []
+        for item in items:
+            if (not isinstance(item, (list, tuple)) or len(item) != 3 or
+                    not all(isinstance(field, str) and field.strip() for field in item)):
+                errors.append(f"忽略无效的菜单项: {item}")
+                continue
+            num, name, cmd = (field.strip() for field in item)
+            if not num.isdigit() or int(num) < 6:
+                errors.append(f"菜单项 {name} 的编号无效: {num}")
+            elif num in used:
+                errors.append(f"菜单项 {name} 的编号重复: {num}")
+            else:
+                used.add(num)
+                valid.append((num, name, cmd))
+        if valid:
+            custom_menu[category] = valid
+    return {'mode': mode, 'custom_menu': custom_menu}, errors
+
+def load_custom_menu():
+    """
+    加载自定义菜单配置
+    配置只在文件修改时间变化时重新读取和校验，其余情况直接返回内存中的结果
+    @return: dict 菜单配置 (mode/custom_menu)，调用方不应直接修改
+    """
+    path = get_menu_config_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    cache = _MENU_CONFIG_CACHE
+    if cache['config'] is not None and cache['mtime'] == mtime:
+        return cache['config']
+
+    data = {}
+    if mtime is not None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print_colored(f"读取菜单配置失败，使用默认菜单: {str(e)}", "yellow")
+    config, errors = validate_menu_config(data)
+    for error in errors:
+        print_colored(f"菜单配置: {error}", "yellow")
+    cache.update(mtime=mtime, config=config, menu=None)
+    _MENU_FRAME_CACHE.pop('custom', None)
+    return config
+
+def save_custom_menu(config):
+    """
+    保存自定义菜单配置并刷新缓存
+    @param config: dict 菜单配置
+    @return: None
+    """
+    path = get_menu_config_path()
+    write_json_atomic(path, config)
+    # 下次加载时按新的修改时间重新读取
+    _MENU_CONFIG_CACHE.update(mtime=None, config=None, menu=None)
+
+def get_command_handlers():
+    """
+    获取菜单命令与处理函数的对应关系
+    由菜单注册表生成，git status/init/clone 这类组合命令同时登记首个命令
+    @return: dict 命令文本到处理函数的映射
+    """
+    handlers = {"git clone": handle_clone, "git config": handle_config}
+    for _, _, command, handler, _ in MENU_REGISTRY:
+        if handler is not None and command:
+            handlers.setdefault(command, handler)
+            handlers.setdefault(command.split('/')[0], handler)
+    return handlers
+
+def run_custom_command(command):
+    """
+    执行自定义菜单中的 Git 命令，输出实时显示
+    @param command: str 命令文本，可省略开头的 git
+    @return: bool 是否执行成功
+    """
+    import shlex
+    try:
+        args = shlex.split(command, posix=(os.name != 'nt'))
+    except ValueError as e:
+        print_colored(f"命令格式错误: {str(e)}", "red")
+        return False
+    if args and args[0] == 'git':
+        args = args[1:]
+    if not args:
+        return False
+    print_colored(f"\n$ git {' '.join(args)}", "cyan")
+    code = run_git_streaming(args)
+    if code != 0:
+        print_colored(f"\n命令返回 {code}", "yellow")
+    input("\n按回车键继续...")
+    return code == 0
+
+def get_active_menu():
+    """
+    获取当前生效的主菜单
+    @return: tuple (菜单项列表, 编号到处理函数的映射, 缓存名称)
+    """
+    config = load_custom_menu()
+    if config['mode'] != 'custom':
+        return MENU_REGISTRY, MAIN_MENU_HANDLERS, 'main'
+    if _MENU_CONFIG_CACHE['menu'] is None:
+        handlers = get_command_handlers()
+        items = []
+        for category, entries in config['custom_menu'].items():
+            for num, name, cmd in entries:
+                handler = handlers.get(' '.join(cmd.split()))
+                if handler is None:
+                    handler = lambda cmd=cmd: run_custom_command(cmd)
+                items.append((num, name, cmd, handler, category))
+        items.append(("h", "显示帮助", "", show_help, "其他选项"))
+        items.append(("m", "菜单设置", "", handle_custom_menu, "其他选项"))
+        items.append(("0", "退出程序", "", None, "其他选项"))
+        items.extend(item for item in MENU_REGISTRY if item[4] is None)
+        _MENU_CONFIG_CACHE['menu'] = (items, {item[0]: item[3] for item in items}, 'custom')
+    return _MENU_CONFIG_CACHE['menu']
+
+def get_available_menu_items(menu_config):
+    """
+    列出可以加入自定义菜单的功能，编号从 6 开始
+    @param menu_config: dict 菜单配置
+    @return: dict 分类到 (编号, 名称, 命令) 列表的映射
+    """
+    defaults = {cmd for _, _, cmd in DEFAULT_CUSTOM_MENU["常用操作"]}
+    candidates = [(label, command, category) for _, label, command, handler, category in MENU_REGISTRY
+                  if handler is not None and category not in (None, "其他选项")
+                  and command.split('/')[0] not in defaults]
+    candidates += [("克隆仓库", "git clone", "远程操作"), ("配置信息", "git config", "高级操作")]
+    used = {item[0] for items in menu_config['custom_menu'].values() for item in items}
+    available = {}
+    num = 6
+    for label, command, category in candidates:
+        while str(num) in used:
+            num += 1
+        available.setdefault(category, []).append((str(num), label, command))
+        num += 1
+    return available
+
+def choose_menu_category(menu_config):
+    """
+    选择或创建自定义菜单分类
+    @param menu_config: dict 菜单配置
+    @return: str 分类名称，无效输入时返回None
+    """
+    print("\n可用的分类：")
+    categories = [cat for cat in menu_config['custom_menu'].keys() if cat != "常用操作"]
+    if categories:
+        print("现有分类：")
+        for i, cat in enumerate(categories, 1):
+            print(f"{i}. {cat}")
+    else:
+        print("(暂无分类)")
+    print("0. 创建新分类")
+
+    cat_choice = input("\n请选择分类编号(0表示创建新分类): ")
+    if cat_choice == "0":
+        category = input("请输入新分类名称: ").strip()
+        return category if category and category != "常用操作" else None
+    if cat_choice.isdigit() and 1 <= int(cat_choice) <= len(categories):
+        return categories[int(cat_choice) - 1]
+    return None
+
+def print_custom_menu(menu_config):
+    """
+    显示自定义菜单内容
+    @param menu_config: dict 菜单配置
+    @return: None
+    """
+    print_colored("\n[常用操作] (固定项，不可修改)", "yellow")
+    for num, name, cmd in menu_config['custom_menu']["常用操作"]:
+        print(f"{num}. {name} ({cmd})")
+    for category, items in menu_config['custom_menu'].items():
+        if category != "常用操作":
+            print_colored(f"\n[{category}]", "yellow")
+            for num, name, cmd in items:
+                print(f"{num}. {name} ({cmd})")
+
 def handle_custom_menu():
     """
     处理自定义菜单设置
@@ -1164,55 +3726,33 @@ def handle_custom_menu():
         print("2. 自定义菜单项从编号6开始添加")
         print("3. 建议将相关功能放在同一分类下")
         print("4. 编号1-5为系统保留，不可使用")
+        print("5. 命令与内置功能相同时使用内置菜单，否则直接执行该 Git 命令")
         print("\n选项：")
         print("1. 查看当前菜单")
         print("2. 添加菜单项")
         print("3. 删除菜单项")
         print("4. 重置为默认菜单")
+        mode = load_custom_menu()['mode']
+        print(f"5. 切换菜单模式 (当前: {'自定义菜单' if mode == 'custom' else '完整菜单'})")
         print("\n0. 返回主菜单")
         
-        choice = input("\n请选择 (0-4): ")
-        
-        config_path = os.path.expanduser('~/.ezgit/menu_config.json')
-        menu_config = load_custom_menu()
+        choice = input("\n请选择 (0-5): ")
         
         if choice == "0":
             return
-        elif choice == "1":
+        
+        # 在副本上修改，保存成功后再刷新缓存
+        menu_config = json.loads(json.dumps(load_custom_menu()))
+        changed = False
+        
+        if choice == "1":
             print_colored("\n当前自定义菜单：", "cyan")
-            print_colored("\n[常用操作] (固定项，不可修改)", "yellow")
-            for num, name, cmd in menu_config['custom_menu']["常用操作"]:
-                print(f"{num}. {name} ({cmd})")
-            
-            for category, items in menu_config['custom_menu'].items():
-                if category != "常用操作":
-                    print_colored(f"\n[{category}]", "yellow")
-                    for num, name, cmd in items:
-                        print(f"{num}. {name} ({cmd})")
+            print_custom_menu(menu_config)
             
         elif choice == "2":
             # 显示可用的功能列表
             print_colored("\n可添加的功能列表：", "cyan")
-            available_commands = {
-                "基础操作": [
-                    ("6", "查看历史", "git log"),
-                ],
-                "远程操作": [
-                    ("7", "克隆仓库", "git clone"),
-                    ("8", "远程配置", "git remote")
-                ],
-                "分支管理": [
-                    ("9", "分支操作", "git branch"),
-                    ("10", "切换分支", "git checkout"),
-                    ("11", "合并分支", "git merge")
-                ],
-                "其他功能": [
-                    ("12", "配置信息", "git config"),
-                    ("13", "标签管理", "git tag"),
-                    ("14", "储藏操作", "git stash")
-                ]
-            }
-            
+            available_commands = get_available_menu_items(menu_config)
             print_colored("\n提示：编号1-5已被常用操作占用", "yellow")
             for category, items in available_commands.items():
                 print_colored(f"\n[{category}]", "yellow")
@@ -1226,193 +3766,353 @@ def handle_custom_menu():
             
             if add_choice == "1":
                 print_colored("\n请从上面的列表中选择：", "cyan")
-                num = input("请输入菜单编号 (6-14): ")
-                
-                # 验证输入的编号是否有效
+                num = input("请输入菜单编号: ")
                 all_commands = [item for items in available_commands.values() for item in items]
                 selected_command = next((cmd for cmd in all_commands if cmd[0] == num), None)
-                
-                if selected_command:
-                    print("\n可用的分类：")
-                    categories = [cat for cat in menu_config['custom_menu'].keys() if cat != "常用操作"]
-                    if categories:
-                        print("现有分类：")
-                        for i, cat in enumerate(categories, 1):
-                            print(f"{i}. {cat}")
-                        print("0. 创建新分类")
-                    else:
-                        print("(暂无分类)")
-                        print("0. 创建新分类")
-                    
-                    cat_choice = input("\n请选择分类编号(0表示创建新分类): ")
-                    
-                    if cat_choice == "0":
-                        category = input("请输入新分类名称: ")
-                    else:
-                        try:
-                            category = categories[int(cat_choice)-1]
-                        except:
-                            print_colored("\n无效的分类编号！", "red")
-                            continue
-                    
-                    if category not in menu_config['custom_menu']:
-                        menu_config['custom_menu'][category] = []
-                    menu_config['custom_menu'][category].append(selected_command)
-                    print_colored("\n功能添加成功！", "green")
-                else:
+                if not selected_command:
                     print_colored("\n无效的菜单编号！", "red")
-                    continue
+                else:
+                    category = choose_menu_category(menu_config)
+                    if category is None:
+                        print_colored("\n无效的分类编号！", "red")
+                    else:
+                        menu_config['custom_menu'].setdefault(category, []).append(list(selected_command))
+                        changed = True
                     
             elif add_choice == "2":
                 print_colored("\n创建自定义功能：", "cyan")
                 print("提示：编号必须从6开始，1-5为系统保留编号")
-                while True:
-                    num = input("请输入菜单编号 (6+): ")
-                    if not num.isdigit() or int(num) < 6:
-                        print_colored("错误：编号必须是大于5的数字！", "red")
-                        continue
-                    # 检查编号是否已被使用
-                    used = False
-                    for cat, items in menu_config['custom_menu'].items():
-                        if any(item[0] == num for item in items):
-                            used = True
-                            break
-                    if used:
-                        print_colored("错误：该编号已被使用！", "red")
-                        continue
-                    break
-                
-                name = input("请输入功能名称: ")
-                cmd = input("请输入Git命令: ")
-                
-                print("\n可用的分类：")
-                categories = [cat for cat in menu_config['custom_menu'].keys() if cat != "常用操作"]
-                if categories:
-                    print("现有分类：")
-                    for i, cat in enumerate(categories, 1):
-                        print(f"{i}. {cat}")
-                    print("0. 创建新分类")
+                used = {item[0] for items in menu_config['custom_menu'].values() for item in items}
+                num = input("请输入菜单编号 (6+): ")
+                name = input("请输入功能名称: ").strip()
+                cmd = input("请输入Git命令: ").strip()
+                if not num.isdigit() or int(num) < 6:
+                    print_colored("错误：编号必须是大于5的数字！", "red")
+                elif num in used:
+                    print_colored("错误：该编号已被使用！", "red")
+                elif not name or not cmd:
+                    print_colored("错误：名称和命令不能为空！", "red")
                 else:
-                    print("(暂无分类)")
-                    print("0. 创建新分类")
-                
-                cat_choice = input("\n请选择分类编号(0表示创建新分类): ")
-                
-                if cat_choice == "0":
-                    category = input("请输入新分类名称: ")
-                else:
-                    try:
-                        category = categories[int(cat_choice)-1]
-                    except:
+                    category = choose_menu_category(menu_config)
+                    if category is None:
                         print_colored("\n无效的分类编号！", "red")
-                        continue
-                
-                if category not in menu_config['custom_menu']:
-                    menu_config['custom_menu'][category] = []
-                menu_config['custom_menu'][category].append((num, name, cmd))
-                print_colored("\n功能添加成功！", "green")
+                    else:
+                        menu_config['custom_menu'].setdefault(category, []).append([num, name, cmd])
+                        changed = True
             
         elif choice == "3":
-            # 显示当前菜单项
             print_colored("\n当前自定义菜单：", "cyan")
-            print_colored("\n[常用操作] (固定项，不可删除)", "yellow")
-            for num, name, cmd in menu_config['custom_menu']["常用操作"]:
-                print(f"{num}. {name} ({cmd})")
-            
-            # 收集可删除的项目
-            deletable_items = []
-            categories_to_delete = []
-            
-            for category, items in menu_config['custom_menu'].items():
-                if category != "常用操作":
-                    print_colored(f"\n[{category}]", "yellow")
-                    for item in items:
-                        if item[0] not in ["1", "2", "3", "4", "5"]:  # 只显示可删除的项目
-                            deletable_items.append((category, item))
-                            print(f"{item[0]}. {item[1]} ({item[2]})")
-            
-            if not deletable_items:
-                print_colored("\n没有可删除的菜单项！", "yellow")
-                continue
-                
-            print_colored("\n请选择要删除的菜单项：", "cyan")
-            num = input("请输入菜单编号: ")
-            
-            # 验证是否是保留编号
+            print_custom_menu(menu_config)
+            num = input("\n请输入要删除的菜单编号: ")
             if num in ["1", "2", "3", "4", "5"]:
                 print_colored("\n错误：不能删除系统保留的菜单项！", "red")
-                continue
-            
-            # 删除选中的项目
-            deleted = False
-            for category in list(menu_config['custom_menu'].keys()):  # 使用list创建副本进行遍历
-                if category != "常用操作":
+            else:
+                for category in list(menu_config['custom_menu'].keys()):
+                    if category == "常用操作":
+                        continue
                     items = menu_config['custom_menu'][category]
                     new_items = [item for item in items if item[0] != num]
                     if len(new_items) < len(items):
-                        deleted = True
-                        if new_items:  # 如果分类还有其他项目
+                        changed = True
+                        if new_items:
                             menu_config['custom_menu'][category] = new_items
-                        else:  # 如果分类为空，删除整个分类
+                        else:
                             del menu_config['custom_menu'][category]
-            
-            if deleted:
-                print_colored("\n菜单项删除成功！", "green")
-            else:
-                print_colored("\n未找到指定的菜单项！", "red")
+                if not changed:
+                    print_colored("\n未找到指定的菜单项！", "red")
             
         elif choice == "4":
-            if confirm_action("确定要重置为默认菜单吗？这将删除所有自定义项！"):
-                # 获取默认菜单配置
-                default_menu = {
-                    "常用操作": [
-                        ("1", "查看状态", "git status"),
-                        ("2", "暂存更改", "git add"),
-                        ("3", "提交更改", "git commit"),
-                        ("4", "推送更改", "git push"),
-                        ("5", "拉取更新", "git pull")
-                    ]
-                }
-                
-                # 清除所有自定义项，只保留默认菜单
-                menu_config['custom_menu'] = default_menu
-                
-                try:
-                    with open(config_path, 'w', encoding='utf-8') as f:
-                        json.dump(menu_config, f, indent=4)
-                    print_colored("\n菜单已重置为默认设置！", "green")
-                except Exception as e:
-                    print_colored(f"\n保存配置失败: {str(e)}", "red")
-                
-                # 显示重置后的菜单
-                print_colored("\n当前菜单设置：", "cyan")
-                print_colored("\n[常用操作]", "yellow")
-                for num, name, cmd in menu_config['custom_menu']["常用操作"]:
-                    print(f"{num}. {name} ({cmd})")
+            if confirm_action("确定要重置为默认菜单吗？这将删除所有自定义项！", 'confirm_dangerous'):
+                menu_config = {'mode': 'full', 'custom_menu': DEFAULT_CUSTOM_MENU}
+                changed = True
+
+        elif choice == "5":
+            menu_config['mode'] = 'full' if mode == 'custom' else 'custom'
+            changed = True
+
+        else:
+            print_colored("无效的选择，请重试", "yellow")
+            continue
         
-        # 保存配置
-        if choice in ["2", "3", "4"]:
+        if changed:
+            if choice in ("2", "3"):
+                menu_config['mode'] = 'custom'
             try:
-                # 更新菜单模式和内容
-                menu_config['mode'] = 'custom'  # 设置为自定义模式
-                
-                # 如果是重置操作，确保模式也重置为默认
-                if choice == "4":
-                    menu_config['mode'] = 'full'
-                
-                # 一次性保存所有更改
-                with open(config_path, 'w', encoding='utf-8') as f:
-                    json.dump(menu_config, f, indent=4)
-                
+                save_custom_menu(menu_config)
                 if choice == "4":
                     print_colored("\n菜单已重置为默认设置！", "green")
-                else:
+                elif menu_config['mode'] == 'custom':
                     print_colored("\n菜单已更新，已切换到自定义菜单模式！", "green")
-            except Exception as e:
+                else:
+                    print_colored("\n已切换到完整菜单模式！", "green")
+            except OSError as e:
                 print_colored(f"\n保存配置失败: {str(e)}", "red")
         
         input("\n按回车键继续...")
 
+# 差异分页器每隔多少行记录一次文件偏移
+DIFF_CHECKPOINT_LINES = 256
+
+# 差异分页器在当前页之后预读的行数，更后面的输出只在滚动或跳转到时才读取
+DIFF_PREFETCH_LINES = 500
+
+def open_diff_pager(command, input_text=None):
+    """
+    启动 git 命令并创建差异分页器状态
+    输出只在需要时读取，已读部分写入临时文件以便回滚，内存中只保留行偏移检查点、文件/块索引和当前窗口
+    @param command: list Git 命令及参数(不含 git)
+    @param input_text: str 写入 git 标准输入的内容(可选，用于 --stdin)
+    @return: dict 分页器状态
+    """
+    import tempfile
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(['git', '-c', 'color.ui=never'] + command,
+                            stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=errors)
+    if input_text is not None:
+        proc.stdin.write(input_text.encode('utf-8'))
+        proc.stdin.close()
+    return {
+        'proc': proc,
+        'errors': errors,
+        'spool': tempfile.TemporaryFile(),
+        'pending': b'',
+        'size': 0,
+        'lines': 0,
+        'checkpoints': [0],
+        'file_lines': [],
+        'file_names': [],
+        'hunks': [],
+        'window': (0, []),
+        'top': 0,
+    }
+
+def load_diff_stream(pager, min_lines=0, max_bytes=1024 * 1024):
+    """
+    从 git 进程继续读取输出，写入临时文件并更新索引
+    读到 min_lines 行且本次已读满 max_bytes 字节后停止，只按行数读取时 max_bytes 传 0
+    @param pager: dict 分页器状态
+    @param min_lines: int 至少加载到的行数
+    @param max_bytes: int 本次至少读取的字节数
+    @return: bool 是否还有未读取的输出
+    """
+    proc = pager['proc']
+    read = 0
+    while proc.stdout is not None and (pager['lines'] < min_lines or read < max_bytes):
+        chunk = proc.stdout.read1(65536)
+        if not chunk:
+            proc.stdout.close()
+            proc.stdout = None
+            proc.wait()
+            if pager['pending']:
+                chunk = b'\n'
+            else:
+                break
+        read += len(chunk)
+        pager['spool'].seek(0, 2)
+        pager['spool'].write(chunk)
+        data = pager['pending'] + chunk
+        start = 0
+        offset = pager['size'] - len(pager['pending'])
+        while True:
+            end = data.find(b'\n', start)
+            if end < 0:
+                break
+            line = data[start:end]
+            if line.startswith(b'diff --git '):
+                pager['file_lines'].append(pager['lines'])
+                pager['file_names'].append(os.fsdecode(line.rsplit(b' b/', 1)[-1]))
+            elif line.startswith(b'@@'):
+                pager['hunks'].append(pager['lines'])
+            pager['lines'] += 1
+            start = end + 1
+            if pager['lines'] % DIFF_CHECKPOINT_LINES == 0:
+                pager['checkpoints'].append(offset + start)
+        pager['pending'] = data[start:]
+        pager['size'] += len(chunk)
+    return proc.stdout is not None
+
+def read_diff_window(pager, start, count):
+    """
+    从临时文件中读取指定范围的行，最近一次读取的窗口会被缓存
+    @param pager: dict 分页器状态
+    @param start: int 起始行号
+    @param count: int 行数
+    @return: list 行文本列表
+    """
+    cached_start, cached = pager['window']
+    if cached_start == start and len(cached) >= min(count, pager['lines'] - start):
+        return cached[:count]
+    spool = pager['spool']
+    checkpoint = start // DIFF_CHECKPOINT_LINES
+    spool.seek(pager['checkpoints'][checkpoint])
+    for _ in range(start - checkpoint * DIFF_CHECKPOINT_LINES):
+        spool.readline()
+    lines = []
+    for _ in range(min(count, pager['lines'] - start)):
+        lines.append(spool.readline().rstrip(b'\n').decode('utf-8', 'replace'))
+    pager['window'] = (start, lines)
+    return lines
+
+def colorize_diff_line(text):
+    """
+    按差异行类型着色
+    @param text: str 差异行
+    @return: str 着色后的文本
+    """
+    if text.startswith('diff --git') or text.startswith('commit '):
+        return f"\033[1;93m{text}\033[0m"
+    if text.startswith('@@'):
+        return f"\033[96m{text}\033[0m"
+    if text.startswith('+') and not text.startswith('+++'):
+        return f"\033[92m{text}\033[0m"
+    if text.startswith('-') and not text.startswith('---'):
+        return f"\033[91m{text}\033[0m"
+    return text
+
+def current_diff_file(pager):
+    """
+    查找当前页顶部所在的文件
+    @param pager: dict 分页器状态
+    @return: tuple (文件序号, 文件路径)，尚未进入任何文件时返回 (0, '')
+    """
+    index = bisect.bisect_right(pager['file_lines'], pager['top'])
+    if index == 0:
+        return 0, ''
+    return index, pager['file_names'][index - 1]
+
+def render_diff_pager(pager, title):
+    """
+    绘制分页器当前页
+    @param pager: dict 分页器状态
+    @param title: str 标题
+    @return: None
+    """
+    width, height = shutil.get_terminal_size((80, 24))
+    rows = max(height - 2, 3)
+    index, path = current_diff_file(pager)
+    # 输出没有读完时文件总数未知，显示为已发现的数量加 +
+    more = "+" if pager['proc'].stdout is not None else ""
+    lines = [f"\033[7m {title}  文件 {index}/{len(pager['file_lines'])}{more} {path}"[:width + 4] + "\033[0m"]
+    for text in read_diff_window(pager, pager['top'], rows):
+        lines.append(colorize_diff_line(text.expandtabs(4)[:width]))
+    lines += [""] * (rows + 1 - len(lines))
+    lines.append(f"行 {min(pager['top'] + 1, pager['lines'])}-{min(pager['top'] + rows, pager['lines'])}"
+                 f"/{pager['lines']}{more}  ↑↓/PgUp/PgDn 滚动  n/p 文件  ]/[ 块  q 退出")
+    sys.stdout.write("\033[H" + "\033[K\n".join(lines) + "\033[K\033[J")
+    sys.stdout.flush()
+
+def close_diff_pager(pager):
+    """
+    结束 git 进程并释放临时文件
+    @param pager: dict 分页器状态
+    @return: str git 的错误输出(没有则为空字符串)
+    """
+    proc = pager['proc']
+    if proc.stdout is not None:
+        proc.kill()
+        proc.stdout.close()
+        proc.stdout = None
+    proc.wait()
+    pager['spool'].close()
+    pager['errors'].seek(0)
+    message = pager['errors'].read().decode('utf-8', 'replace').strip()
+    pager['errors'].close()
+    return message
+
+def jump_diff_marker(pager, markers, forward):
+    """
+    跳转到下一个/上一个标记位置(文件头或块头)，向后查找时按需继续加载
+    @param pager: dict 分页器状态
+    @param markers: list 标记所在行号列表(升序)
+    @param forward: bool 是否向后跳转
+    @return: None
+    """
+    top = pager['top']
+    if forward:
+        index = bisect.bisect_right(markers, top)
+        while index >= len(markers) and not key_pending(0):
+            if not load_diff_stream(pager):
+                break
+        if index < len(markers):
+            pager['top'] = markers[index]
+    else:
+        index = bisect.bisect_left(markers, top)
+        if index > 0:
+            pager['top'] = markers[index - 1]
+
+def view_diff(command, title="查看差异", input_text=None):
+    """
+    使用内置分页器查看差异
+    只读取到当前页之后 DIFF_PREFETCH_LINES 行为止，滚动、跳转时再继续读取，
+    退出时终止仍在运行的 git 进程；非终端环境下直接流式输出
+    @param command: list Git 命令及参数(不含 git)
+    @param title: str 标题
+    @param input_text: str 写入 git 标准输入的内容(可选)
+    @return: bool git 命令是否成功
+    """
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        if input_text is not None:
+            flush_output()
+            return subprocess.run(['git'] + command, input=input_text.encode('utf-8')).returncode == 0
+        return run_git_streaming(command) == 0
+
+    pager = open_diff_pager(command, input_text)
+    height = shutil.get_terminal_size((80, 24))[1]
+    load_diff_stream(pager, height, 0)
+    if pager['proc'].stdout is None and pager['lines'] <= height - 2:
+        # 一屏放得下时直接输出
+        for text in read_diff_window(pager, 0, pager['lines']):
+            print(colorize_diff_line(text) if use_color() else text)
+        message = close_diff_pager(pager)
+        if message:
+            print(message)
+        if pager['lines'] == 0 and not message:
+            print_colored("没有差异", "yellow")
+        return pager['proc'].returncode == 0
+
+    try:
+        with raw_key_session():
+            while True:
+                rows = max(shutil.get_terminal_size((80, 24))[1] - 2, 3)
+                load_diff_stream(pager, pager['top'] + rows + 1, 0)
+                render_diff_pager(pager, title)
+                # 先显示当前页，空闲时再预读有限的几页，不会把整个输出读完
+                if not key_pending(0):
+                    load_diff_stream(pager, pager['top'] + rows + DIFF_PREFETCH_LINES, 0)
+                    render_diff_pager(pager, title)
+                key = read_key()
+                last = max(pager['lines'] - rows, 0)
+                if key in ('q', 'esc', 'ctrl-c'):
+                    break
+                elif key in ('down', 'j', 'enter'):
+                    pager['top'] = min(pager['top'] + 1, last)
+                elif key in ('up', 'k'):
+                    pager['top'] = max(pager['top'] - 1, 0)
+                elif key in ('pgdn', 'space'):
+                    pager['top'] = min(pager['top'] + rows, last)
+                elif key in ('pgup', 'b'):
+                    pager['top'] = max(pager['top'] - rows, 0)
+                elif key in ('home', 'g'):
+                    pager['top'] = 0
+                elif key in ('end', 'G'):
+                    while load_diff_stream(pager) and not key_pending(0):
+                        pass
+                    pager['top'] = max(pager['lines'] - rows, 0)
+                elif key == 'n':
+                    jump_diff_marker(pager, pager['file_lines'], True)
+                elif key == 'p':
+                    jump_diff_marker(pager, pager['file_lines'], False)
+                elif key == ']':
+                    jump_diff_marker(pager, pager['hunks'], True)
+                elif key == '[':
+                    jump_diff_marker(pager, pager['hunks'], False)
+    finally:
+        message = close_diff_pager(pager)
+    if message:
+        print(message)
+    return pager['proc'].returncode == 0
+
 def handle_diff():
     """
     处理git diff命令
@@ -1434,19 +4134,19 @@ def handle_diff():
         if choice == "0":
             return
         elif choice == "1":
-            execute_git(['diff'])
+            view_diff(['diff'])
         elif choice == "2":
-            execute_git(['diff', '--cached'])
+            view_diff(['diff', '--cached'])
         elif choice == "3":
             file_name = input("请输入要查看的文件名: ")
-            execute_git(['diff', file_name])
+            view_diff(['diff', '--', file_name])
         elif choice == "4":
             commit = input("请输入提交ID (可以是部分ID或HEAD~n): ")
-            execute_git(['diff', commit])
+            view_diff(['diff', commit])
         elif choice == "5":
             branch1 = input("请输入第一个分支名: ")
             branch2 = input("请输入第二个分支名: ")
-            execute_git(['diff', branch1, branch2])
+            view_diff(['diff', branch1, branch2])
         else:
             print_colored("无效的选择，请重试", "yellow")
             continue
@@ -1504,10 +4204,9 @@ def handle_logs():
                 "4": "ERROR"
             }
             if level in levels:
-                config = load_config()
-                config['log_level'] = levels[level]
-                save_config(config)
-                print_colored(f"日志级别已设置为: {levels[level]}", "green")
+                if set_setting('log_level', levels[level]):
+                    logging.getLogger('ezgit').setLevel(levels[level])
+                    print_colored(f"日志级别已设置为: {levels[level]}", "green")
             else:
                 print_colored("无效的选择", "yellow")
         else:
@@ -1516,6 +4215,192 @@ def handle_logs():
         
         input("\n按回车键继续...")
 
+def list_submodules():
+    """
+    列出顶层子模块及其检出状态
+    一次 git submodule status 调用，结合 .gitmodules 中的名称
+    @return: list 子模块信息字典 (name/path/commit/state)，state 为
+             uninitialized/modified/conflict/clean
+    """
+    root = get_repo_root() or '.'
+    names = {}
+    config = subprocess.run(['git', 'config', '-f', '.gitmodules', '-z', '--get-regexp', r'^submodule\..*\.path$'],
+                            cwd=root, capture_output=True, text=True, encoding='utf-8')
+    for entry in config.stdout.split('\0'):
+        if '\n' in entry:
+            key, path = entry.split('\n', 1)
+            names[path] = key[len('submodule.'):-len('.path')]
+    result = subprocess.run(['git', 'submodule', 'status'], cwd=root,
+                            capture_output=True, text=True, encoding='utf-8')
+    states = {'-': 'uninitialized', '+': 'modified', 'U': 'conflict', ' ': 'clean'}
+    modules = []
+    for line in result.stdout.splitlines():
+        if len(line) < 42:
+            continue
+        # 格式为 "<状态><提交> <路径> (<describe>)"，路径中可能含空格，describe 部分可能没有
+        commit, _, path = line[1:].partition(' ')
+        if path not in names and path.endswith(')') and ' (' in path:
+            path = path[:path.rindex(' (')]
+        modules.append({
+            'name': names.get(path, path),
+            'path': path,
+            'commit': commit,
+            'state': states.get(line[0], 'modified'),
+        })
+    return modules
+
+def run_submodule_jobs(modules, task, jobs=4):
+    """
+    使用线程池并发处理子模块，逐个输出完成情况
+    @param modules: list 子模块信息字典列表
+    @param task: function 处理单个子模块的函数，返回 (是否成功, 输出信息)
+    @param jobs: int 最大并发数
+    @return: list (路径, 状态, 耗时秒数, 信息) 列表，状态为 ok/failed
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    results = []
+
+    def run(module):
+        start = time.time()
+        try:
+            ok, message = task(module)
+        except Exception as e:
+            ok, message = False, str(e)
+        return module['path'], 'ok' if ok else 'failed', time.time() - start, message
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [pool.submit(run, module) for module in modules]
+        for done, future in enumerate(as_completed(futures), 1):
+            path, status, seconds, message = future.result()
+            mark, color = ('✓', 'green') if status == 'ok' else ('✗', 'red')
+            print_colored(f"[{done}/{len(futures)}] {mark} {path} ({seconds:.1f}s)", color)
+            results.append((path, status, seconds, message))
+    return results
+
+def run_git_in(cwd, command):
+    """
+    在指定目录执行 Git 命令并收集输出
+    @param cwd: str 工作目录
+    @param command: list Git 命令及参数
+    @return: tuple (是否成功, 合并后的输出)
+    """
+    result = subprocess.run(['git'] + command, cwd=cwd, capture_output=True,
+                            text=True, encoding='utf-8', errors='replace')
+    return result.returncode == 0, (result.stdout + result.stderr).strip()
+
+def update_submodules(jobs=4, force=False):
+    """
+    并发初始化并更新子模块
+    已检出记录提交且没有嵌套子模块的子模块直接跳过，未初始化的子模块先统一初始化
+    @param jobs: int 最大并发数
+    @param force: bool 是否同时更新已是最新的子模块
+    @return: list (路径, 状态, 耗时秒数, 信息) 列表
+    """
+    root = get_repo_root() or '.'
+    modules = list_submodules()
+    # 已是记录提交的子模块仍可能有未初始化或过期的嵌套子模块
+    nested = {m['path'] for m in modules if os.path.isfile(os.path.join(root, m['path'], '.gitmodules'))}
+    pending = [m for m in modules if force or m['state'] != 'clean' or m['path'] in nested]
+    skipped = [(m['path'], 'skipped', 0.0, '已是记录的提交') for m in modules if m not in pending]
+    uninitialized = [m['path'] for m in pending if m['state'] == 'uninitialized']
+    if uninitialized:
+        # 初始化会写入 .git/config，放在并发之前一次完成
+        ok, message = run_git_in(root, ['submodule', 'init', '--'] + uninitialized)
+        if not ok:
+            print(message)
+
+    def update(module):
+        if module['state'] == 'clean' and not force:
+            # 只需处理嵌套子模块
+            return run_git_in(os.path.join(root, module['path']), ['submodule', 'update', '--init', '--recursive'])
+        return run_git_in(root, ['submodule', 'update', '--init', '--recursive', '--', module['path']])
+
+    results = run_submodule_jobs(pending, update, jobs)
+    return skipped + results
+
+def fetch_submodules(jobs=4):
+    """
+    并发拉取所有已初始化子模块的远程更新
+    @param jobs: int 最大并发数
+    @return: list (路径, 状态, 耗时秒数, 信息) 列表
+    """
+    root = get_repo_root() or '.'
+    modules = [m for m in list_submodules() if m['state'] != 'uninitialized']
+    return run_submodule_jobs(
+        modules,
+        lambda m: run_git_in(os.path.join(root, m['path']), ['fetch', '--all', '--prune']),
+        jobs)
+
+def foreach_submodules(command, jobs=4):
+    """
+    在每个已初始化的子模块中并发执行 shell 命令
+    与 git submodule foreach 一样提供 name/sm_path/displaypath/sha1/toplevel 环境变量
+    @param command: str shell 命令
+    @param jobs: int 最大并发数
+    @return: list (路径, 状态, 耗时秒数, 输出) 列表
+    """
+    root = get_repo_root() or '.'
+    modules = [m for m in list_submodules() if m['state'] != 'uninitialized']
+
+    def task(module):
+        env = os.environ.copy()
+        env.update({'name': module['name'], 'sm_path': module['path'],
+                    'displaypath': module['path'], 'sha1': module['commit'],
+                    'toplevel': root})
+        result = subprocess.run(command, shell=True, cwd=os.path.join(root, module['path']),
+                                env=env, capture_output=True, text=True,
+                                encoding='utf-8', errors='replace')
+        return result.returncode == 0, (result.stdout + result.stderr).strip()
+
+    return run_submodule_jobs(modules, task, jobs)
+
+def print_submodule_report(results, show_output=False):
+    """
+    输出子模块批量操作的汇总
+    @param results: list (路径, 状态, 耗时秒数, 信息) 列表
+    @param show_output: bool 是否显示每个子模块的完整输出
+    @return: None
+    """
+    labels = {'ok': ('成功', 'green'), 'skipped': ('跳过', 'yellow'), 'failed': ('失败', 'red')}
+    print_colored("\n子模块处理结果:", "cyan")
+    for path, status, seconds, message in sorted(results):
+        label, color = labels[status]
+        print_colored(f"{label}  {seconds:6.1f}s  {path}", color)
+        if message and (show_output or status == 'failed'):
+            for line in message.splitlines():
+                print(f"    {line}")
+    counts = {status: sum(1 for r in results if r[1] == status) for status in labels}
+    print(f"\n成功 {counts['ok']}，跳过 {counts['skipped']}，失败 {counts['failed']}")
+
+def remove_submodule(path):
+    """
+    删除子模块，包括工作区、索引记录和 .git/modules 下的仓库
+    @param path: str 子模块路径
+    @return: bool 是否删除成功
+    """
+    module = next((m for m in list_submodules() if m['path'] == path.rstrip('/\\')), None)
+    if module is None:
+        print_colored(f"\n未找到子模块 {path}", "yellow")
+        return False
+    if not (execute_git(['submodule', 'deinit', '-f', '--', module['path']]) and
+            execute_git(['rm', '-f', '--', module['path']])):
+        return False
+    # 子模块仓库按名称保存，使用 --git-path 兼容工作树和自定义 GIT_DIR
+    git_path = subprocess.run(['git', 'rev-parse', '--git-path', f"modules/{module['name']}"],
+                              capture_output=True, text=True, encoding='utf-8').stdout.strip()
+    if git_path:
+        shutil.rmtree(git_path, ignore_errors=True)
+    return True
+
+def ask_jobs(default=4):
+    """
+    询问并发数
+    @param default: int 默认并发数
+    @return: int 并发数
+    """
+    jobs = input(f"请输入并发数(默认 {default}): ")
+    return int(jobs) if jobs.isdigit() and int(jobs) > 0 else default
+
 def handle_submodule():
     """
     处理子模块管理功能
@@ -1526,33 +4411,242 @@ def handle_submodule():
         print_colored("子模块管理", "cyan")
         print("="*40)
         print("1. 添加子模块")
-        print("2. 更新子模块")
+        print("2. 更新子模块      (并发，跳过已是最新的子模块)")
         print("3. 删除子模块")
         print("4. 列出子模块")
+        print("5. 拉取子模块更新  (并发 fetch)")
+        print("6. 在子模块中执行命令 (并发 foreach)")
+        print("\n0. 返回上级菜单")
+        
+        choice = input("\n请选择 (0-6): ")
+        
+        if choice == "0":
+            return
+        elif choice == "1":
+            url = input("请输入子模块仓库地址: ")
+            path = input("请输入子模块路径: ")
+            execute_git(['submodule', 'add', url, path])
+        elif choice == "2":
+            jobs = ask_jobs()
+            force = input("是否同时更新已是最新的子模块？(y/N): ").lower() == 'y'
+            print_submodule_report(update_submodules(jobs, force))
+        elif choice == "3":
+            path = input("请输入要删除的子模块路径: ")
+            if confirm_action(f"确定要删除子模块 {path} 吗？", 'confirm_dangerous'):
+                if remove_submodule(path):
+                    print_colored(f"\n✓ 已删除子模块 {path}", "green")
+        elif choice == "4":
+            labels = {'uninitialized': ('未初始化', 'yellow'), 'modified': ('与记录不一致', 'yellow'),
+                      'conflict': ('存在冲突', 'red'), 'clean': ('已是记录的提交', 'green')}
+            modules = list_submodules()
+            if not modules:
+                print_colored("\n当前仓库没有子模块", "yellow")
+            for module in modules:
+                label, color = labels[module['state']]
+                print_colored(f"{module['commit'][:10]}  {module['path']:<30} {label}", color)
+        elif choice == "5":
+            print_submodule_report(fetch_submodules(ask_jobs()))
+        elif choice == "6":
+            command = input("请输入要执行的命令: ")
+            if command:
+                print_submodule_report(foreach_submodules(command, ask_jobs()), show_output=True)
+        else:
+            print_colored("无效的选择，请重试", "yellow")
+            continue
+        
+        input("\n按回车键继续...")
+
+def format_size(size):
+    """
+    格式化文件大小
+    @param size: int 字节数
+    @return: str 可读的大小
+    """
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024.0
+
+def get_sparse_state():
+    """
+    读取稀疏检出状态
+    @return: dict 包含 enabled/cone/patterns 的状态信息
+    """
+    config = subprocess.run(['git', 'config', '--get-regexp', r'^core\.sparsecheckout'],
+                            capture_output=True, text=True, encoding='utf-8').stdout
+    values = dict(line.split(' ', 1) for line in config.splitlines() if ' ' in line)
+    enabled = values.get('core.sparsecheckout', 'false') == 'true'
+    patterns = []
+    if enabled:
+        result = subprocess.run(['git', 'sparse-checkout', 'list'],
+                                capture_output=True, text=True, encoding='utf-8')
+        patterns = [line for line in result.stdout.splitlines() if line]
+    return {
+        'enabled': enabled,
+        'cone': values.get('core.sparsecheckoutcone', 'false') == 'true',
+        'patterns': patterns,
+    }
+
+def measure_worktree():
+    """
+    统计工作区中实际检出的文件数量和磁盘占用
+    通过 git ls-files -t 区分 skip-worktree 文件，流式读取
+    @return: tuple (已检出文件数, 跟踪文件总数, 已检出文件字节数)
+    """
+    root = get_repo_root() or '.'
+    materialized = total = size = 0
+    for entry in iter_git_records(['git', 'ls-files', '-t', '-z'], root):
+        if len(entry) < 3:
+            continue
+        total += 1
+        if entry[:1] == b'S':
+            continue
+        materialized += 1
+        try:
+            size += os.lstat(os.path.join(root, os.fsdecode(entry[2:]))).st_size
+        except OSError:
+            pass
+    return materialized, total, size
+
+def show_sparse_summary():
+    """
+    显示稀疏检出模式、规则以及检出文件的数量和大小
+    @return: None
+    """
+    state = get_sparse_state()
+    materialized, total, size = measure_worktree()
+    if state['enabled']:
+        mode = "cone 模式" if state['cone'] else "非 cone 模式"
+        print_colored(f"\n稀疏检出: 已启用 ({mode})", "green")
+        print("检出规则:")
+        for i, pattern in enumerate(state['patterns'], 1):
+            print(f"  {i}. {pattern}")
+        if not state['patterns']:
+            print("  (仅根目录文件)")
+    else:
+        print_colored("\n稀疏检出: 未启用", "yellow")
+    ratio = materialized * 100.0 / total if total else 100.0
+    print(f"已检出文件: {materialized} / {total} ({ratio:.1f}%)")
+    print(f"已检出大小: {format_size(size)}")
+    promisor = subprocess.run(['git', 'config', '--get', 'remote.origin.partialclonefilter'],
+                              capture_output=True, text=True, encoding='utf-8').stdout.strip()
+    print(f"部分克隆过滤器: {promisor or '无 (完整克隆)'}")
+
+def set_sparse_patterns(patterns, cone=True):
+    """
+    设置稀疏检出规则，规则通过标准输入一次性传入
+    @param patterns: list 目录(cone 模式)或规则列表
+    @param cone: bool 是否使用 cone 模式
+    @return: bool 是否执行成功
+    """
+    command = ['git', 'sparse-checkout', 'set', '--cone' if cone else '--no-cone', '--stdin']
+    result = subprocess.run(command, input='\n'.join(patterns) + '\n',
+                            capture_output=True, text=True, encoding='utf-8')
+    if result.stderr:
+        print(result.stderr)
+    return result.returncode == 0
+
+def convert_to_partial_clone(remote='origin', object_filter='blob:none'):
+    """
+    将已有的完整克隆转换为部分克隆
+    用 --refetch 按过滤器重新拉取，成功后才保留 promisor 配置，再按过滤器重新打包
+    @param remote: str 远程仓库名
+    @param object_filter: str 对象过滤器
+    @return: bool 是否转换成功
+    """
+    settings = ((f'remote.{remote}.promisor', 'true'),
+                (f'remote.{remote}.partialclonefilter', object_filter))
+    previous = [subprocess.run(['git', 'config', '--local', '--get', key],
+                               capture_output=True, text=True, encoding='utf-8') for key, _ in settings]
+    if run_git_streaming(['fetch', '--progress', '--refetch', f'--filter={object_filter}', remote]) != 0:
+        # git fetch --filter 在拉取前就会写入 promisor 配置，失败时恢复原来的值
+        for (key, _), old in zip(settings, previous):
+            if old.returncode == 0:
+                subprocess.run(['git', 'config', '--local', key, old.stdout.rstrip('\n')], capture_output=True)
+            else:
+                subprocess.run(['git', 'config', '--local', '--unset-all', key], capture_output=True)
+        invalidate_git_config()
+        print_colored("\n✗ 重新拉取失败，已恢复原来的远程配置", "red")
+        return False
+    for key, value in settings:
+        if not execute_git(['config', key, value]):
+            return False
+    invalidate_git_config()
+    # repack --filter 需要 Git 2.43+，旧版本退回普通 gc
+    result = subprocess.run(['git', 'repack', '-a', '-d', f'--filter={object_filter}'],
+                            capture_output=True, text=True, encoding='utf-8')
+    if result.returncode != 0:
+        if 'filter' not in result.stderr:
+            print(result.stderr)
+        print_colored("\n当前 Git 版本不支持按过滤器重新打包，本地已有的文件内容会继续保留", "yellow")
+        run_git_streaming(['gc', '--prune=now'])
+    return True
+
+def handle_sparse_checkout():
+    """
+    处理稀疏检出与部分克隆管理
+    @return: None
+    """
+    while True:
+        print("\n" + "="*40)
+        print_colored("稀疏检出管理", "cyan")
+        print("="*40)
+        print("1. 查看稀疏检出状态")
+        print("2. 启用稀疏检出 (cone 模式)")
+        print("3. 设置检出目录 (替换现有规则)")
+        print("4. 添加检出目录")
+        print("5. 移除检出目录")
+        print("6. 关闭稀疏检出 (检出全部文件)")
+        print("7. 转换为部分克隆 (--filter=blob:none)")
         print("\n0. 返回上级菜单")
-        
-        choice = input("\n请选择 (0-4): ")
-        
+
+        choice = input("\n请选择 (0-7): ")
+
         if choice == "0":
             return
         elif choice == "1":
-            url = input("请输入子模块仓库地址: ")
-            path = input("请输入子模块路径: ")
-            execute_git(['submodule', 'add', url, path])
+            show_sparse_summary()
         elif choice == "2":
-            execute_git(['submodule', 'update', '--init', '--recursive'])
-        elif choice == "3":
-            path = input("请输入要删除的子模块路径: ")
-            if confirm_action(f"确定要删除子模块 {path} 吗？"):
-                execute_git(['submodule', 'deinit', '-f', path])
-                execute_git(['rm', '-f', path])
-                shutil.rmtree(os.path.join('.git', 'modules', path), ignore_errors=True)
-        elif choice == "4":
-            execute_git(['submodule', 'status'])
+            if execute_git(['sparse-checkout', 'init', '--cone']):
+                print_colored("\n✓ 已启用稀疏检出，当前只检出根目录文件", "green")
+                show_sparse_summary()
+        elif choice in ("3", "4"):
+            print("\n请输入目录，多个目录用空格分隔(如 src/app docs)")
+            dirs = input("目录: ").split()
+            if dirs:
+                patterns = dirs
+                if choice == "4":
+                    state = get_sparse_state()
+                    patterns = state['patterns'] + [d for d in dirs if d not in state['patterns']]
+                if set_sparse_patterns(patterns):
+                    print_colored("\n✓ 检出规则已更新", "green")
+                    show_sparse_summary()
+        elif choice == "5":
+            state = get_sparse_state()
+            if not state['patterns']:
+                print_colored("\n当前没有可移除的检出目录", "yellow")
+            else:
+                for i, pattern in enumerate(state['patterns'], 1):
+                    print(f"{i}. {pattern}")
+                picked = input("\n请输入要移除的序号(多个用空格分隔): ").split()
+                drop = {int(n) for n in picked if n.isdigit()}
+                patterns = [p for i, p in enumerate(state['patterns'], 1) if i not in drop]
+                if set_sparse_patterns(patterns, state['cone']):
+                    print_colored("\n✓ 检出规则已更新", "green")
+                    show_sparse_summary()
+        elif choice == "6":
+            if confirm_action("关闭稀疏检出会检出全部文件，确定要继续吗？"):
+                if execute_git(['sparse-checkout', 'disable']):
+                    print_colored("\n✓ 已关闭稀疏检出", "green")
+        elif choice == "7":
+            remote = input("\n请输入远程仓库名(默认 origin): ") or "origin"
+            if confirm_action(f"将 {remote} 设置为部分克隆来源并重新拉取，确定要继续吗？"):
+                if convert_to_partial_clone(remote):
+                    print_colored("\n✓ 已转换为部分克隆，文件内容将在需要时按需下载", "green")
         else:
             print_colored("无效的选择，请重试", "yellow")
             continue
-        
+
         input("\n按回车键继续...")
 
 def handle_workflow():
@@ -1633,8 +4727,17 @@ def handle_clean():
     print("\n即将清理的文件:")
     execute_git(['clean', '-n', '-d'])  # 先显示要清理的文件
     
-    if input("\n确认清理这些文件？(y/N): ").lower() == 'y':
-        execute_git(['clean', '-f', '-d'])
+    print("1. 清理以上全部文件")
+    print("2. 选择要清理的文件")
+    print("0. 取消")
+    choice = input("\n请选择 (0-2): ")
+    if choice == "1":
+        if confirm_action("确认清理这些文件？", 'confirm_dangerous'):
+            execute_git(['clean', '-f', '-d'])
+    elif choice == "2":
+        pick_and_apply("选择要清理的未跟踪文件",
+                       lambda code: code == '??',
+                       ['clean', '-f'], "已清理所选文件")
 
 def handle_checkout():
     """
@@ -1755,23 +4858,79 @@ def handle_init():
         
         input("\n按回车键继续...")
 
-def get_commit_by_index(commits, index):
+def build_commit_picker(rows):
+    """
+    为一次提交列表构建查找索引
+    完整提交ID存入字典，另维护一份排序后的列表用于二分查找缩写前缀
+    @param rows: list (完整提交ID, 提交说明) 列表，按显示顺序排列
+    @return: dict 提交选择器 (rows/by_oid/sorted/short)
+    """
+    by_oid = {}
+    for i, (oid, _) in enumerate(rows):
+        by_oid.setdefault(oid, i)
+    ordered = sorted(by_oid)
+    # 与相邻提交比较得到列表内唯一的最短缩写(至少 7 位)
+    short = {}
+    for i, oid in enumerate(ordered):
+        common = 0
+        for other in ordered[max(i - 1, 0):i] + ordered[i + 1:i + 2]:
+            n = 0
+            while n < len(oid) and oid[n] == other[n]:
+                n += 1
+            common = max(common, n)
+        short[oid] = oid[:max(7, common + 1)]
+    return {'rows': rows, 'by_oid': by_oid, 'sorted': ordered, 'short': short}
+
+def load_commit_picker(log_args):
     """
-    根据序号获取提交ID
-    @param commits: list 提交列表
+    执行 git log 并构建提交选择器
+    @param log_args: list 额外的 git log 参数(如 ['-n', '10'])
+    @return: dict 提交选择器
+    """
+    result = subprocess.run(['git', 'log', '--format=%H%x00%s'] + log_args,
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    rows = [tuple(line.split('\0', 1)) for line in result.stdout.splitlines() if '\0' in line]
+    return build_commit_picker(rows)
+
+def find_commits_by_prefix(picker, prefix):
+    """
+    在排序列表中二分查找以指定前缀开头的提交
+    @param picker: dict 提交选择器
+    @param prefix: str 提交ID前缀
+    @return: list 匹配的完整提交ID(最多返回两个，足以判断是否唯一)
+    """
+    ordered = picker['sorted']
+    pos = bisect.bisect_left(ordered, prefix)
+    return [oid for oid in ordered[pos:pos + 2] if oid.startswith(prefix)]
+
+def get_commit_by_index(picker, index):
+    """
+    根据序号或缩写提交ID获取完整提交ID
+    @param picker: dict 提交选择器
     @param index: str 序号或提交ID
     @return: str 提交ID或None
     """
-    try:
-        # 尝试作为序号处理
-        idx = int(index) - 1
-        if 0 <= idx < len(commits):
-            return commits[idx].split()[0]  # 返回提交ID
-    except ValueError:
-        # 如果不是数字，作为提交ID处理
-        if any(index in commit for commit in commits):
-            return index
-    return None
+    index = index.strip().lower()
+    if index.isdigit() and 1 <= int(index) <= len(picker['rows']):
+        return picker['rows'][int(index) - 1][0]
+    if index in picker['by_oid']:
+        return index
+    if len(index) < 4 or any(c not in '0123456789abcdef' for c in index):
+        return None
+    matches = find_commits_by_prefix(picker, index)
+    if len(matches) > 1:
+        print_colored(f"\n提交ID {index} 不唯一，请输入更长的前缀", "yellow")
+        return None
+    return matches[0] if matches else None
+
+def print_commit_picker(picker):
+    """
+    按序号列出提交选择器中的提交
+    @param picker: dict 提交选择器
+    @return: None
+    """
+    for i, (oid, subject) in enumerate(picker['rows'], 1):
+        print(f"{i}. {picker['short'][oid]} {subject}")
 
 def handle_revert():
     """
@@ -1785,8 +4944,9 @@ def handle_revert():
         print("1. 还原指定提交")
         print("2. 还原最近的提交")
         print("3. 还原合并提交")
-        print("\n说明: 还原操作会创建新的提交来撤销之前的更改")
-        print("     不同于 reset，revert 是安全的操作")
+        if get_setting('show_hints'):
+            print("\n说明: 还原操作会创建新的提交来撤销之前的更改")
+            print("     不同于 reset，revert 是安全的操作")
         print("\n0. 返回主菜单")
         
         choice = input("\n请选择 (0-3): ")
@@ -1823,29 +4983,30 @@ def handle_revert():
                 continue
         
         if choice == "1":
+            count = 10
             while True:
                 # 获取并显示提交历史
-                result = subprocess.run(['git', 'log', '--oneline', '-n', '10'], 
-                                     capture_output=True, 
-                                     text=True,
-                                     encoding='utf-8')
-                if result.stdout:
-                    commits = result.stdout.strip().split('\n')
+                picker = load_commit_picker(['-n', str(count)])
+                if picker['rows']:
                     print("\n最近的提交记录:")
-                    for i, commit in enumerate(commits, 1):
-                        print(f"{i}. {commit}")
+                    print_commit_picker(picker)
                     
-                    print("\n0. 返回上级菜单")
+                    if len(picker['rows']) == count:
+                        print("\nm. 显示更多提交")
+                    print("0. 返回上级菜单")
                     index = input("\n请输入序号或提交ID: ")
                     
                     if index == "0":
                         break
+                    if index.lower() == "m":
+                        count *= 2
+                        continue
                     
-                    commit_id = get_commit_by_index(commits, index)
+                    commit_id = get_commit_by_index(picker, index)
                     
                     if commit_id:
                         if execute_git(['revert', commit_id]):
-                            print_colored(f"\n✓ 已还原提交 {commit_id}", "green")
+                            print_colored(f"\n✓ 已还原提交 {picker['short'][commit_id]}", "green")
                             # 显示还原后的状态
                             execute_git(['log', '-1', '--stat'])
                             input("\n按回车键继续...")
@@ -1853,51 +5014,1352 @@ def handle_revert():
                     else:
                         print_colored("\n无效的序号或提交ID", "yellow")
                         continue
+                else:
+                    print_colored("\n没有找到提交记录", "yellow")
+                    break
         elif choice == "2":
             if execute_git(['revert', 'HEAD']):
                 print_colored("\n✓ 已还原最近的提交", "green")
                 # 显示还原后的状态
                 execute_git(['log', '-1', '--stat'])
             else:
-                print_colored("\n✗ 还原失败", "red")
-        elif choice == "3":
-            while True:
-                # 获取并显示合并提交
-                result = subprocess.run(['git', 'log', '--merges', '--oneline', '-n', '5'],
-                                     capture_output=True,
-                                     text=True,
-                                     encoding='utf-8')
-                if result.stdout:
-                    commits = result.stdout.strip().split('\n')
-                    print("\n最近的合并提交:")
-                    for i, commit in enumerate(commits, 1):
-                        print(f"{i}. {commit}")
-                    
-                    print("\n0. 返回上级菜单")
-                    index = input("\n请输入序号或提交ID: ")
-                    
-                    if index == "0":
-                        break
-                    
-                    commit_id = get_commit_by_index(commits, index)
-                    
-                    if commit_id:
-                        parent = input("请输入要保留的父提交编号(1 或 2): ")
-                        if execute_git(['revert', '-m', parent, commit_id]):
-                            print_colored(f"\n✓ 已还原合并提交 {commit_id}", "green")
-                            # 显示还原后的状态
-                            execute_git(['log', '-1', '--stat'])
-                            input("\n按回车键继续...")
-                            break
-                    else:
-                        print_colored("\n无效的序号或提交ID", "yellow")
-                        continue
-        else:
-            print_colored("无效的选择", "yellow")
+                print_colored("\n✗ 还原失败", "red")
+        elif choice == "3":
+            count = 5
+            while True:
+                # 获取并显示合并提交
+                picker = load_commit_picker(['--merges', '-n', str(count)])
+                if picker['rows']:
+                    print("\n最近的合并提交:")
+                    print_commit_picker(picker)
+                    
+                    if len(picker['rows']) == count:
+                        print("\nm. 显示更多提交")
+                    print("0. 返回上级菜单")
+                    index = input("\n请输入序号或提交ID: ")
+                    
+                    if index == "0":
+                        break
+                    if index.lower() == "m":
+                        count *= 2
+                        continue
+                    
+                    commit_id = get_commit_by_index(picker, index)
+                    
+                    if commit_id:
+                        parent = input("请输入要保留的父提交编号(1 或 2): ")
+                        if execute_git(['revert', '-m', parent, commit_id]):
+                            print_colored(f"\n✓ 已还原合并提交 {picker['short'][commit_id]}", "green")
+                            # 显示还原后的状态
+                            execute_git(['log', '-1', '--stat'])
+                            input("\n按回车键继续...")
+                            break
+                    else:
+                        print_colored("\n无效的序号或提交ID", "yellow")
+                        continue
+                else:
+                    print_colored("\n没有找到合并提交", "yellow")
+                    break
+        else:
+            print_colored("无效的选择", "yellow")
+            continue
+        
+        if choice in ["1", "2", "3"]:
+            input("\n按回车键继续...")
+
+# 所有权分析中改动权重的半衰期(天)
+OWNERSHIP_HALF_LIFE_DAYS = 180
+
+def iter_log_numstat(log_args, fields, input_text=None):
+    """
+    流式解析 git log --numstat -z 的输出，每次产出一个提交
+    @param log_args: list 追加到 git log 的参数(版本范围等)
+    @param fields: list 提交头部的格式占位符，如 ['%H', '%aN']
+    @param input_text: str 写入 git 标准输入的内容(配合 --stdin 使用)
+    @return: generator 逐个产出 (头部字段列表, [(新增行数, 删除行数, 路径), ...])，
+             二进制文件的行数为 None
+    """
+    fmt = '%x01' + '%x1f'.join(fields)
+    command = ['git', 'log', '--numstat', '-z', '-M', f'--format={fmt}'] + log_args
+    header = None
+    files = []
+    stat = None
+    rename_fields = 0
+    for token in iter_git_records(command, input_text=input_text):
+        if rename_fields:
+            # 重命名记录: 统计字段后依次是原路径和新路径，只保留新路径
+            rename_fields -= 1
+            if rename_fields == 0:
+                files.append((stat[0], stat[1], os.fsdecode(token)))
+            continue
+        if token.startswith(b'\x01'):
+            if header is not None:
+                yield header, files
+            header = token[1:].decode('utf-8', 'replace').split('\x1f')
+            files = []
+            continue
+        parts = token.lstrip(b'\n').split(b'\t', 2)
+        if len(parts) != 3:
+            continue
+        added = int(parts[0]) if parts[0] != b'-' else None
+        deleted = int(parts[1]) if parts[1] != b'-' else None
+        if parts[2]:
+            files.append((added, deleted, os.fsdecode(parts[2])))
+        else:
+            stat = (added, deleted)
+            rename_fields = 2
+    if header is not None:
+        yield header, files
+
+def analyze_ownership(log_args=None, depth=2, half_life=OWNERSHIP_HALF_LIFE_DAYS, now=None):
+    """
+    一次读取提交历史，计算作者贡献、目录所有权和每月活跃人数
+    作者按 .mailmap 归并后映射为整数编号，全局计数使用数组存储；
+    目录所有权按改动行数加权，权重随时间指数衰减
+    @param log_args: list git log 的版本参数，默认为 HEAD
+    @param depth: int 目录层级
+    @param half_life: float 权重半衰期(天)
+    @param now: float 计算衰减的基准时间戳，默认为当前时间
+    @return: dict 分析结果
+    """
+    import array
+    now = now or time.time()
+    decay = 0.5 ** (1.0 / (half_life * 86400))
+    ids = {}
+    names = []
+    commits = array.array('l')
+    lines = array.array('l')
+    weights = array.array('d')
+    dirs = {}
+    months = {}
+    fields = ['%aN', '%aE', '%at']
+    for (name, email, timestamp), files in iter_log_numstat((log_args or ['HEAD']) + ['--no-merges'], fields):
+        key = email.lower() or name
+        author = ids.get(key)
+        if author is None:
+            author = ids[key] = len(names)
+            names.append((name, email))
+            commits.append(0)
+            lines.append(0)
+            weights.append(0.0)
+        timestamp = int(timestamp or 0)
+        factor = decay ** max(now - timestamp, 0)
+        commits[author] += 1
+        months.setdefault(time.strftime('%Y-%m', time.localtime(timestamp)), set()).add(author)
+        for added, deleted, path in files:
+            changed = (added or 0) + (deleted or 0) or 1
+            lines[author] += changed
+            weights[author] += changed * factor
+            directory = '/'.join(path.split('/')[:-1][:depth]) or '.'
+            owners = dirs.setdefault(directory, {})
+            owners[author] = owners.get(author, 0.0) + changed * factor
+    return {'authors': names, 'commits': commits, 'lines': lines, 'weights': weights,
+            'dirs': dirs, 'months': months, 'depth': depth, 'half_life': half_life}
+
+def compute_bus_factor(owners, threshold=0.5):
+    """
+    计算巴士因子：累计权重达到阈值所需的最少作者数
+    @param owners: dict 作者编号 -> 权重
+    @param threshold: float 权重占比阈值
+    @return: int 巴士因子
+    """
+    total = sum(owners.values())
+    if total <= 0:
+        return 0
+    covered = 0.0
+    for count, weight in enumerate(sorted(owners.values(), reverse=True), 1):
+        covered += weight
+        if covered >= total * threshold:
+            return count
+    return len(owners)
+
+def print_ownership_report(result, top=10):
+    """
+    显示所有权分析结果
+    @param result: dict analyze_ownership 的结果
+    @param top: int 每部分显示的条数
+    @return: None
+    """
+    import heapq
+    names, weights = result['authors'], result['weights']
+    if not names:
+        print_colored("没有可分析的提交", "yellow")
+        return
+    total_weight = sum(weights) or 1.0
+    with buffered_output():
+        print_colored(f"\n贡献者 (共 {len(names)} 人，权重半衰期 {result['half_life']} 天):", "yellow")
+        for author in heapq.nlargest(top, range(len(names)), key=lambda i: weights[i]):
+            name, email = names[author]
+            echo(f"  {name} <{email}>  提交 {result['commits'][author]}  改动行 {result['lines'][author]}"
+                 f"  近期占比 {weights[author] / total_weight:.1%}")
+
+        print_colored(f"\n目录所有权 (层级 {result['depth']}，按近期改动量排序):", "yellow")
+        dirs = result['dirs']
+        for directory in heapq.nlargest(top, dirs, key=lambda d: sum(dirs[d].values())):
+            owners = dirs[directory]
+            owner = max(owners, key=owners.get)
+            share = owners[owner] / (sum(owners.values()) or 1.0)
+            echo(f"  {directory}  主要维护者 {names[owner][0]} ({share:.0%})"
+                 f"  巴士因子 {compute_bus_factor(owners)}  参与人数 {len(owners)}")
+
+        risky = [d for d in dirs if compute_bus_factor(dirs[d]) == 1]
+        if risky:
+            echo(f"\n  巴士因子为 1 的目录: {len(risky)} / {len(dirs)}")
+
+        print_colored("\n每月活跃贡献者 (最近 12 个月):", "yellow")
+        months = sorted(result['months'])[-12:]
+        peak = max(len(result['months'][m]) for m in months)
+        for month in months:
+            count = len(result['months'][month])
+            echo(f"  {month}  {'█' * max(1, count * 30 // peak)} {count}")
+
+def load_numstat_cache(rev='HEAD'):
+    """
+    加载并增量更新每个提交的改动统计缓存
+    缓存以提交ID为键保存在仓库缓存目录，只为上次之后新增的提交运行 git log --numstat
+    @param rev: str 版本
+    @return: tuple (缓存字典, 从新到旧排列的可达提交ID列表)
+             缓存中 commits 为 提交ID -> [时间戳, [路径编号, 新增, 删除, ...]]，
+             二进制文件的行数记为 -1
+    """
+    cache_dir = get_repo_cache_dir()
+    cache_file = os.path.join(cache_dir, 'numstat.json') if cache_dir else None
+    cache = None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = None
+    if not cache or cache.get('version') != 1:
+        cache = {'version': 1, 'paths': [], 'commits': {}}
+
+    result = subprocess.run(['git', 'rev-list', rev, '--'], capture_output=True, text=True)
+    oids = result.stdout.split()
+    commits = cache['commits']
+    missing = [oid for oid in oids if oid not in commits]
+    if missing:
+        paths = cache['paths']
+        path_ids = {path: i for i, path in enumerate(paths)}
+        for (oid, timestamp), files in iter_log_numstat(['--no-walk=unsorted', '--stdin'], ['%H', '%at'],
+                                                        ''.join(oid + '\n' for oid in missing)):
+            flat = []
+            for added, deleted, path in files:
+                index = path_ids.get(path)
+                if index is None:
+                    index = path_ids[path] = len(paths)
+                    paths.append(path)
+                flat += [index, -1 if added is None else added, -1 if deleted is None else deleted]
+            commits[oid] = [int(timestamp or 0), flat]
+        if cache_file:
+            try:
+                write_json_atomic(cache_file, cache)
+            except OSError:
+                pass
+    return cache, oids
+
+def get_tree_sizes(rev='HEAD'):
+    """
+    用一次 git ls-tree 获取版本中所有文件的大小
+    @param rev: str 版本
+    @return: dict 路径 -> 字节数
+    """
+    result = subprocess.run(['git', 'ls-tree', '-r', '-l', '-z', rev], capture_output=True)
+    sizes = {}
+    for record in result.stdout.split(b'\0'):
+        meta, _, path = record.partition(b'\t')
+        fields = meta.split()
+        if len(fields) == 4 and fields[1] == b'blob':
+            sizes[os.fsdecode(path)] = int(fields[3]) if fields[3].isdigit() else 0
+    return sizes
+
+def compute_hotspots(cache, oids, sizes, half_life=OWNERSHIP_HALF_LIFE_DAYS, now=None):
+    """
+    计算热点文件：近期加权的改动量乘以文件大小的对数
+    只统计当前版本中仍然存在的文件
+    @param cache: dict 改动统计缓存
+    @param oids: list 参与统计的提交ID
+    @param sizes: dict 路径 -> 字节数
+    @param half_life: float 近期权重的半衰期(天)
+    @param now: float 基准时间戳，默认为当前时间
+    @return: list [路径, 得分, 提交数, 改动行数, 大小, 最近修改时间] 列表，按得分从高到低
+    """
+    import math
+    now = now or time.time()
+    decay = 0.5 ** (1.0 / (half_life * 86400))
+    paths, commits = cache['paths'], cache['commits']
+    stats = {}
+    for oid in oids:
+        timestamp, flat = commits[oid]
+        factor = decay ** max(now - timestamp, 0)
+        for i in range(0, len(flat), 3):
+            path = paths[flat[i]]
+            if path not in sizes:
+                continue
+            churn = max(flat[i + 1], 0) + max(flat[i + 2], 0) or 1
+            entry = stats.get(path)
+            if entry is None:
+                entry = stats[path] = [0.0, 0, 0, timestamp]
+            entry[0] += churn * factor
+            entry[1] += 1
+            entry[2] += churn
+            entry[3] = max(entry[3], timestamp)
+    hotspots = []
+    for path, (weighted, changes, churn, last) in stats.items():
+        size = sizes[path]
+        score = weighted * math.log2(2 + size / 1024)
+        hotspots.append([path, score, changes, churn, size, last])
+    hotspots.sort(key=lambda item: -item[1])
+    return hotspots
+
+def print_hotspots(hotspots, top=20):
+    """
+    显示热点文件排名
+    @param hotspots: list compute_hotspots 的结果
+    @param top: int 显示的条数
+    @return: None
+    """
+    if not hotspots:
+        print_colored("没有可分析的改动", "yellow")
+        return
+    with buffered_output():
+        print_colored(f"\n热点文件 (前 {min(top, len(hotspots))} 个，得分 = 近期加权改动量 × log2(2 + 大小KB)):", "yellow")
+        echo("      得分   提交      改动行       大小  最近修改    文件")
+        for path, score, changes, churn, size, last in hotspots[:top]:
+            date = time.strftime('%Y-%m-%d', time.localtime(last))
+            echo(f"{score:>10.1f} {changes:>6} {churn:>10} {format_size(size):>10}  {date}  {path}")
+
+def print_weekly_churn(cache, oids, path, weeks=12, now=None):
+    """
+    显示指定文件最近若干周的改动量
+    @param cache: dict 改动统计缓存
+    @param oids: list 参与统计的提交ID
+    @param path: str 文件路径(相对于仓库根目录)
+    @param weeks: int 显示的周数
+    @param now: float 基准时间戳，默认为当前时间
+    @return: None
+    """
+    now = now or time.time()
+    try:
+        path_id = cache['paths'].index(path)
+    except ValueError:
+        print_colored(f"没有找到文件 {path} 的改动记录", "yellow")
+        return
+    # 以周一 00:00 (UTC) 作为每周的起点
+    week_start = now - ((now + 3 * 86400) % (7 * 86400))
+    buckets = [[0, 0] for _ in range(weeks)]
+    for oid in oids:
+        timestamp, flat = cache['commits'][oid]
+        week = int((week_start - timestamp) // (7 * 86400)) + 1 if timestamp < week_start else 0
+        if week >= weeks:
+            continue
+        for i in range(0, len(flat), 3):
+            if flat[i] == path_id:
+                buckets[week][0] += max(flat[i + 1], 0)
+                buckets[week][1] += max(flat[i + 2], 0)
+    peak = max(max(a + d for a, d in buckets), 1)
+    print_colored(f"\n{path} 最近 {weeks} 周的改动:", "yellow")
+    for week in range(weeks - 1, -1, -1):
+        added, deleted = buckets[week]
+        start = time.strftime('%Y-%m-%d', time.localtime(week_start - week * 7 * 86400))
+        bar = colorize('+' * (added * 40 // peak), 'green') + colorize('-' * (deleted * 40 // peak), 'red')
+        print(f"  {start}  +{added:<6} -{deleted:<6} {bar}")
+
+def handle_hotspots():
+    """
+    处理热点文件与改动趋势分析
+    @return: None
+    """
+    print("\n1. 热点文件排名")
+    print("2. 文件按周改动趋势")
+    sub_choice = input("\n请选择 (1-2): ")
+    if sub_choice not in ("1", "2"):
+        print_colored("无效的选择", "yellow")
+        return
+    print("\n正在更新改动统计缓存...")
+    cache, oids = load_numstat_cache()
+    if sub_choice == "1":
+        top = input("显示条数(默认 20): ").strip()
+        print_hotspots(compute_hotspots(cache, oids, get_tree_sizes()),
+                       int(top) if top.isdigit() and int(top) > 0 else 20)
+    else:
+        path = input("请输入文件路径: ").strip()
+        if path:
+            root = get_repo_root()
+            path = os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/')
+            weeks = input("显示周数(默认 12): ").strip()
+            print_weekly_churn(cache, oids, path, int(weeks) if weeks.isdigit() and int(weeks) > 0 else 12)
+
+COMMIT_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commits (
+    oid TEXT PRIMARY KEY,
+    parents TEXT NOT NULL,
+    author_id INTEGER NOT NULL REFERENCES authors(id),
+    author_time INTEGER NOT NULL,
+    commit_time INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commits_author ON commits(author_id, author_time);
+CREATE INDEX IF NOT EXISTS commits_time ON commits(author_time);
+CREATE TABLE IF NOT EXISTS tips (
+    oid TEXT PRIMARY KEY
+);
+"""
+
+def open_commit_store():
+    """
+    打开当前仓库的提交元数据库(SQLite)，不存在时创建
+    @return: sqlite3.Connection 数据库连接，不在仓库中时返回 None
+    """
+    import sqlite3
+    cache_dir = get_repo_cache_dir()
+    if not cache_dir:
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, 'commits.sqlite3'))
+    conn.executescript(COMMIT_STORE_SCHEMA)
+    return conn
+
+def list_ref_tips():
+    """
+    获取本地分支、远程跟踪分支和 HEAD 指向的提交
+    储藏、notes 等其他引用不计入，与 git log --branches --remotes HEAD 的范围一致
+    @return: set 提交ID集合
+    """
+    result = subprocess.run(['git', 'for-each-ref', '--format=%(objectname)', 'refs/heads', 'refs/remotes'],
+                            capture_output=True, text=True)
+    tips = set(result.stdout.split())
+    head = subprocess.run(['git', 'rev-parse', '-q', '--verify', 'HEAD'], capture_output=True, text=True)
+    if head.returncode == 0:
+        tips.add(head.stdout.strip())
+    return tips
+
+def existing_objects(oids):
+    """
+    用一次 git cat-file --batch-check 过滤出仍然存在的对象
+    @param oids: iterable 对象ID
+    @return: list 存在的对象ID
+    """
+    oids = list(oids)
+    if not oids:
+        return []
+    result = subprocess.run(['git', 'cat-file', '--batch-check=%(objectname) %(objecttype)'],
+                            input=''.join(oid + '\n' for oid in oids), capture_output=True, text=True)
+    return [line.split()[0] for line in result.stdout.splitlines() if line.endswith(' commit')]
+
+def update_commit_store(conn):
+    """
+    增量更新提交元数据库
+    只遍历上次记录的引用位置之后新增的提交(所有引用可达的提交)
+    @param conn: sqlite3.Connection 数据库连接
+    @return: int 新增的提交数
+    """
+    tips = list_ref_tips()
+    known = {row[0] for row in conn.execute("SELECT oid FROM tips")}
+    if tips == known:
+        return 0
+    exclude = existing_objects(known)
+    prune_commit_store(conn, tips, exclude, len(exclude) < len(known))
+    authors = {email: author_id for author_id, email in conn.execute("SELECT id, email FROM authors")}
+    fields = ['%H', '%P', '%aN', '%aE', '%at', '%ct', '%B']
+    revs = ''.join(tip + '\n' for tip in tips) + ''.join('^' + oid + '\n' for oid in exclude)
+    added = 0
+    rows = []
+    for header, files in iter_log_numstat(['--stdin'], fields, revs):
+        if len(header) != len(fields):
+            continue
+        oid, parents, name, email, author_time, commit_time, message = header
+        key = email.lower()
+        author_id = authors.get(key)
+        if author_id is None:
+            author_id = authors[key] = conn.execute(
+                "INSERT INTO authors (name, email) VALUES (?, ?)", (name, key)).lastrowid
+        rows.append((oid, parents, author_id, int(author_time), int(commit_time), len(files),
+                     sum(a or 0 for a, _, _ in files), sum(d or 0 for _, d, _ in files),
+                     message.strip()))
+        if len(rows) >= 1000:
+            conn.executemany("INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added += len(rows)
+            rows = []
+    conn.executemany("INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    added += len(rows)
+    conn.execute("DELETE FROM tips")
+    conn.executemany("INSERT INTO tips VALUES (?)", [(tip,) for tip in tips])
+    conn.commit()
+    return added
+
+def prune_commit_store(conn, tips, old_tips, full=False):
+    """
+    删除已经不再可达的提交(变基、删除分支等之后)
+    @param conn: sqlite3.Connection 数据库连接
+    @param tips: iterable 当前的引用位置
+    @param old_tips: list 上次记录且仍然存在的引用位置
+    @param full: bool 上次的引用位置有对象已丢失时，按当前可达集合全量清理
+    @return: int 删除的提交数
+    """
+    new_revs = ''.join(tip + '\n' for tip in tips)
+    if full:
+        reachable = set(subprocess.run(['git', 'rev-list', '--stdin'], input=new_revs,
+                                       capture_output=True, text=True).stdout.split())
+        stale = [oid for (oid,) in conn.execute("SELECT oid FROM commits") if oid not in reachable]
+    elif old_tips:
+        stale = subprocess.run(['git', 'rev-list', '--stdin'],
+                               input=''.join(oid + '\n' for oid in old_tips) +
+                               ''.join('^' + tip + '\n' for tip in tips),
+                               capture_output=True, text=True).stdout.split()
+    else:
+        return 0
+    conn.executemany("DELETE FROM commits WHERE oid = ?", [(oid,) for oid in stale])
+    return len(stale)
+
+def get_commit_store():
+    """
+    打开并更新提交元数据库，供各分析菜单查询
+    @return: sqlite3.Connection 数据库连接，不在仓库中时返回 None
+    """
+    conn = open_commit_store()
+    if conn is not None:
+        added = update_commit_store(conn)
+        if added:
+            print_colored(f"已更新提交数据: 新增 {added} 个提交", "cyan")
+    return conn
+
+def print_commit_rows(rows):
+    """
+    显示提交查询结果
+    @param rows: iterable (提交ID, 作者时间, 作者名, 提交说明) 行
+    @return: None
+    """
+    count = 0
+    with buffered_output():
+        for oid, author_time, name, message in rows:
+            date = time.strftime('%Y-%m-%d', time.localtime(author_time))
+            echo(f"{colorize(oid[:8], 'yellow')} {date} {name}  {message.splitlines()[0] if message else ''}")
+            count += 1
+    if not count:
+        print_colored("没有找到匹配的提交", "yellow")
+
+def query_commits_by_author(conn, keyword):
+    """
+    按作者名或邮箱查询提交
+    @param conn: sqlite3.Connection 数据库连接
+    @param keyword: str 作者名或邮箱关键词
+    @return: list (提交ID, 作者时间, 作者名, 提交说明) 列表，按时间从新到旧
+    """
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    pattern = f"%{escaped}%"
+    return conn.execute(
+        "SELECT c.oid, c.author_time, a.name, c.message FROM commits c JOIN authors a ON a.id = c.author_id "
+        "WHERE a.name LIKE ? ESCAPE '\\' OR a.email LIKE ? ESCAPE '\\' ORDER BY c.author_time DESC",
+        (pattern, pattern)).fetchall()
+
+def query_commits_by_message(conn, keyword):
+    """
+    按提交说明查询提交(不区分大小写的子串匹配)
+    @param conn: sqlite3.Connection 数据库连接
+    @param keyword: str 关键词
+    @return: list (提交ID, 作者时间, 作者名, 提交说明) 列表，按时间从新到旧
+    """
+    return conn.execute(
+        "SELECT c.oid, c.author_time, a.name, c.message FROM commits c JOIN authors a ON a.id = c.author_id "
+        "WHERE instr(lower(c.message), lower(?)) > 0 ORDER BY c.author_time DESC", (keyword,)).fetchall()
+
+# 搜索关键词以此前缀开头时按正则表达式匹配，否则按字面文本查询提交元数据库
+REGEX_SEARCH_PREFIX = 're:'
+
+def parse_search_keyword(keyword):
+    """
+    解析搜索关键词，只有显式带 re: 前缀时才按正则表达式处理
+    @param keyword: str 用户输入
+    @return: tuple (是否为正则表达式, 关键词或正则表达式)
+    """
+    if keyword.startswith(REGEX_SEARCH_PREFIX):
+        return True, keyword[len(REGEX_SEARCH_PREFIX):]
+    return False, keyword
+
+def search_commits(field, keyword):
+    """
+    按作者或提交说明搜索提交(不区分大小写)
+    关键词按字面文本查询提交元数据库(邮箱、带点的关键词也不例外)；
+    带 re: 前缀时交给 git log 按正则匹配，范围同样是分支、远程分支和 HEAD
+    @param field: str author 或 message
+    @param keyword: str 关键词，或以 re: 开头的正则表达式
+    @return: None
+    """
+    is_regex, keyword = parse_search_keyword(keyword)
+    if is_regex:
+        option = '--author' if field == 'author' else '--grep'
+        execute_git(['log', '--branches', '--remotes', 'HEAD', '-i', '--date=short',
+                     '--format=%h %ad %an  %s', option, keyword])
+        return
+    conn = get_commit_store()
+    if conn is not None:
+        query = query_commits_by_author if field == 'author' else query_commits_by_message
+        print_commit_rows(query(conn, keyword))
+        conn.close()
+
+def print_commit_summary(conn):
+    """
+    显示提交统计: 作者提交数排名和每月提交数
+    @param conn: sqlite3.Connection 数据库连接
+    @return: None
+    """
+    total, merges = conn.execute(
+        "SELECT count(*), sum(parents LIKE '% %') FROM commits").fetchone()
+    print_colored(f"\n共 {total} 个提交 (合并提交 {merges or 0} 个)", "cyan")
+    print("\n提交统计:")
+    for name, email, count in conn.execute(
+            "SELECT a.name, a.email, count(*) n FROM commits c JOIN authors a ON a.id = c.author_id "
+            "GROUP BY a.id ORDER BY n DESC LIMIT 20"):
+        print(f"{count:>7}\t{name} <{email}>")
+    print("\n每月提交数:")
+    rows = conn.execute(
+        "SELECT strftime('%Y-%m', author_time, 'unixepoch', 'localtime') m, count(*), sum(added), sum(deleted) "
+        "FROM commits GROUP BY m ORDER BY m").fetchall()
+    peak = max((count for _, count, _, _ in rows), default=1)
+    for month, count, added, deleted in rows[-24:]:
+        print(f"  {month}  {count:>6}  +{added:<8} -{deleted:<8} {'█' * max(1, count * 30 // peak)}")
+
+# 对象读取器中基础对象缓存的总字节数上限
+OBJECT_CACHE_BYTES = 32 * 1024 * 1024
+
+PACK_OBJECT_TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+
+def open_pack_index(idx_path):
+    """
+    内存映射打开 v2 格式的 .idx 文件及对应的 .pack 文件
+    @param idx_path: str .idx 文件路径
+    @return: dict 包文件状态，格式不支持时返回 None
+    """
+    import mmap
+    import struct
+    pack_path = idx_path[:-4] + '.pack'
+    try:
+        with open(idx_path, 'rb') as f:
+            idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(pack_path, 'rb') as f:
+            pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if idx[:4] != b'\xfftOc' or struct.unpack('>I', idx[4:8])[0] != 2 or pack[:4] != b'PACK':
+        idx.close()
+        pack.close()
+        return None
+    fanout = struct.unpack('>256I', idx[8:8 + 1024])
+    count = fanout[255]
+    return {
+        'path': pack_path,
+        'idx': idx,
+        'pack': pack,
+        'fanout': fanout,
+        'names': 8 + 1024,
+        'offsets': 8 + 1024 + count * 24,
+        'large_offsets': 8 + 1024 + count * 28,
+    }
+
+def find_oid_index(data, fanout, names, raw):
+    """
+    在排好序的对象ID表中二分查找，先用 fanout 表缩小范围
+    @param data: mmap 文件内容
+    @param fanout: tuple 256 项的 fanout 表
+    @param names: int 对象ID表的起始位置
+    @param raw: bytes 20 字节的对象ID
+    @return: int 对象在表中的序号，未找到时返回 None
+    """
+    lo = fanout[raw[0] - 1] if raw[0] else 0
+    hi = fanout[raw[0]]
+    while lo < hi:
+        mid = (lo + hi) // 2
+        current = data[names + mid * 20:names + mid * 20 + 20]
+        if current < raw:
+            lo = mid + 1
+        elif current > raw:
+            hi = mid
+        else:
+            return mid
+    return None
+
+def find_pack_offset(pack, raw):
+    """
+    在包索引中查找对象
+    @param pack: dict 包文件状态
+    @param raw: bytes 20 字节的对象ID
+    @return: int 对象在 .pack 文件中的偏移，未找到时返回 None
+    """
+    import struct
+    idx = pack['idx']
+    found = find_oid_index(idx, pack['fanout'], pack['names'], raw)
+    if found is None:
+        return None
+    pos = pack['offsets'] + found * 4
+    offset = struct.unpack('>I', idx[pos:pos + 4])[0]
+    if offset & 0x80000000:
+        pos = pack['large_offsets'] + (offset & 0x7fffffff) * 8
+        offset = struct.unpack('>Q', idx[pos:pos + 8])[0]
+    return offset
+
+def inflate_at(data, pos, size):
+    """
+    从指定位置解压 zlib 数据
+    @param data: mmap 包文件内容
+    @param pos: int 起始位置
+    @param size: int 解压后的大小
+    @return: bytes 解压后的数据
+    """
+    import zlib
+    decoder = zlib.decompressobj()
+    step = size + 64
+    parts = []
+    while not decoder.eof:
+        chunk = data[pos:pos + step]
+        if not chunk:
+            raise ValueError("包文件数据不完整")
+        parts.append(decoder.decompress(chunk))
+        pos += step
+        step = 65536
+    return b''.join(parts)
+
+def apply_delta(base, delta):
+    """
+    将 git 增量数据应用到基础对象上
+    @param base: bytes 基础对象内容
+    @param delta: bytes 增量数据
+    @return: bytes 还原后的对象内容
+    """
+    pos = 0
+    sizes = []
+    for _ in range(2):
+        value = shift = 0
+        while True:
+            byte = delta[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        sizes.append(value)
+    if sizes[0] != len(base):
+        raise ValueError("增量的基础对象大小不匹配")
+    out = bytearray()
+    length = len(delta)
+    while pos < length:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("无效的增量指令")
+    if len(out) != sizes[1]:
+        raise ValueError("增量还原后的大小不匹配")
+    return bytes(out)
+
+def cache_object(store, key, value):
+    """
+    将对象放入 LRU 缓存，超过字节上限时淘汰最久未使用的对象
+    @param store: dict 对象读取器状态
+    @param key: tuple 缓存键(包文件序号, 偏移)
+    @param value: tuple (对象类型, 内容)
+    @return: None
+    """
+    cache = store['cache']
+    if key in cache:
+        return
+    cache[key] = value
+    store['cache_bytes'] += len(value[1])
+    while store['cache_bytes'] > OBJECT_CACHE_BYTES and len(cache) > 1:
+        _, (_, old) = cache.popitem(last=False)
+        store['cache_bytes'] -= len(old)
+
+def read_pack_object(store, pack_index, offset):
+    """
+    读取包文件中指定偏移的对象，沿增量链找到基础对象后依次还原
+    @param store: dict 对象读取器状态
+    @param pack_index: int 包文件序号
+    @param offset: int 对象偏移
+    @return: tuple (对象类型, 内容)
+    """
+    chain = []
+    while True:
+        key = (pack_index, offset)
+        cached = store['cache'].get(key)
+        if cached is not None:
+            store['cache'].move_to_end(key)
+            kind, data = cached
+            break
+        pack = store['packs'][pack_index]['pack']
+        pos = offset
+        byte = pack[pos]
+        pos += 1
+        kind = (byte >> 4) & 7
+        size = byte & 15
+        shift = 4
+        while byte & 0x80:
+            byte = pack[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        if kind in PACK_OBJECT_TYPES:
+            kind = PACK_OBJECT_TYPES[kind]
+            data = inflate_at(pack, pos, size)
+            break
+        if kind == 6:
+            # OFS_DELTA: 基础对象在同一包内，以负偏移表示
+            byte = pack[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = pack[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            chain.append((key, inflate_at(pack, pos, size)))
+            offset -= distance
+        elif kind == 7:
+            # REF_DELTA: 基础对象以对象ID表示，可能在其他包或松散对象中
+            base = read_object(store, pack[pos:pos + 20])
+            if base is None:
+                raise ValueError("找不到增量的基础对象")
+            chain.append((key, inflate_at(pack, pos + 20, size)))
+            kind, data = base
+            break
+        else:
+            raise ValueError(f"未知的对象类型: {kind}")
+    cache_object(store, key, (kind, data))
+    for key, delta in reversed(chain):
+        data = apply_delta(data, delta)
+        cache_object(store, key, (kind, data))
+    return kind, data
+
+def load_object_packs(store):
+    """
+    (重新)扫描各对象目录(含备用对象目录)中的包文件
+    @param store: dict 对象读取器状态
+    @return: None
+    """
+    import glob
+    known = {pack['path'] for pack in store['packs']}
+    for objects in store['object_dirs']:
+        for idx_path in sorted(glob.glob(os.path.join(objects, 'pack', '*.idx'))):
+            if idx_path[:-4] + '.pack' not in known:
+                pack = open_pack_index(idx_path)
+                if pack is not None:
+                    store['packs'].append(pack)
+
+def get_object_dirs(objects):
+    """
+    获取对象目录及其 objects/info/alternates 中登记的备用对象目录(递归)
+    @param objects: str 对象目录
+    @return: list 对象目录列表，自身在前
+    """
+    dirs = []
+    pending = [os.path.abspath(objects)]
+    while pending:
+        current = pending.pop(0)
+        if current in dirs or not os.path.isdir(current):
+            continue
+        dirs.append(current)
+        try:
+            with open(os.path.join(current, 'info', 'alternates'), encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        # 相对路径以当前对象目录为准
+                        pending.append(os.path.normpath(os.path.join(current, line)))
+        except OSError:
+            pass
+    return dirs
+
+def open_object_store():
+    """
+    创建只读的对象读取器
+    直接读取内存映射的包文件和松散对象，读取失败时回退到 git cat-file --batch
+    @return: dict 对象读取器状态，不在仓库中时返回 None
+    """
+    import collections
+    result = subprocess.run(['git', 'rev-parse', '--git-path', 'objects', '--show-object-format'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    objects, object_format = result.stdout.split()[:2]
+    store = {
+        'object_dirs': get_object_dirs(objects),
+        'packs': [],
+        'cache': collections.OrderedDict(),
+        'cache_bytes': 0,
+        'cat_file': None,
+        # 只支持 SHA-1 仓库，其他格式全部交给 git cat-file
+        'native': object_format == 'sha1',
+    }
+    if store['native']:
+        load_object_packs(store)
+    return store
+
+def read_loose_object(store, hex_oid):
+    """
+    读取松散对象，依次查找自身和备用对象目录
+    @param store: dict 对象读取器状态
+    @param hex_oid: str 对象ID
+    @return: tuple (对象类型, 内容)，不存在时返回 None
+    """
+    import zlib
+    for objects in store['object_dirs']:
+        try:
+            with open(os.path.join(objects, hex_oid[:2], hex_oid[2:]), 'rb') as f:
+                raw = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            continue
+        header, _, data = raw.partition(b'\0')
+        return header.split(b' ')[0].decode('ascii'), data
+    return None
+
+def read_object_fallback(store, hex_oid):
+    """
+    通过常驻的 git cat-file --batch 进程读取对象
+    @param store: dict 对象读取器状态
+    @param hex_oid: str 对象ID
+    @return: tuple (对象类型, 内容)，不存在时返回 None
+    """
+    proc = store['cat_file']
+    if proc is None or proc.poll() is not None:
+        proc = store['cat_file'] = subprocess.Popen(['git', 'cat-file', '--batch'],
+                                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                    stderr=subprocess.DEVNULL)
+    proc.stdin.write(hex_oid.encode('ascii') + b'\n')
+    proc.stdin.flush()
+    header = proc.stdout.readline().split()
+    if len(header) != 3:
+        return None
+    data = proc.stdout.read(int(header[2]))
+    proc.stdout.read(1)
+    return header[1].decode('ascii'), data
+
+def read_object(store, oid):
+    """
+    读取对象：依次查找包文件、松散对象，最后回退到 git cat-file
+    @param store: dict 对象读取器状态
+    @param oid: str/bytes 对象ID(十六进制字符串或 20 字节)
+    @return: tuple (对象类型, 内容)，不存在时返回 None
+    """
+    import zlib
+    if isinstance(oid, str):
+        hex_oid = oid
+        raw = bytes.fromhex(oid) if store['native'] else None
+    else:
+        raw, hex_oid = bytes(oid), bytes(oid).hex()
+    if store['native']:
+        for rescan in (False, True):
+            if rescan:
+                # 可能有新生成的包文件
+                load_object_packs(store)
+            for pack_index, pack in enumerate(store['packs']):
+                offset = find_pack_offset(pack, raw)
+                if offset is not None:
+                    try:
+                        return read_pack_object(store, pack_index, offset)
+                    except (ValueError, IndexError, zlib.error):
+                        return read_object_fallback(store, hex_oid)
+            found = read_loose_object(store, hex_oid)
+            if found is not None:
+                return found
+    return read_object_fallback(store, hex_oid)
+
+def close_object_store(store):
+    """
+    关闭对象读取器，释放内存映射和后台进程
+    @param store: dict 对象读取器状态
+    @return: None
+    """
+    for pack in store['packs']:
+        pack['idx'].close()
+        pack['pack'].close()
+    store['packs'] = []
+    store['cache'].clear()
+    if store['cat_file'] is not None:
+        store['cat_file'].stdin.close()
+        store['cat_file'].wait()
+        store['cat_file'] = None
+
+def parse_commit_object(data):
+    """
+    解析提交对象
+    @param data: bytes 提交对象内容
+    @return: dict 包含 tree、parents、author、time、message
+    """
+    header, _, message = data.partition(b'\n\n')
+    commit = {'tree': None, 'parents': [], 'author': '', 'time': 0,
+              'message': message.decode('utf-8', 'replace')}
+    for line in header.split(b'\n'):
+        key, _, value = line.partition(b' ')
+        if key == b'tree':
+            commit['tree'] = value.decode('ascii')
+        elif key == b'parent':
+            commit['parents'].append(value.decode('ascii'))
+        elif key == b'author':
+            name, _, rest = value.rpartition(b'> ')
+            commit['author'] = name.decode('utf-8', 'replace') + '>'
+            commit['time'] = int(rest.split()[0]) if rest else 0
+    return commit
+
+def iter_tree_entries(store, tree_oid, prefix=''):
+    """
+    递归遍历树对象，产出所有文件
+    @param store: dict 对象读取器状态
+    @param tree_oid: str/bytes 树对象ID
+    @param prefix: str 路径前缀
+    @return: generator 逐个产出 (模式, 路径, 20 字节对象ID)，子模块会被跳过
+    """
+    found = read_object(store, tree_oid)
+    if found is None:
+        return
+    data = found[1]
+    pos = 0
+    hash_size = 20 if store['native'] else 32
+    while pos < len(data):
+        space = data.index(b' ', pos)
+        nul = data.index(b'\0', space)
+        mode = data[pos:space]
+        name = os.fsdecode(data[space + 1:nul])
+        oid = data[nul + 1:nul + 1 + hash_size]
+        pos = nul + 1 + hash_size
+        path = prefix + name
+        if mode == b'40000':
+            yield from iter_tree_entries(store, oid, path + '/')
+        elif mode != b'160000':
+            yield mode.decode('ascii'), path, oid
+
+def iter_revision_files(rev='HEAD'):
+    """
+    遍历指定版本中的所有文件，不检出工作区
+    @param rev: str 版本
+    @return: generator 逐个产出 (对象读取器, 路径, 20 字节对象ID)，版本无效时不产出
+    """
+    result = subprocess.run(['git', 'rev-parse', '--verify', '-q', f'{rev}^{{commit}}'],
+                            capture_output=True, text=True)
+    store = open_object_store() if result.returncode == 0 else None
+    if store is None:
+        return
+    try:
+        found = read_object(store, result.stdout.strip())
+        if found is None:
+            return
+        commit = parse_commit_object(found[1])
+        for _, path, oid in iter_tree_entries(store, commit['tree']):
+            yield store, path, oid
+    finally:
+        close_object_store(store)
+
+COMMIT_GRAPH_NO_PARENT = 0x70000000
+
+def read_commit_graph_file(path):
+    """
+    内存映射打开一个 commit-graph 文件并定位各数据块
+    @param path: str 文件路径
+    @return: dict 图层状态，格式不支持时返回 None
+    """
+    import mmap
+    import struct
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    # 只支持 SHA-1 的第 1 版格式
+    if data[:4] != b'CGPH' or data[4] != 1 or data[5] != 1:
+        data.close()
+        return None
+    chunks = {}
+    for i in range(data[6]):
+        pos = 8 + i * 12
+        chunks[data[pos:pos + 4]] = struct.unpack('>Q', data[pos + 4:pos + 12])[0]
+    if not all(key in chunks for key in (b'OIDF', b'OIDL', b'CDAT')):
+        data.close()
+        return None
+    fanout = struct.unpack('>256I', data[chunks[b'OIDF']:chunks[b'OIDF'] + 1024])
+    return {
+        'data': data,
+        'fanout': fanout,
+        'count': fanout[255],
+        'oids': chunks[b'OIDL'],
+        'commits': chunks[b'CDAT'],
+        'edges': chunks.get(b'EDGE'),
+        'base': 0,
+    }
+
+def open_commit_graph():
+    """
+    打开仓库的 commit-graph，支持单文件和分层的 commit-graph-chain
+    @return: dict 提交图状态，没有可用的 commit-graph 时返回 None
+    """
+    result = subprocess.run(['git', 'rev-parse', '--git-path', 'objects/info'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    info = result.stdout.strip()
+    paths = [os.path.join(info, 'commit-graph')]
+    if not os.path.isfile(paths[0]):
+        try:
+            with open(os.path.join(info, 'commit-graphs', 'commit-graph-chain')) as f:
+                paths = [os.path.join(info, 'commit-graphs', f'graph-{line.strip()}.graph')
+                         for line in f if line.strip()]
+        except OSError:
+            return None
+    graph = {'layers': [], 'count': 0, 'cache': {}}
+    for path in paths:
+        layer = read_commit_graph_file(path)
+        if layer is None:
+            close_commit_graph(graph)
+            return None
+        # 分层文件中的提交位置是全局编号，基础层在前
+        layer['base'] = graph['count']
+        graph['count'] += layer['count']
+        graph['layers'].append(layer)
+    return graph if graph['layers'] else None
+
+def close_commit_graph(graph):
+    """
+    关闭提交图，释放内存映射
+    @param graph: dict 提交图状态
+    @return: None
+    """
+    for layer in graph['layers']:
+        layer['data'].close()
+    graph['layers'] = []
+    graph['cache'].clear()
+
+def graph_layer(graph, pos):
+    """
+    找到提交位置所在的图层
+    @param graph: dict 提交图状态
+    @param pos: int 全局提交位置
+    @return: dict 图层状态
+    """
+    for layer in reversed(graph['layers']):
+        if pos >= layer['base']:
+            return layer
+    raise IndexError(pos)
+
+def graph_find(graph, oid):
+    """
+    查找提交在提交图中的位置
+    @param graph: dict 提交图状态
+    @param oid: str 提交ID
+    @return: int 全局提交位置，不在提交图中时返回 None
+    """
+    raw = bytes.fromhex(oid)
+    for layer in graph['layers']:
+        found = find_oid_index(layer['data'], layer['fanout'], layer['oids'], raw)
+        if found is not None:
+            return layer['base'] + found
+    return None
+
+def graph_oid(graph, pos):
+    """
+    获取提交位置对应的提交ID
+    @param graph: dict 提交图状态
+    @param pos: int 全局提交位置
+    @return: str 提交ID
+    """
+    layer = graph_layer(graph, pos)
+    start = layer['oids'] + (pos - layer['base']) * 20
+    return layer['data'][start:start + 20].hex()
+
+def graph_commit(graph, pos):
+    """
+    读取提交的父提交、世代号和提交时间，不需要解压提交对象
+    @param graph: dict 提交图状态
+    @param pos: int 全局提交位置
+    @return: tuple (父提交位置元组, 世代号, 提交时间戳)
+    """
+    import struct
+    cached = graph['cache'].get(pos)
+    if cached is not None:
+        return cached
+    layer = graph_layer(graph, pos)
+    data = layer['data']
+    start = layer['commits'] + (pos - layer['base']) * 36 + 20
+    first, second, high, low = struct.unpack('>IIII', data[start:start + 16])
+    parents = []
+    if first != COMMIT_GRAPH_NO_PARENT:
+        parents.append(first)
+    if second & 0x80000000:
+        # 章鱼合并: 第二个父提交起存放在 EDGE 块中，最后一项带结束标记
+        edge = layer['edges'] + (second & 0x7fffffff) * 4
+        while True:
+            value = struct.unpack('>I', data[edge:edge + 4])[0]
+            parents.append(value & 0x7fffffff)
+            if value & 0x80000000:
+                break
+            edge += 4
+    elif second != COMMIT_GRAPH_NO_PARENT:
+        parents.append(second)
+    cached = graph['cache'][pos] = (tuple(parents), high >> 2, ((high & 3) << 32) | low)
+    return cached
+
+def paint_commit_graph(graph, left, right):
+    """
+    按世代号从高到低做拓扑遍历，同时统计两侧独有的提交并找出合并基础
+    世代号保证子提交总是先于父提交出队，出队时的标记即为最终结果
+    @param graph: dict 提交图状态
+    @param left: int 左侧提交位置
+    @param right: int 右侧提交位置
+    @return: tuple (只在左侧的提交数, 只在右侧的提交数, 合并基础位置列表)
+    """
+    import heapq
+    LEFT, RIGHT, STALE = 1, 2, 4
+    flags = {}
+    heap = []
+    active = 0
+
+    def mark(pos, flag):
+        nonlocal active
+        old = flags.get(pos)
+        if old is None:
+            _, generation, timestamp = graph_commit(graph, pos)
+            heapq.heappush(heap, (-generation, -timestamp, pos))
+            flags[pos] = flag
+            if not flag & STALE:
+                active += 1
+        elif old | flag != old:
+            flags[pos] = old | flag
+            if flag & STALE and not old & STALE:
+                active -= 1
+
+    mark(left, LEFT)
+    mark(right, RIGHT)
+    only_left = only_right = 0
+    bases = []
+    while active:
+        _, _, pos = heapq.heappop(heap)
+        flag = flags[pos]
+        if not flag & STALE:
+            active -= 1
+            if flag == LEFT:
+                only_left += 1
+            elif flag == RIGHT:
+                only_right += 1
+            else:
+                # 第一次遇到的共同祖先，它的祖先都不再是最优合并基础
+                bases.append(pos)
+                flag |= STALE
+        # 过时的提交也继续向下传递标记，直到队列中只剩过时的提交
+        for parent in graph_commit(graph, pos)[0]:
+            mark(parent, flag)
+    return only_left, only_right, bases
+
+def get_branch_relation(left, right):
+    """
+    计算两个版本的领先/落后提交数和合并基础
+    优先使用 commit-graph 在进程内计算，提交不在图中时回退到 git rev-list 和 git merge-base
+    @param left: str 左侧版本
+    @param right: str 右侧版本
+    @return: tuple (只在左侧的提交数, 只在右侧的提交数, 合并基础提交ID列表)，版本无效时返回 None
+    """
+    result = subprocess.run(['git', 'rev-parse', f'{left}^{{commit}}', f'{right}^{{commit}}'],
+                            capture_output=True, text=True)
+    oids = result.stdout.split()
+    if result.returncode != 0 or len(oids) != 2:
+        return None
+    graph = open_commit_graph()
+    if graph is not None:
+        try:
+            positions = [graph_find(graph, oid) for oid in oids]
+            if None not in positions:
+                only_left, only_right, bases = paint_commit_graph(graph, *positions)
+                return only_left, only_right, [graph_oid(graph, pos) for pos in bases]
+        finally:
+            close_commit_graph(graph)
+    counts = subprocess.run(['git', 'rev-list', '--left-right', '--count', f'{oids[0]}...{oids[1]}'],
+                            capture_output=True, text=True).stdout.split()
+    bases = subprocess.run(['git', 'merge-base', '--all', oids[0], oids[1]],
+                           capture_output=True, text=True).stdout.split()
+    return int(counts[0]), int(counts[1]), bases
+
+def print_branch_relation(left, right):
+    """
+    显示两个版本的领先/落后关系
+    @param left: str 左侧版本
+    @param right: str 右侧版本
+    @return: None
+    """
+    relation = get_branch_relation(left, right)
+    if relation is None:
+        print_colored("无效的版本", "red")
+        return
+    only_left, only_right, bases = relation
+    print_colored(f"\n{right} 相对 {left}: 领先 {only_right} 个提交，落后 {only_left} 个提交", "cyan")
+    if bases:
+        print(f"合并基础: {', '.join(oid[:8] for oid in bases)}")
+    else:
+        print("两个版本没有共同祖先")
+
+def count_text_lines(data):
+    """
+    统计文本内容的行数
+    @param data: bytes 文件内容
+    @return: int 行数，不是 UTF-8 文本时返回 None
+    """
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    return data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+
+def iter_line_counts(files):
+    """
+    逐个统计文件行数并产出报告行，最后产出总计
+    无法读取或不是 UTF-8 文本的文件会被跳过
+    @param files: iterable 文件路径(bytes)
+    @return: generator 逐行产出报告文本
+    """
+    total_lines = 0
+    for name in files:
+        if not name:
             continue
-        
-        if choice in ["1", "2", "3"]:
-            input("\n按回车键继续...")
+        try:
+            with open(name, 'rb') as f:
+                lines = count_text_lines(f.read())
+        except OSError:
+            continue
+        if lines is None:
+            continue
+        total_lines += lines
+        yield f"{os.fsdecode(name)}: {lines} 行"
+    yield f"\n总计: {total_lines} 行"
+
+def iter_revision_line_counts(rev):
+    """
+    统计指定版本中各文件的行数，直接读取对象库而不检出
+    @param rev: str 版本
+    @return: generator 逐行产出报告文本
+    """
+    total_lines = 0
+    for store, path, oid in iter_revision_files(rev):
+        found = read_object(store, oid)
+        lines = count_text_lines(found[1]) if found else None
+        if lines is None:
+            continue
+        total_lines += lines
+        yield f"{path}: {lines} 行"
+    yield f"\n总计: {total_lines} 行"
 
 def handle_stats():
     """
@@ -1909,8 +6371,8 @@ def handle_stats():
         print_colored("仓库统计分析", "cyan")
         print("="*40)
         print("1. 提交统计")
-        print("2. 贡献者统计") 
-        print("3. 文件变更统计")
+        print("2. 贡献者与所有权分析")
+        print("3. 热点文件分析")
         print("4. 代码行数统计")
         print("\n0. 返回主菜单")
 
@@ -1919,37 +6381,32 @@ def handle_stats():
         if choice == "0":
             return
         elif choice == "1":
-            # 提交统计
-            print("\n提交统计:")
-            execute_git(['shortlog', '-sn', '--all'])
-            print("\n每月提交数:")
-            execute_git(['log', '--format="%ad"', '--date=format:%Y-%m', '--all', '|', 'sort', '|', 'uniq', '-c'])
+            # 提交统计(来自提交元数据库)
+            conn = get_commit_store()
+            if conn is not None:
+                print_commit_summary(conn)
+                conn.close()
         elif choice == "2":
-            # 贡献者统计
-            print("\n贡献者列表:")
-            execute_git(['shortlog', '-sne', '--all'])
-            print("\n活跃时间段:")
-            execute_git(['log', '--format="%ad"', '--date=format:%H', '--all', '|', 'sort', '|', 'uniq', '-c'])
+            # 贡献者与所有权分析(遵循 .mailmap)
+            depth = input("\n目录层级(默认 2): ").strip()
+            half_life = input(f"权重半衰期天数(默认 {OWNERSHIP_HALF_LIFE_DAYS}): ").strip()
+            print("\n正在分析提交历史...")
+            result = analyze_ownership(depth=int(depth) if depth.isdigit() else 2,
+                                       half_life=int(half_life) if half_life.isdigit() and int(half_life) > 0
+                                       else OWNERSHIP_HALF_LIFE_DAYS)
+            print_ownership_report(result)
         elif choice == "3":
-            # 文件变更统计
-            print("\n文件变更排名:")
-            execute_git(['log', '--pretty=format:', '--name-only', '|', 'sort', '|', 'uniq', '-c', '|', 'sort', '-rg', '|', 'head', '-10'])
+            handle_hotspots()
         elif choice == "4":
             # 代码行数统计
+            rev = input("\n统计版本(直接回车统计工作区): ").strip()
             print("\n代码行数统计:")
-            result = subprocess.run(['git', 'ls-files'], capture_output=True, text=True, encoding='utf-8')
-            if result.stdout:
-                files = result.stdout.strip().split('\n')
-                total_lines = 0
-                for file in files:
-                    try:
-                        with open(file, 'r', encoding='utf-8') as f:
-                            lines = len(f.readlines())
-                            print(f"{file}: {lines} 行")
-                            total_lines += lines
-                    except:
-                        continue
-                print(f"\n总计: {total_lines} 行")
+            if rev:
+                page_output(iter_revision_line_counts(rev))
+            else:
+                result = subprocess.run(['git', 'ls-files', '-z'], capture_output=True)
+                if result.stdout:
+                    page_output(iter_line_counts(result.stdout.split(b'\0')))
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -1976,23 +6433,237 @@ def handle_search():
         if choice == "0":
             return
         elif choice == "1":
-            keyword = input("\n请输入搜索关键词: ")
-            execute_git(['log', '--all', '--grep', keyword])
+            keyword = input("\n请输入搜索关键词(以 re: 开头按正则匹配): ")
+            search_commits('message', keyword)
         elif choice == "2":
             keyword = input("\n请输入搜索关键词: ")
             execute_git(['log', '-p', '--all', '-S', keyword])
         elif choice == "3":
             pattern = input("\n请输入文件名模式(如 *.py): ")
-            execute_git(['ls-files', '*' + pattern])
+            rev = input("搜索版本(直接回车搜索工作区): ").strip()
+            if rev:
+                import fnmatch
+                matches = [path for _, path, _ in iter_revision_files(rev)
+                           if fnmatch.fnmatchcase(path, '*' + pattern)]
+                page_output(matches or ["未找到匹配的文件"])
+            else:
+                execute_git(['ls-files', '*' + pattern])
         elif choice == "4":
-            author = input("\n请输入作者邮箱或名称: ")
-            execute_git(['log', '--author', author])
+            author = input("\n请输入作者邮箱或名称(以 re: 开头按正则匹配): ")
+            search_commits('author', author)
         else:
             print_colored("无效的选择", "yellow")
             continue
 
         input("\n按回车键继续...")
 
+def iter_numstat(command):
+    """
+    流式解析 git diff --numstat -z 的输出
+    @param command: list Git 命令及参数(不含 git 和 --numstat -z)
+    @return: generator 逐条产出 (新增行数, 删除行数, 路径)，二进制文件的行数为 None
+    """
+    stat = None
+    rename_fields = 0
+    for field in iter_git_records(['git'] + command + ['--numstat', '-z']):
+        if rename_fields:
+            # 重命名记录: 统计字段后依次是原路径和新路径，只保留新路径
+            rename_fields -= 1
+            if rename_fields == 0:
+                yield stat[0], stat[1], os.fsdecode(field)
+            continue
+        parts = field.split(b'\t', 2)
+        if len(parts) != 3:
+            continue
+        added = int(parts[0]) if parts[0] != b'-' else None
+        deleted = int(parts[1]) if parts[1] != b'-' else None
+        if parts[2]:
+            yield added, deleted, os.fsdecode(parts[2])
+        else:
+            stat = (added, deleted)
+            rename_fields = 2
+
+def summarize_numstat(records, depth=2):
+    """
+    按目录(截取到指定层级)和扩展名汇总改动
+    只保留汇总计数，内存占用与目录数量有关而与文件数量无关
+    @param records: iterable (新增行数, 删除行数, 路径)
+    @param depth: int 目录层级，0 表示只统计总数
+    @return: dict {'total': 计数, 'dirs': {目录: 计数}, 'exts': {扩展名: 计数}}，
+             计数为 [新增行数, 删除行数, 文件数, 二进制文件数]
+    """
+    total = [0, 0, 0, 0]
+    dirs = {}
+    exts = {}
+    for added, deleted, path in records:
+        parts = path.split('/')
+        directory = '/'.join(parts[:-1][:depth]) or '.'
+        name = parts[-1]
+        ext = os.path.splitext(name)[1].lower() or '(无扩展名)'
+        for counter in (total, dirs.setdefault(directory, [0, 0, 0, 0]),
+                        exts.setdefault(ext, [0, 0, 0, 0])):
+            if added is None:
+                counter[3] += 1
+            else:
+                counter[0] += added
+                counter[1] += deleted
+            counter[2] += 1
+    return {'total': total, 'dirs': dirs, 'exts': exts}
+
+def print_diff_summary(summary, top=10):
+    """
+    显示改动汇总: 总计以及改动行数最多的目录和扩展名
+    @param summary: dict summarize_numstat 的结果
+    @param top: int 显示的条数
+    @return: None
+    """
+    import heapq
+    added, deleted, files, binary = summary['total']
+    print_colored(f"\n共 {files} 个文件: +{added} -{deleted}" +
+                  (f" (二进制文件 {binary} 个)" if binary else ""), "cyan")
+    for title, counters in (("目录", summary['dirs']), ("扩展名", summary['exts'])):
+        hotspots = heapq.nlargest(top, counters.items(), key=lambda item: (item[1][0] + item[1][1], item[1][2]))
+        if not hotspots:
+            continue
+        width = max(display_width(name) for name, _ in hotspots)
+        print_colored(f"\n改动最多的{title} (前 {len(hotspots)} 个):", "yellow")
+        for name, (a, d, n, _) in hotspots:
+            print(f"  {name}{' ' * (width - display_width(name))}  {n:>6} 个文件  +{a:<8} -{d}")
+
+def show_diff_summary(command):
+    """
+    询问汇总层级和条数后显示改动汇总
+    @param command: list 差异命令，如 ['diff', 'main', 'feature']
+    @return: None
+    """
+    depth = input("目录层级(默认 2): ").strip()
+    top = input("显示条数(默认 10): ").strip()
+    depth = int(depth) if depth.isdigit() else 2
+    top = int(top) if top.isdigit() and int(top) > 0 else 10
+    print_diff_summary(summarize_numstat(iter_numstat(command), depth), top)
+
+# 文件沿袭缓存最多保留的条目数
+LINEAGE_CACHE_SIZE = 256
+
+# 文件沿袭缓存: 仓库缓存目录 -> {'提交ID:路径': 沿袭链}
+_LINEAGE_CACHE = {}
+
+def get_repo_cache_dir(root=None):
+    """
+    获取当前仓库的缓存目录，按仓库根目录路径区分
+    @param root: str 仓库根目录(可选，默认自动查找)
+    @return: str 缓存目录路径，不在仓库中时返回 None
+    """
+    import hashlib
+    root = root or get_repo_root()
+    if not root:
+        return None
+    digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(get_config_dir(), 'cache', digest)
+
+def parse_lineage(data):
+    """
+    解析 git log --follow --name-status -z --format=%x01%H 的输出
+    @param data: bytes 命令输出
+    @return: list [提交ID, 状态, 原路径, 新路径] 列表，从新到旧排列
+    """
+    chain = []
+    tokens = data.split(b'\0')
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if not token.startswith(b'\x01'):
+            continue
+        oid = token[1:].decode('ascii')
+        # 紧跟其后的是状态字段，重命名/复制带有两个路径
+        while i < len(tokens) and not tokens[i].strip(b'\n'):
+            i += 1
+        if i >= len(tokens) or tokens[i].startswith(b'\x01'):
+            continue
+        status = tokens[i].strip(b'\n').decode('ascii', 'replace')
+        if status[:1] in ('R', 'C'):
+            old, new = os.fsdecode(tokens[i + 1]), os.fsdecode(tokens[i + 2])
+            i += 3
+        else:
+            old = new = os.fsdecode(tokens[i + 1])
+            i += 2
+        chain.append([oid, status, old, new])
+    return chain
+
+def get_file_lineage(path, rev='HEAD'):
+    """
+    获取文件的沿袭链(跨重命名的提交历史)
+    结果按 (版本提交ID, 路径) 缓存在内存和仓库缓存目录中，
+    同一版本下再次查询不会重新进行重命名检测
+    @param path: str 文件路径(相对于当前目录)
+    @param rev: str 起始版本
+    @return: list [提交ID, 状态, 原路径, 新路径] 列表，从新到旧排列，路径相对于仓库根目录；
+             版本无效时返回 None
+    """
+    result = subprocess.run(['git', 'rev-parse', '--verify', '-q', f'{rev}^{{commit}}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    tip = result.stdout.strip()
+    root = get_repo_root()
+    path = os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/')
+    cache_dir = get_repo_cache_dir(root)
+    cache_file = os.path.join(cache_dir, 'lineage.json') if cache_dir else None
+    cache = _LINEAGE_CACHE.get(cache_dir)
+    if cache is None:
+        cache = {}
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        _LINEAGE_CACHE[cache_dir] = cache
+
+    key = f"{tip}:{path}"
+    if key in cache:
+        cache[key] = cache.pop(key)
+        return cache[key]
+
+    result = subprocess.run(['git', 'log', '--follow', '-M', '--name-status', '-z',
+                             '--format=%x01%H', tip, '--', f':(top){path}'], capture_output=True)
+    chain = parse_lineage(result.stdout)
+    cache[key] = chain
+    while len(cache) > LINEAGE_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    if cache_file:
+        try:
+            write_json_atomic(cache_file, cache)
+        except OSError:
+            pass
+    return chain
+
+def show_file_history(path, patch=False):
+    """
+    显示文件的历史(跨重命名)
+    提交列表来自沿袭缓存，通过 git log --no-walk --stdin 直接显示，不再重复重命名检测
+    @param path: str 文件路径
+    @param patch: bool 是否显示每次提交的改动
+    @return: None
+    """
+    chain = get_file_lineage(path)
+    if chain is None:
+        print_colored("当前没有可用的提交", "yellow")
+        return
+    if not chain:
+        print_colored(f"没有找到文件 {path} 的历史", "yellow")
+        return
+    for oid, status, old, new in chain:
+        if old != new:
+            print_colored(f"{oid[:7]} 重命名: {old} -> {new}", "cyan")
+    commits = ''.join(oid + '\n' for oid, _, _, _ in chain)
+    command = ['log', '--no-walk=unsorted', '--stdin']
+    if patch:
+        paths = sorted({f':(top){p}' for _, _, old, new in chain for p in (old, new)})
+        command += ['-p', '-M', '--'] + paths
+    view_diff(command, f"文件历史: {path}", commits)
+
 def handle_compare():
     """
     处理 Git 比较功能
@@ -2016,35 +6687,39 @@ def handle_compare():
         elif choice == "1":
             branch1 = input("\n请输入第一个分支名: ")
             branch2 = input("请输入第二个分支名: ")
+            print_branch_relation(branch1, branch2)
             print("\n1. 查看文件差异")
             print("2. 只看改动统计")
             print("3. 查看提交差异")
-            sub_choice = input("\n请选择比较方式 (1-3): ")
+            print("4. 按目录汇总改动")
+            sub_choice = input("\n请选择比较方式 (1-4): ")
             if sub_choice == "1":
-                execute_git(['diff', branch1, branch2])
+                view_diff(['diff', branch1, branch2], "比较分支")
             elif sub_choice == "2":
                 execute_git(['diff', '--stat', branch1, branch2])
             elif sub_choice == "3":
                 execute_git(['log', f'{branch1}..{branch2}', '--oneline'])
+            elif sub_choice == "4":
+                show_diff_summary(['diff', branch1, branch2])
         elif choice == "2":
             commit1 = input("\n请输入第一个提交ID: ")
             commit2 = input("请输入第二个提交ID: ")
-            execute_git(['diff', commit1, commit2])
+            view_diff(['diff', commit1, commit2], "比较提交")
         elif choice == "3":
             file = input("\n请输入文件路径(回车比较所有): ")
             if file:
-                execute_git(['diff', file])
+                view_diff(['diff', '--', file], "工作区与暂存区")
             else:
-                execute_git(['diff'])
+                view_diff(['diff'], "工作区与暂存区")
         elif choice == "4":
             file = input("\n请输入文件路径(回车比较所有): ")
             if file:
-                execute_git(['diff', '--cached', file])
+                view_diff(['diff', '--cached', '--', file], "暂存区与最新提交")
             else:
-                execute_git(['diff', '--cached'])
+                view_diff(['diff', '--cached'], "暂存区与最新提交")
         elif choice == "5":
             file = input("\n请输入文件路径: ")
-            execute_git(['log', '-p', file])
+            show_file_history(file, patch=True)
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -2064,39 +6739,50 @@ def handle_alias():
         print("2. 添加别名")
         print("3. 删除别名")
         print("4. 常用别名推荐")
+        print("5. 从文件导入别名")
+        print("6. 导出别名到文件")
         print("\n0. 返回主菜单")
 
-        choice = input("\n请选择 (0-4): ")
+        choice = input("\n请选择 (0-6): ")
 
         if choice == "0":
             return
         elif choice == "1":
-            execute_git(['config', '--global', '--get-regexp', '^alias\.'])
+            print_aliases()
         elif choice == "2":
-            alias = input("\n请输入别名(不含 alias.): ")
-            command = input("请输入对应的Git命令: ")
-            execute_git(['config', '--global', f'alias.{alias}', command])
-            print_colored(f"\n已添加别名: git {alias} => git {command}", "green")
+            alias = input("\n请输入别名(不含 alias.): ").strip()
+            command = input("请输入对应的Git命令: ").strip()
+            if not alias or not command:
+                print_colored("别名和命令不能为空", "yellow")
+            elif update_aliases(add={alias: command}):
+                print_colored(f"\n已添加别名: git {alias} => git {command}", "green")
         elif choice == "3":
-            alias = input("\n请输入要删除的别名(不含 alias.): ")
-            execute_git(['config', '--global', '--unset', f'alias.{alias}'])
-            print_colored(f"\n已删除别名: {alias}", "green")
+            alias = input("\n请输入要删除的别名(不含 alias.): ").strip()
+            if alias and update_aliases(remove=[alias]):
+                print_colored(f"\n已删除别名: {alias}", "green")
         elif choice == "4":
             print("\n推荐的常用别名:")
-            aliases = {
-                'st': 'status',
-                'co': 'checkout',
-                'br': 'branch',
-                'ci': 'commit',
-                'unstage': 'reset HEAD --',
-                'last': 'log -1 HEAD',
-                'lg': 'log --color --graph --pretty=format:"%Cred%h%Creset -%C(yellow)%d%Creset %s %Cgreen(%cr) %C(bold blue)<%an>%Creset" --abbrev-commit'
-            }
-            for alias, cmd in aliases.items():
+            existing = git_config_get_prefix('alias.')
+            selected = {}
+            add_all = input("是否添加全部推荐别名？(y/N): ").lower() == 'y'
+            for alias, cmd in RECOMMENDED_ALIASES.items():
                 print(f"git {alias} => git {cmd}")
-                if input("\n是否添加此别名？(y/N): ").lower() == 'y':
-                    execute_git(['config', '--global', f'alias.{alias}', cmd])
-                    print_colored("已添加", "green")
+                if alias in existing:
+                    print_colored("已存在，跳过", "yellow")
+                elif add_all or input("\n是否添加此别名？(y/N): ").lower() == 'y':
+                    selected[alias] = cmd
+            if selected and update_aliases(add=selected):
+                print_colored(f"\n已添加 {len(selected)} 个别名", "green")
+        elif choice == "5":
+            path = os.path.expanduser(input("\n请输入别名文件路径: ").strip())
+            count = import_aliases(path) if path else -1
+            if count >= 0:
+                print_colored(f"\n已导入 {count} 个别名", "green")
+        elif choice == "6":
+            path = os.path.expanduser(input("\n请输入导出文件路径: ").strip())
+            count = export_aliases(path) if path else -1
+            if count >= 0:
+                print_colored(f"\n已导出 {count} 个别名到 {path}", "green")
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -2146,9 +6832,12 @@ def handle_maintenance():
         print("2. 压缩仓库          (git gc)")
         print("3. 文件系统检查      (git fsck)")
         print("4. 引用完整性检查    (git prune)")
+        print("5. 子模块管理        (git submodule)")
+        print("6. 稀疏检出管理      (git sparse-checkout)")
+        print("7. 更新提交图        (git commit-graph)")
         print("\n0. 返回主菜单")
 
-        choice = input("\n请选择 (0-4): ")
+        choice = input("\n请选择 (0-7): ")
 
         if choice == "0":
             return
@@ -2160,6 +6849,387 @@ def handle_maintenance():
             execute_git(['fsck'])
         elif choice == "4":
             execute_git(['prune', '-v'])
+        elif choice == "5":
+            handle_submodule()
+            continue
+        elif choice == "6":
+            handle_sparse_checkout()
+            continue
+        elif choice == "7":
+            # 分层增量写入，只为新提交生成新图层
+            execute_git(['commit-graph', 'write', '--reachable', '--split'])
+        else:
+            print_colored("无效的选择", "yellow")
+            continue
+
+        input("\n按回车键继续...")
+
+BLAME_IGNORE_FILE = '.git-blame-ignore-revs'
+
+def get_blame_ignore_file(root, existing=True):
+    """
+    获取追溯时使用的忽略提交文件
+    已配置 blame.ignoreRevsFile 时使用配置的文件(相对路径以仓库根目录为准)，否则使用仓库根目录的 .git-blame-ignore-revs
+    @param root: str 仓库根目录
+    @param existing: bool 为 True 时文件不存在返回 None
+    @return: str 忽略提交文件路径
+    """
+    configured = git_config_get('blame.ignorerevsfile')
+    path = os.path.join(root, os.path.expanduser(configured) if configured else BLAME_IGNORE_FILE)
+    return path if not existing or os.path.isfile(path) else None
+
+def resolve_blame_target(path, rev='HEAD'):
+    """
+    解析追溯目标的提交ID和文件对象ID
+    @param path: str 文件路径(相对于当前目录)
+    @param rev: str 版本
+    @return: tuple (提交ID, 文件对象ID)，无法解析时返回 None
+    """
+    result = subprocess.run(['git', 'rev-parse', f'{rev}^{{commit}}', f'{rev}:./{path}'],
+                            capture_output=True, text=True)
+    oids = result.stdout.split()
+    if result.returncode != 0 or len(oids) != 2:
+        return None
+    return oids[0], oids[1]
+
+def parse_blame_incremental(lines, blame):
+    """
+    解析 git blame --incremental 的输出并写入追溯结果
+    @param lines: iterable 输出行(bytes)
+    @param blame: dict 追溯结果，包含 commits、index、owners、ranges、resolved
+    @return: None
+    """
+    current = None
+    for raw in lines:
+        line = raw.rstrip(b'\n').decode('utf-8', 'replace')
+        if current is None:
+            fields = line.split(' ')
+            if len(fields) != 4:
+                continue
+            oid = fields[0]
+            start, count = int(fields[2]) - 1, int(fields[3])
+            if oid not in blame['index']:
+                blame['index'][oid] = len(blame['commits'])
+                blame['commits'].append([oid, '', 0, ''])
+            current = blame['index'][oid]
+            owners = blame['owners']
+            for i in range(start, min(start + count, len(owners))):
+                owners[i] = current
+            blame['ranges'].append([current, start, count])
+            blame['resolved'] += count
+            continue
+        key, _, value = line.partition(' ')
+        info = blame['commits'][current]
+        if key == 'author':
+            info[1] = value
+        elif key == 'author-time':
+            info[2] = int(value)
+        elif key == 'summary':
+            info[3] = value
+        elif key == 'filename':
+            current = None
+
+def new_blame_result(line_count):
+    """
+    创建空的追溯结果
+    @param line_count: int 文件行数
+    @return: dict 追溯结果
+    """
+    import array
+    return {
+        'commits': [],
+        'index': {},
+        'owners': array.array('i', [-1]) * line_count,
+        'ranges': [],
+        'resolved': 0,
+        'done': False,
+    }
+
+def load_blame_cache(cache_file, line_count):
+    """
+    从缓存文件恢复追溯结果
+    @param cache_file: str 缓存文件路径
+    @param line_count: int 文件行数
+    @return: dict 追溯结果，缓存不存在或无效时返回 None
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    blame = new_blame_result(line_count)
+    try:
+        blame['commits'] = data['commits']
+        blame['index'] = {info[0]: i for i, info in enumerate(data['commits'])}
+        for index, start, count in data['ranges']:
+            for i in range(start, min(start + count, line_count)):
+                blame['owners'][i] = index
+            blame['resolved'] += count
+        blame['ranges'] = data['ranges']
+    except (KeyError, TypeError, ValueError, IndexError):
+        return None
+    blame['done'] = True
+    return blame
+
+def start_blame(path, rev='HEAD', use_ignore_revs=True):
+    """
+    开始追溯文件：命中缓存时直接返回完整结果，
+    否则启动 git blame --incremental 并在后台线程中逐段解析
+    缓存按 (提交ID, 文件对象ID, 忽略提交文件内容, 路径) 区分，保存在仓库缓存目录
+    @param path: str 文件路径(相对于当前目录)
+    @param rev: str 版本
+    @param use_ignore_revs: bool 是否使用忽略提交文件
+    @return: dict 追溯状态(含文件内容 text 和结果 blame)，无法解析时返回 None
+    """
+    import hashlib
+    target = resolve_blame_target(path, rev)
+    if target is None:
+        return None
+    commit, blob = target
+    text = subprocess.run(['git', 'cat-file', 'blob', blob], capture_output=True).stdout
+    # git blame 只按 \n 分行，不能用 splitlines (它还会在 \r、\f 等字符处分行)
+    lines = text.split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    lines = [line.decode('utf-8', 'replace') for line in lines]
+
+    root = get_repo_root()
+    ignore_file = get_blame_ignore_file(root) if use_ignore_revs else None
+    key = hashlib.sha1(f"{commit}:{blob}:{path}".encode('utf-8'))
+    if ignore_file:
+        with open(ignore_file, 'rb') as f:
+            key.update(f.read())
+    if not use_ignore_revs:
+        key.update(b':no-ignore')
+    cache_file = os.path.join(get_repo_cache_dir(root), 'blame', key.hexdigest() + '.json')
+
+    state = {'path': path, 'commit': commit, 'lines': lines, 'cache_file': cache_file,
+             'proc': None, 'error': ''}
+    state['blame'] = load_blame_cache(cache_file, len(lines))
+    if state['blame'] is not None:
+        return state
+
+    blame = state['blame'] = new_blame_result(len(lines))
+    command = ['git', 'blame', '--incremental']
+    if ignore_file:
+        command += ['--ignore-revs-file', ignore_file]
+    elif not use_ignore_revs:
+        command += ['--ignore-revs-file', '']
+    command += [commit, '--', path]
+    proc = state['proc'] = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def reader():
+        parse_blame_incremental(proc.stdout, blame)
+        state['error'] = proc.stderr.read().decode('utf-8', 'replace').strip()
+        proc.wait()
+        if proc.returncode == 0:
+            try:
+                write_json_atomic(cache_file, {'commits': blame['commits'], 'ranges': blame['ranges']})
+            except OSError:
+                pass
+        blame['done'] = True
+
+    state['thread'] = threading.Thread(target=reader, daemon=True)
+    state['thread'].start()
+    return state
+
+def stop_blame(state):
+    """
+    结束仍在运行的追溯进程
+    @param state: dict 追溯状态
+    @return: None
+    """
+    proc = state.get('proc')
+    if proc is not None and proc.poll() is None:
+        proc.kill()
+    if state.get('thread') is not None:
+        state['thread'].join(1)
+
+def format_blame_line(state, index, width=None):
+    """
+    格式化一行追溯结果，尚未解析的行只显示行号和内容
+    @param state: dict 追溯状态
+    @param index: int 行号(从 0 开始)
+    @param width: int 最大显示宽度(可选)
+    @return: str 显示文本
+    """
+    owner = state['blame']['owners'][index]
+    if owner < 0:
+        prefix = " " * 8 + " " + " " * 12 + " " + " " * 10
+    else:
+        oid, author, when, _ = state['blame']['commits'][owner]
+        author = author[:12]
+        author += " " * (12 - display_width(author))
+        date = time.strftime('%Y-%m-%d', time.localtime(when)) if when else " " * 10
+        prefix = f"{oid[:8]} {author} {date}"
+    text = f"{prefix} {index + 1:>5}│ {state['lines'][index].expandtabs(4)}"
+    return text[:width] if width else text
+
+def render_blame(state, top):
+    """
+    绘制追溯界面当前页
+    @param state: dict 追溯状态
+    @param top: int 首行行号
+    @return: None
+    """
+    width, height = shutil.get_terminal_size((80, 24))
+    rows = max(height - 2, 3)
+    blame = state['blame']
+    total = len(state['lines'])
+    lines = [f"\033[7m 代码追溯: {state['path']} @ {state['commit'][:8]}\033[0m"]
+    for index in range(top, min(top + rows, total)):
+        line = format_blame_line(state, index, width)
+        lines.append(line if blame['owners'][index] >= 0 else f"\033[90m{line}\033[0m")
+    lines += [""] * (rows + 1 - len(lines))
+    status = "" if blame['done'] else f" 解析中 {min(blame['resolved'], total)}/{total}"
+    lines.append(f"行 {min(top + 1, total)}-{min(top + rows, total)}/{total}{status}  ↑↓/PgUp/PgDn 滚动  q 退出")
+    sys.stdout.write("\033[H" + "\033[K\n".join(lines) + "\033[K\033[J")
+    sys.stdout.flush()
+
+def view_blame(path, rev='HEAD', use_ignore_revs=True):
+    """
+    显示文件的逐行追溯，结果解析到哪一行就先显示哪一行
+    @param path: str 文件路径
+    @param rev: str 版本
+    @param use_ignore_revs: bool 是否使用忽略提交文件
+    @return: bool 是否成功
+    """
+    state = start_blame(path, rev, use_ignore_revs)
+    if state is None:
+        print_colored(f"无法在 {rev} 中找到文件 {path}", "red")
+        return False
+    blame = state['blame']
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        if state.get('thread') is not None:
+            state['thread'].join()
+        with buffered_output():
+            for index in range(len(state['lines'])):
+                echo(format_blame_line(state, index))
+        if state['error']:
+            print_colored(state['error'], "red")
+        return not state['error']
+
+    top = 0
+    try:
+        with raw_key_session():
+            while True:
+                render_blame(state, top)
+                # 解析未完成时定时重绘，已解析的行会陆续显示作者信息
+                while not blame['done'] and not key_pending(0.1):
+                    render_blame(state, top)
+                if blame['done'] and not key_pending(0):
+                    render_blame(state, top)
+                key = read_key()
+                rows = max(shutil.get_terminal_size((80, 24))[1] - 2, 3)
+                last = max(len(state['lines']) - rows, 0)
+                if key in ('q', 'esc', 'ctrl-c'):
+                    break
+                elif key in ('down', 'j', 'enter'):
+                    top = min(top + 1, last)
+                elif key in ('up', 'k'):
+                    top = max(top - 1, 0)
+                elif key in ('pgdn', 'space'):
+                    top = min(top + rows, last)
+                elif key in ('pgup', 'b'):
+                    top = max(top - rows, 0)
+                elif key in ('home', 'g'):
+                    top = 0
+                elif key in ('end', 'G'):
+                    top = last
+    finally:
+        stop_blame(state)
+    if state['error']:
+        print_colored(state['error'], "red")
+    return not state['error']
+
+def choose_lineage_version(path):
+    """
+    从文件沿袭链中选择一个历史版本
+    @param path: str 文件路径
+    @return: tuple (提交ID, 该版本中的路径)，取消时返回 None
+    """
+    chain = get_file_lineage(path)
+    if not chain:
+        print_colored(f"没有找到文件 {path} 的历史", "yellow")
+        return None
+    shown = chain[:30]
+    for i, (oid, status, old, new) in enumerate(shown, 1):
+        rename = f"  ({old} -> {new})" if old != new else ""
+        print(f"{i}. {oid[:8]} {status[0]} {new}{rename}")
+    if len(chain) > len(shown):
+        print(f"... 共 {len(chain)} 个版本，可直接输入提交ID")
+    choice = input("\n请选择版本序号或输入提交ID: ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(shown):
+        oid, status, _, new = shown[int(choice) - 1]
+    else:
+        match = [entry for entry in chain if choice and entry[0].startswith(choice)]
+        if not match:
+            print_colored("无效的选择", "yellow")
+            return None
+        oid, status, _, new = match[0]
+    if status.startswith('D'):
+        print_colored("该版本中文件已被删除", "yellow")
+        return None
+    root = get_repo_root()
+    return oid, os.path.relpath(os.path.join(root, new))
+
+def handle_blame():
+    """
+    处理代码追溯
+    @return: None
+    """
+    while True:
+        root = get_repo_root()
+        ignore_file = get_blame_ignore_file(root) if root else None
+        print("\n" + "="*40)
+        print_colored("代码追溯", "cyan")
+        print("="*40)
+        print("1. 追溯文件       (git blame)")
+        print("2. 追溯历史版本   (跨重命名选择版本)")
+        print("3. 忽略指定提交   (.git-blame-ignore-revs)")
+        print("4. 不忽略任何提交追溯文件")
+        if ignore_file:
+            print(f"\n当前使用忽略列表: {os.path.relpath(ignore_file)}")
+        print("\n0. 返回上级菜单")
+
+        choice = input("\n请选择 (0-4): ")
+
+        if choice == "0":
+            return
+        elif choice == "1":
+            path = input("\n请输入文件路径: ").strip()
+            if path:
+                view_blame(path)
+        elif choice == "2":
+            path = input("\n请输入文件路径: ").strip()
+            version = choose_lineage_version(path) if path else None
+            if version:
+                view_blame(version[1], version[0])
+        elif choice == "3":
+            commit = input("\n请输入要忽略的提交(如格式化提交): ").strip()
+            result = subprocess.run(['git', 'rev-parse', '--verify', '-q', f'{commit}^{{commit}}'],
+                                    capture_output=True, text=True)
+            if root is None:
+                print_colored("当前目录不是 Git 仓库", "red")
+            elif not commit or result.returncode != 0:
+                print_colored("无效的提交", "red")
+            else:
+                oid = result.stdout.strip()
+                reason = input("请输入忽略原因(可选): ").strip()
+                target = get_blame_ignore_file(root, existing=False)
+                try:
+                    with open(target, 'a', encoding='utf-8') as f:
+                        if reason:
+                            f.write(f"# {reason}\n")
+                        f.write(oid + "\n")
+                except OSError as e:
+                    print_colored(f"无法写入忽略列表: {e}", "red")
+                else:
+                    print_colored(f"\n已将 {oid[:8]} 加入 {os.path.relpath(target)}", "green")
+        elif choice == "4":
+            path = input("\n请输入文件路径: ").strip()
+            if path:
+                view_blame(path, use_ignore_revs=False)
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -2178,9 +7248,10 @@ def handle_analysis():
         print("1. 统计分析    (git stats)")
         print("2. 仓库搜索    (git search)")
         print("3. 版本比较    (git diff)")
+        print("4. 代码追溯    (git blame)")
         print("\n0. 返回主菜单")
 
-        choice = input("\n请选择 (0-3): ")
+        choice = input("\n请选择 (0-4): ")
 
         if choice == "0":
             return
@@ -2190,6 +7261,8 @@ def handle_analysis():
             handle_search()
         elif choice == "3":
             handle_compare()
+        elif choice == "4":
+            handle_blame()
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -2208,9 +7281,10 @@ def handle_settings_menu():
         print("1. Git配置     (git config)")
         print("2. 别名管理    (git alias)")
         print("3. 工具设置")
+        print("4. 自定义菜单")
         print("\n0. 返回主菜单")
 
-        choice = input("\n请选择 (0-3): ")
+        choice = input("\n请选择 (0-4): ")
 
         if choice == "0":
             return
@@ -2220,6 +7294,9 @@ def handle_settings_menu():
             handle_alias()
         elif choice == "3":
             handle_settings()
+        elif choice == "4":
+            handle_custom_menu()
+            continue
         else:
             print_colored("无效的选择", "yellow")
             continue
@@ -2259,7 +7336,7 @@ def handle_reset():
                 if confirm_action("确定要执行混合重置吗？这将清空暂存区但保留工作区的修改"):
                     execute_git(['reset', '--mixed', commit])
             elif choice == "3":
-                if confirm_action("警告：硬重置将丢失所有未提交的修改！确定要继续吗？"):
+                if confirm_action("警告：硬重置将丢失所有未提交的修改！确定要继续吗？", 'confirm_dangerous'):
                     execute_git(['reset', '--hard', commit])
         else:
             print_colored("无效的选择", "yellow")
@@ -2267,76 +7344,67 @@ def handle_reset():
 
         input("\n按回车键继续...")
 
+# 主菜单注册表: (编号, 名称, 命令说明, 处理函数, 分类)
+# 分类为 None 的是不在菜单中显示的快捷键，处理函数为 None 表示退出
+MENU_REGISTRY = [
+    ("1", "仓库状态", "git status/init/clone", handle_status, "常用操作"),
+    ("2", "暂存更改", "git add", handle_add, "常用操作"),
+    ("3", "提交更改", "git commit", handle_commit, "常用操作"),
+    ("4", "历史查看", "git log", handle_log, "常用操作"),
+    ("5", "推送更改", "git push", handle_push, "常用操作"),
+    ("6", "拉取更新", "git pull", handle_pull, "常用操作"),
+    ("7", "分支管理", "git branch", handle_branch, "分支操作"),
+    ("8", "切换分支", "git checkout", handle_checkout, "分支操作"),
+    ("9", "合并分支", "git merge", handle_merge, "分支操作"),
+    ("10", "变基操作", "git rebase", handle_rebase, "分支操作"),
+    ("11", "远程配置", "git remote", handle_remote, "远程操作"),
+    ("12", "标签管理", "git tag", handle_tag, "远程操作"),
+    ("13", "储藏操作", "git stash", handle_stash, "高级操作"),
+    ("14", "版本管理", "reset/revert/restore", handle_version, "高级操作"),
+    ("15", "仓库维护", "clean/gc", handle_maintenance, "高级操作"),
+    ("16", "分析工具", "stats/search/diff", handle_analysis, "高级操作"),
+    ("17", "配置管理", "config/alias", handle_settings_menu, "高级操作"),
+    ("h", "显示帮助", "", show_help, "其他选项"),
+    ("0", "退出程序", "", None, "其他选项"),
+    ("s", "统计分析", "git stats", handle_stats, None),
+    ("t", "仓库搜索", "git search", handle_search, None),
+    ("c", "版本比较", "git diff", handle_compare, None),
+    ("a", "别名管理", "git alias", handle_alias, None),
+]
+
+MAIN_MENU_HANDLERS = {item[0]: item[3] for item in MENU_REGISTRY}
+
 def main():
     """
     主函数
     @return: None
     """
+    if len(sys.argv) > 1:
+        args = parse_args()
+        if args.daemon:
+            sys.exit(handle_daemon_command(args.daemon))
+        if args.call:
+            sys.exit(handle_call_command(args.call, args.command))
+        if args.json:
+            sys.exit(handle_json_command(args.json, args.command, args.limit))
     try:
+        load_config()
         while True:
-            show_menu()
+            items, handlers, name = get_active_menu()
+            show_menu(items, name)
             choice = input("\n请输入选项: ").lower()
             
-            if choice == '0':
-                print_colored("\n感谢使用，再见！", "green")
-                break
-            
-            os.system('cls' if os.name == 'nt' else 'clear')
-            
-            # 处理选项
-            if choice == "1":
-                handle_status()
-            elif choice == "2":
-                handle_add()
-            elif choice == "3":
-                handle_commit()
-            elif choice == "4":
-                handle_log()
-            elif choice == "5":
-                handle_push()
-            elif choice == "6":
-                handle_pull()
-            elif choice == "7":
-                handle_branch()
-            elif choice == "8":
-                handle_checkout()
-            elif choice == "9":
-                handle_merge()
-            elif choice == "10":
-                handle_rebase()
-            elif choice == "11":
-                handle_remote()
-            elif choice == "12":
-                handle_tag()
-            elif choice == "13":
-                handle_stash()
-            elif choice == "14":
-                handle_version()
-            elif choice == "15":
-                handle_maintenance()
-            elif choice == "16":
-                handle_analysis()
-            elif choice == "17":
-                handle_settings_menu()
-            elif choice == "h":
-                show_help()
-            elif choice == "s":
-                handle_stats()
-            elif choice == "t":
-                handle_search()
-            elif choice == "c":
-                handle_compare()
-            elif choice == "a":
-                handle_alias()
-            else:
+            if choice not in handlers:
                 print_colored("无效的选择", "yellow")
                 continue
+            handler = handlers[choice]
+            if handler is None:
+                print_colored("\n感谢使用，再见！", "green")
+                break
             
-            # 只在需要时显示继续提示
-            if choice not in ['0', 'h', 's', 't', 'c', 'a', '16', '17', '18', '19', '20'] and not choice.isdigit():
-                input("\n按回车键继续...")
-            
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clear_screen()
+            handler()
+            clear_screen()
             
     except KeyboardInterrupt:
         print_colored("\n\n正在退出...", "yellow")
@@ -2,6 +2,7 @@
 import sys
 import os
 import datetime
+import contextlib
 
 def log_to_file(msg, level="INFO"):
     """
@@ -15,6 +16,24 @@ def log_to_file(msg, level="INFO"):
         f.write(f"[{timestamp}] [{level}] {msg}\n")
         f.flush()
 
+@contextlib.contextmanager
+def make_temp_repo(init=True):
+    """
+    创建供行为测试使用的临时仓库，退出时删除
+    @param init: bool 是否在临时目录中初始化仓库(默认分支为 main)
+    @return: contextmanager 产出 (临时目录, git 命令函数)；
+             git(*args, cwd=临时目录, text=True, **环境变量) 以测试身份执行 git
+    """
+    import subprocess
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        def git(*args, cwd=tmp, text=True, **env):
+            return subprocess.run(['git', '-C', cwd, '-c', 'user.name=Tester', '-c', 'user.email=t@t'] + list(args),
+                                  capture_output=True, text=text, env=dict(os.environ, **env) if env else None)
+        if init:
+            git('init', '-q', '-b', 'main')
+        yield tmp, git
+
 def test_basic_functions():
     """
     测试基本功能函数
@@ -129,6 +148,1069 @@ def test_helper_functions():
     }
     return test_functions("辅助功能", functions)
 
+def test_picker_functions():
+    """
+    测试文件选择器相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "iter_git_records": "NUL 分隔记录读取",
+        "iter_status_entries": "状态流解析",
+        "read_key": "读取按键",
+        "raw_key_session": "逐键读取终端会话",
+        "filter_picker_items": "增量筛选",
+        "render_picker": "虚拟滚动渲染",
+        "pick_files": "文件选择器",
+        "apply_to_paths": "批量执行"
+    }
+    return test_functions("文件选择器功能", functions)
+
+def test_status_entries():
+    """
+    使用临时仓库测试状态流解析，包括工作区一侧的重命名条目
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试状态流解析...", "TEST")
+    with make_temp_repo() as (tmp, git):
+        with open(os.path.join(tmp, 'a.txt'), 'w') as f:
+            f.write('line\n' * 50)
+        git('add', 'a.txt')
+        git('commit', '-qm', 'first')
+        # intent-to-add 后的重命名显示为 " R"，后面同样跟着原路径字段
+        os.rename(os.path.join(tmp, 'a.txt'), os.path.join(tmp, 'b.txt'))
+        git('add', '-N', 'b.txt')
+        with open(os.path.join(tmp, 'c.txt'), 'w') as f:
+            f.write('new\n')
+        entries = list(EzGit.iter_status_entries(cwd=tmp))
+        records = list(EzGit.iter_git_records(['git', 'log', '-z', '--format=%s'], tmp))
+
+    if records != [b'first']:
+        log_to_file(f"NUL 分隔记录读取错误: {records}", "ERROR")
+        return False
+    if entries != [(' R', 'b.txt', 'a.txt'), ('??', 'c.txt', None)]:
+        log_to_file(f"状态解析结果错误: {entries}", "ERROR")
+        return False
+    log_to_file("状态流解析测试结果: 通过", "INFO")
+    return True
+
+def test_clone_functions():
+    """
+    使用本地裸仓库测试克隆预设与并发克隆
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试克隆功能...", "TEST")
+    with make_temp_repo(init=False) as (tmp, git):
+        src = os.path.join(tmp, 'src')
+        bare = os.path.join(tmp, 'bare.git')
+        os.makedirs(os.path.join(src, 'sub'))
+        with open(os.path.join(src, 'sub', 'a.txt'), 'w') as f:
+            f.write('a\n')
+        with open(os.path.join(src, 'top.txt'), 'w') as f:
+            f.write('top\n')
+        git('init', '-q', '-b', 'main', src)
+        git('add', '.', cwd=src)
+        git('commit', '-qm', 'init', cwd=src)
+        git('clone', '-q', '--bare', src, bare)
+        git('config', 'uploadpack.allowFilter', 'true', cwd=bare)
+        url = 'file://' + bare.replace(os.sep, '/')
+
+        quiet = lambda text, is_progress: None
+        cases = {
+            'full': ({}, True),
+            'blobless': ({'filter': 'blob:none'}, True),
+            'shallow': ({'depth': 1}, True),
+            'sparse': ({'filter': 'blob:none', 'sparse': True}, False),
+        }
+        passed = True
+        for name, (options, has_sub) in cases.items():
+            dest = os.path.join(tmp, name)
+            ok = EzGit.clone_repository(url, dest, options, 0, quiet)
+            ok = ok and os.path.exists(os.path.join(dest, 'top.txt'))
+            ok = ok and os.path.exists(os.path.join(dest, 'sub', 'a.txt')) == has_sub
+            log_to_file(f"[{'√' if ok else '×'}] 克隆预设: {name}", "INFO" if ok else "WARN")
+            passed = passed and ok
+
+        jobs = [(url, os.path.join(tmp, 'm1')), (url, os.path.join(tmp, 'm2'))]
+        results = EzGit.clone_many(jobs, {}, 2, 0)
+        ok = all(result[2] for result in results)
+        log_to_file(f"[{'√' if ok else '×'}] 并发克隆", "INFO" if ok else "WARN")
+        passed = passed and ok
+
+        # 重新拉取失败时不能留下 promisor 配置，成功后才设置
+        full = os.path.join(tmp, 'full')
+        cwd = os.getcwd()
+        os.chdir(full)
+        try:
+            git('remote', 'set-url', 'origin', os.path.join(tmp, 'missing.git'), cwd=full)
+            failed = EzGit.convert_to_partial_clone('origin')
+            leftover = git('config', '--get-regexp', r'remote\.origin\.(promisor|partialclonefilter)', cwd=full).stdout
+            git('remote', 'set-url', 'origin', url, cwd=full)
+            converted = EzGit.convert_to_partial_clone('origin')
+            promisor = git('config', 'remote.origin.promisor', cwd=full).stdout.strip()
+        finally:
+            os.chdir(cwd)
+        ok = not failed and not leftover and converted and promisor == 'true'
+        log_to_file(f"[{'√' if ok else '×'}] 转换为部分克隆", "INFO" if ok else "WARN")
+        passed = passed and ok
+
+    log_to_file(f"克隆功能测试结果: {'通过' if passed else '失败'}", "INFO")
+    return passed
+
+def test_sparse_functions():
+    """
+    测试稀疏检出相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "handle_sparse_checkout": "稀疏检出管理",
+        "get_sparse_state": "读取稀疏检出状态",
+        "measure_worktree": "统计检出文件",
+        "set_sparse_patterns": "设置检出规则",
+        "convert_to_partial_clone": "转换为部分克隆"
+    }
+    return test_functions("稀疏检出功能", functions)
+
+def test_submodule_functions():
+    """
+    测试子模块相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "handle_submodule": "子模块管理",
+        "list_submodules": "列出子模块",
+        "update_submodules": "并发更新子模块",
+        "fetch_submodules": "并发拉取子模块",
+        "foreach_submodules": "并发执行命令",
+        "remove_submodule": "删除子模块"
+    }
+    return test_functions("子模块功能", functions)
+
+def test_commit_picker():
+    """
+    测试提交选择器的序号和缩写ID解析
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试提交选择器...", "TEST")
+    rows = [
+        ("abcd1234" + "0" * 32, "fix deadbeef handling"),
+        ("abcd5678" + "0" * 32, "second"),
+        ("deadbeef" + "1" * 32, "third"),
+    ]
+    picker = EzGit.build_commit_picker(rows)
+    checks = [
+        ("序号解析", EzGit.get_commit_by_index(picker, "2") == rows[1][0]),
+        ("唯一前缀", EzGit.get_commit_by_index(picker, "abcd12") == rows[0][0]),
+        ("大写前缀", EzGit.get_commit_by_index(picker, "DEADBEEF") == rows[2][0]),
+        ("完整ID", EzGit.get_commit_by_index(picker, rows[1][0]) == rows[1][0]),
+        ("歧义前缀", EzGit.get_commit_by_index(picker, "abcd") is None),
+        ("不匹配说明文字", EzGit.get_commit_by_index(picker, "handling") is None),
+        ("最短唯一缩写", picker['short'][rows[0][0]] == "abcd123"),
+    ]
+    passed = True
+    for name, ok in checks:
+        log_to_file(f"[{'√' if ok else '×'}] {name}", "INFO" if ok else "WARN")
+        passed = passed and ok
+    log_to_file(f"提交选择器测试结果: {'通过' if passed else '失败'}", "INFO")
+    return passed
+
+def test_startup_time():
+    """
+    测试启动开销：用 python -X importtime 测量导入 EzGit 的耗时，
+    并确认重量级模块没有在启动时被导入
+    @return: bool 测试是否通过
+    """
+    import subprocess
+
+    budget_ms = 20
+    log_to_file("\n开始测试启动耗时...", "TEST")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    env = os.environ.copy()
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    # 先导入一次生成字节码缓存，与日常使用时的状态一致
+    subprocess.run([sys.executable, '-c', 'import EzGit'], cwd=cwd, env=env)
+
+    timings = []
+    for _ in range(3):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import EzGit'],
+                                cwd=cwd, env=env, capture_output=True, text=True)
+        for line in result.stderr.splitlines():
+            parts = [part.strip() for part in line.split('|')]
+            if len(parts) == 3 and parts[2] == 'EzGit':
+                timings.append(int(parts[1]) / 1000.0)
+    if not timings:
+        log_to_file("[×] 无法获取导入耗时", "ERROR")
+        return False
+    elapsed = min(timings)
+    passed = elapsed <= budget_ms
+    log_to_file(f"[{'√' if passed else '×'}] 导入耗时 {elapsed:.1f}ms (预算 {budget_ms}ms)",
+                "INFO" if passed else "ERROR")
+
+    heavy = ['argparse', 'json', 'logging', 'shutil', 'subprocess', 'threading']
+    check = "import sys, EzGit; print(' '.join(m for m in %r if m in sys.modules))" % heavy
+    result = subprocess.run([sys.executable, '-c', check], cwd=cwd, env=env,
+                            capture_output=True, text=True)
+    loaded = result.stdout.split()
+    if loaded or result.returncode != 0:
+        log_to_file(f"[×] 启动时导入了重量级模块: {' '.join(loaded) or result.stderr}", "ERROR")
+        passed = False
+    else:
+        log_to_file("[√] 启动时未导入重量级模块")
+
+    log_to_file(f"启动耗时测试结果: {'通过' if passed else '失败'}", "INFO")
+    return passed
+
+def test_menu_functions():
+    """
+    测试菜单注册与渲染相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "render_menu_frame": "渲染菜单画面",
+        "display_width": "计算显示宽度",
+        "clear_screen": "清屏"
+    }
+    return test_functions("菜单功能", functions)
+
+def test_custom_menu_functions():
+    """
+    测试自定义菜单相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "handle_custom_menu": "自定义菜单设置",
+        "load_custom_menu": "加载菜单配置",
+        "save_custom_menu": "保存菜单配置",
+        "validate_menu_config": "校验菜单配置",
+        "get_active_menu": "当前生效菜单",
+        "run_custom_command": "执行自定义命令"
+    }
+    return test_functions("自定义菜单功能", functions)
+
+def test_config_service_functions():
+    """
+    测试配置服务相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "load_config": "加载配置",
+        "save_config": "保存配置",
+        "get_setting": "读取设置",
+        "set_setting": "修改设置",
+        "edit_settings": "编辑设置"
+    }
+    return test_functions("配置服务功能", functions)
+
+def test_git_config_functions():
+    """
+    测试 Git 配置快照与别名批量读写功能
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "get_git_config_snapshot": "配置快照",
+        "git_config_get": "读取配置",
+        "set_git_config": "批量写入配置",
+        "update_aliases": "批量更新别名",
+        "import_aliases": "导入别名",
+        "export_aliases": "导出别名"
+    }
+    if not test_functions("Git配置功能", functions):
+        return False
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+    data = "global\0file:/a\0alias.st\nstatus\0local\0file:.git/config\0core.bare\0"
+    entries = EzGit.parse_config_list(data, 2)
+    expected = [("global", "file:/a", "alias.st", "status"),
+                ("local", "file:.git/config", "core.bare", None)]
+    if entries != expected:
+        log_to_file(f"配置解析结果错误: {entries}", "ERROR")
+        return False
+
+    # 写入必须落在作用域自己的配置文件里，git config --global 等命令才能直接读到
+    cwd = os.getcwd()
+    saved_home = os.environ.get('HOME')
+    with make_temp_repo() as (tmp, git), make_temp_repo(init=False) as (home, _):
+        os.environ['HOME'] = home
+        os.chdir(tmp)
+        try:
+            EzGit.invalidate_git_config()
+            git('config', '--local', 'alias.zz', 'status')
+            written = EzGit.set_git_config({'user.name': 'EzTester'}) and EzGit.set_git_config({'core.Editor': 'vi'}, 'local')
+            added = EzGit.update_aliases(add={'st': 'status'})
+            removed = EzGit.update_aliases(remove=['zz'])
+            name = git('config', '--global', 'user.name').stdout.strip()
+            editor = git('config', '--local', 'core.editor').stdout.strip()
+            alias = git('config', '--global', 'alias.st').stdout.strip()
+            leftover = git('config', '--get-all', 'alias.zz').stdout
+            includes = git('config', '--get-all', 'include.path').stdout
+        finally:
+            os.chdir(cwd)
+            if saved_home is None:
+                os.environ.pop('HOME', None)
+            else:
+                os.environ['HOME'] = saved_home
+            EzGit.invalidate_git_config()
+    if not (written and added and removed) or (name, editor, alias) != ('EzTester', 'vi', 'status') or leftover or includes:
+        log_to_file(f"配置写入结果错误: {written}, {added}, {removed}, {name}, {editor}, {alias}, {includes}", "ERROR")
+        return False
+    log_to_file("配置解析测试结果: 通过", "INFO")
+    return True
+
+def test_daemon_functions():
+    """
+    测试守护进程相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "serve_daemon": "运行守护进程",
+        "start_daemon": "启动守护进程",
+        "stop_daemon": "停止守护进程",
+        "daemon_request": "守护进程请求",
+        "handle_daemon_request": "处理守护进程请求"
+    }
+    if not test_functions("守护进程功能", functions):
+        return False
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import base64
+    import EzGit
+    with make_temp_repo() as (tmp, git):
+        with open(os.path.join(tmp, 'a b.bin'), 'wb') as f:
+            f.write(b'\xff\x00\xfe\n')
+        git('add', '.')
+        git('commit', '-q', '-m', 'binary')
+        sub = os.path.join(tmp, 'sub')
+        os.makedirs(sub)
+        request = {'method': 'cat_file', 'cwd': tmp}
+        try:
+            repo = EzGit.handle_daemon_request({'method': 'repo', 'cwd': tmp})
+            binary = EzGit.handle_daemon_request(dict(request, params={'object': 'HEAD:a b.bin'}))
+            again = EzGit.handle_daemon_request(dict(request, params={'object': 'HEAD:a b.bin'}))
+            missing = EzGit.handle_daemon_request(dict(request, params={'object': 'HEAD:no such file'}))
+            # 缓存的目录映射在子目录变成独立仓库后必须失效
+            outer = EzGit.handle_daemon_request({'method': 'repo', 'cwd': sub})['root']
+            git('init', '-q', sub)
+            inner = EzGit.handle_daemon_request({'method': 'repo', 'cwd': sub})['root']
+        finally:
+            EzGit.close_daemon_repos()
+    if not repo['root'] or binary is None or binary != again or binary['type'] != 'blob':
+        log_to_file(f"守护进程请求结果错误: {repo}", "ERROR")
+        return False
+    if missing is not None or base64.b64decode(binary['content']) != b'\xff\x00\xfe\n':
+        log_to_file(f"守护进程读取二进制或缺失对象错误: {missing}, {binary}", "ERROR")
+        return False
+    if os.path.realpath(outer) != os.path.realpath(tmp) or os.path.realpath(inner) != os.path.realpath(sub):
+        log_to_file(f"守护进程目录映射未重新校验: {outer}, {inner}", "ERROR")
+        return False
+    log_to_file("守护进程请求测试结果: 通过", "INFO")
+    return True
+
+def test_json_output_functions():
+    """
+    测试结构化输出相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "iter_query_records": "结构化查询",
+        "iter_commit_records": "提交记录",
+        "iter_branch_records": "分支记录",
+        "emit_ndjson": "NDJSON 输出",
+        "handle_json_command": "处理 --json 参数"
+    }
+    if not test_functions("结构化输出功能", functions):
+        return False
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import io
+    import json
+    import EzGit
+    stream = io.StringIO()
+    count = EzGit.emit_ndjson(EzGit.iter_query_records('log', limit=3), stream)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    if len(records) != count or any(record['type'] != 'commit' for record in records):
+        log_to_file(f"NDJSON 输出错误: {stream.getvalue()}", "ERROR")
+        return False
+
+    # search-file 逐条输出；下游提前关闭管道时安静退出，不输出回溯
+    import subprocess
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EzGit.py')
+    files = list(EzGit.iter_query_records('search-file', '.py'))
+    proc = subprocess.Popen([sys.executable, script, '--json', 'log'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    proc.stdout.readline()
+    proc.stdout.close()
+    errors = proc.stderr.read()
+    proc.stderr.close()
+    code = proc.wait()
+    if not any(record['path'].endswith('EzGit.py') for record in files) or errors or code not in (0, 141):
+        log_to_file(f"search-file 或管道关闭处理错误: {files[:3]}, {code}, {errors[-200:]!r}", "ERROR")
+        return False
+    log_to_file(f"NDJSON 输出测试结果: 通过 ({count} 条记录)", "INFO")
+    return True
+
+def test_output_functions():
+    """
+    测试输出缓冲与分页相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "echo": "输出文本",
+        "buffered_output": "缓冲输出",
+        "flush_output": "写出缓冲区",
+        "page_output": "分页输出",
+        "iter_line_counts": "代码行数统计"
+    }
+    if not test_functions("输出功能", functions):
+        return False
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import io
+    import EzGit
+    saved_stdout, saved_color = sys.stdout, EzGit._OUTPUT['color']
+    os.environ['NO_COLOR'] = '1'
+    sys.stdout = io.StringIO()
+    try:
+        EzGit._OUTPUT['color'] = None
+        with EzGit.buffered_output():
+            EzGit.print_colored("第一行", "green")
+            EzGit.echo("第二行")
+            buffered = sys.stdout.getvalue()
+        output = sys.stdout.getvalue()
+    finally:
+        sys.stdout = saved_stdout
+        EzGit._OUTPUT['color'] = saved_color
+        del os.environ['NO_COLOR']
+    if buffered or output != "第一行\n第二行\n":
+        log_to_file(f"缓冲输出结果错误: {output!r}", "ERROR")
+        return False
+
+    report = list(EzGit.iter_line_counts([os.path.abspath(__file__).encode()]))
+    if len(report) != 2 or not report[-1].startswith("\n总计"):
+        log_to_file(f"代码行数统计结果错误: {report}", "ERROR")
+        return False
+    log_to_file("输出缓冲测试结果: 通过", "INFO")
+    return True
+
+def test_diff_pager_functions():
+    """
+    测试内置差异分页器相关功能函数
+    @return: bool 测试是否通过
+    """
+    functions = {
+        "view_diff": "查看差异",
+        "open_diff_pager": "启动分页器",
+        "load_diff_stream": "增量读取差异",
+        "read_diff_window": "读取窗口",
+        "jump_diff_marker": "跳转文件/块",
+        "close_diff_pager": "关闭分页器"
+    }
+    if not test_functions("差异分页器功能", functions):
+        return False
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import subprocess
+    import EzGit
+    command = ['log', '-p', '-n', '5']
+    expected = subprocess.run(['git', '-c', 'color.ui=never'] + command,
+                              capture_output=True).stdout.decode('utf-8', 'replace').splitlines()
+    pager = EzGit.open_diff_pager(command)
+    while EzGit.load_diff_stream(pager):
+        pass
+    try:
+        if pager['lines'] != len(expected):
+            log_to_file(f"分页器行数错误: {pager['lines']} != {len(expected)}", "ERROR")
+            return False
+        for start in (0, EzGit.DIFF_CHECKPOINT_LINES - 1, EzGit.DIFF_CHECKPOINT_LINES + 3, max(len(expected) - 3, 0)):
+            if EzGit.read_diff_window(pager, start, 5) != expected[start:start + 5]:
+                log_to_file(f"分页器窗口内容错误: 第 {start} 行", "ERROR")
+                return False
+        EzGit.jump_diff_marker(pager, pager['file_lines'], True)
+        if pager['file_lines'] and not expected[pager['top']].startswith('diff --git'):
+            log_to_file("分页器文件跳转错误", "ERROR")
+            return False
+    finally:
+        EzGit.close_diff_pager(pager)
+
+    # 只按行数读取时不能把整个输出读完
+    pager = EzGit.open_diff_pager(['log', '-p'])
+    try:
+        EzGit.load_diff_stream(pager, 10, 0)
+        partial = pager['lines'] >= 10 and pager['size'] <= 65536 and pager['proc'].stdout is not None
+    finally:
+        EzGit.close_diff_pager(pager)
+    if not partial:
+        log_to_file(f"分页器预读超出范围: {pager['lines']} 行, {pager['size']} 字节", "ERROR")
+        return False
+    log_to_file("差异分页器测试结果: 通过", "INFO")
+    return True
+
+def test_diff_summary_functions():
+    """
+    使用临时仓库测试改动汇总(含重命名和二进制文件)
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试改动汇总功能...", "TEST")
+    with make_temp_repo() as (tmp, git):
+        os.makedirs(os.path.join(tmp, 'src', 'core'))
+        with open(os.path.join(tmp, 'src', 'core', 'a.py'), 'w') as f:
+            f.write('\n'.join(str(i) for i in range(50)) + '\n')
+        git('add', '.')
+        git('commit', '-qm', 'init')
+        git('mv', 'src/core/a.py', 'src/core/b.py')
+        with open(os.path.join(tmp, 'src', 'core', 'b.py'), 'a') as f:
+            f.write('new\n')
+        with open(os.path.join(tmp, 'logo.bin'), 'wb') as f:
+            f.write(b'\0\1\2')
+        git('add', '-A')
+        git('commit', '-qm', 'change')
+        records = list(EzGit.iter_numstat(['-C', tmp, 'diff', '-M', 'HEAD~1', 'HEAD']))
+        summary = EzGit.summarize_numstat(records, depth=1)
+
+    expected = sorted([(1, 0, 'src/core/b.py'), (None, None, 'logo.bin')], key=str)
+    if sorted(records, key=str) != expected:
+        log_to_file(f"numstat 解析结果错误: {records}", "ERROR")
+        return False
+    if summary['dirs'].get('src') != [1, 0, 1, 0] or summary['total'] != [1, 0, 2, 1]:
+        log_to_file(f"改动汇总结果错误: {summary}", "ERROR")
+        return False
+    log_to_file("改动汇总测试结果: 通过", "INFO")
+    return True
+
+def test_lineage_functions():
+    """
+    使用临时仓库测试文件沿袭链与缓存
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试文件沿袭功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        with open(os.path.join(tmp, 'a.txt'), 'w') as f:
+            f.write('\n'.join(str(i) for i in range(100)) + '\n')
+        os.makedirs(os.path.join(tmp, '.ezgit'))
+        git('add', 'a.txt')
+        git('commit', '-qm', 'add')
+        git('mv', 'a.txt', 'b.txt')
+        git('commit', '-qm', 'rename')
+        with open(os.path.join(tmp, 'b.txt'), 'a') as f:
+            f.write('more\n')
+        git('commit', '-qam', 'edit')
+        os.chdir(tmp)
+        try:
+            chain = EzGit.get_file_lineage('b.txt')
+            cached = EzGit.get_file_lineage('b.txt')
+            persisted = os.path.exists(os.path.join(EzGit.get_repo_cache_dir(), 'lineage.json'))
+        finally:
+            os.chdir(cwd)
+
+    statuses = [(status[0], old, new) for _, status, old, new in chain]
+    if statuses != [('M', 'b.txt', 'b.txt'), ('R', 'a.txt', 'b.txt'), ('A', 'a.txt', 'a.txt')]:
+        log_to_file(f"沿袭链错误: {chain}", "ERROR")
+        return False
+    if cached is not chain or not persisted:
+        log_to_file("沿袭缓存未生效", "ERROR")
+        return False
+    log_to_file("文件沿袭测试结果: 通过", "INFO")
+    return True
+
+def test_blame_functions():
+    """
+    使用临时仓库测试增量追溯、忽略提交和结果缓存
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试代码追溯功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        os.makedirs(os.path.join(tmp, '.ezgit'))
+        with open(os.path.join(tmp, 'a.txt'), 'w') as f:
+            f.write('one\ntwo\n')
+        git('add', 'a.txt')
+        git('commit', '-qm', 'first')
+        with open(os.path.join(tmp, 'a.txt'), 'w') as f:
+            f.write('one\ntwo \nthree\n')
+        git('commit', '-qam', 'format')
+        head = git('rev-parse', 'HEAD').stdout.strip()
+        with open(os.path.join(tmp, 'cr.txt'), 'wb') as f:
+            f.write(b'x\ry\rz\n')
+        git('add', 'cr.txt')
+        git('commit', '-qm', 'carriage returns')
+        os.chdir(tmp)
+        try:
+            state = EzGit.start_blame('a.txt')
+            state['thread'].join()
+            plain = [state['blame']['commits'][i][3] for i in state['blame']['owners']]
+            with open(EzGit.BLAME_IGNORE_FILE, 'w') as f:
+                f.write(head + '\n')
+            ignored = EzGit.start_blame('a.txt')
+            ignored['thread'].join()
+            cached = EzGit.start_blame('a.txt')
+            cr = EzGit.start_blame('cr.txt')
+            cr['thread'].join()
+            git('config', 'blame.ignoreRevsFile', 'revs/custom')
+            EzGit.invalidate_git_config()
+            configured = EzGit.get_blame_ignore_file(EzGit.get_repo_root(), existing=False)
+            EzGit.invalidate_git_config()
+        finally:
+            os.chdir(cwd)
+
+    if plain != ['first', 'format', 'format']:
+        log_to_file(f"追溯结果错误: {plain}", "ERROR")
+        return False
+    owners = [ignored['blame']['commits'][i][3] for i in ignored['blame']['owners']]
+    if owners[:2] != ['first', 'first']:
+        log_to_file(f"忽略提交未生效: {owners}", "ERROR")
+        return False
+    if cached.get('proc') is not None or list(cached['blame']['owners']) != list(ignored['blame']['owners']):
+        log_to_file("追溯缓存未生效", "ERROR")
+        return False
+    if len(cr['lines']) != 1 or list(cr['blame']['owners']) != [0]:
+        log_to_file(f"追溯分行错误: {cr['lines']}, {list(cr['blame']['owners'])}", "ERROR")
+        return False
+    if not configured or not configured.endswith(os.path.join('revs', 'custom')):
+        log_to_file(f"配置的忽略列表路径错误: {configured}", "ERROR")
+        return False
+    log_to_file("代码追溯测试结果: 通过", "INFO")
+    return True
+
+def test_ownership_functions():
+    """
+    使用临时仓库测试所有权分析(含 .mailmap 归并和巴士因子)
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试所有权分析功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        def commit(author, email, path, lines):
+            full = os.path.join(tmp, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, 'a') as f:
+                f.write('x\n' * lines)
+            git('add', '-A')
+            git('-c', f'user.name={author}', '-c', f'user.email={email}', 'commit', '-qm', path)
+        with open(os.path.join(tmp, '.mailmap'), 'w') as f:
+            f.write('Alice <alice@example.com> <alice@old.example.com>\n')
+        commit('Alice', 'alice@example.com', 'core/a.py', 10)
+        commit('alice', 'alice@old.example.com', 'core/b.py', 10)
+        commit('Bob', 'bob@example.com', 'docs/x.md', 5)
+        commit('Carol', 'carol@example.com', 'docs/y.md', 5)
+        os.chdir(tmp)
+        try:
+            result = EzGit.analyze_ownership(depth=1)
+        finally:
+            os.chdir(cwd)
+
+    names = sorted(name for name, _ in result['authors'])
+    if names != ['Alice', 'Bob', 'Carol']:
+        log_to_file(f"作者归并错误: {names}", "ERROR")
+        return False
+    if EzGit.compute_bus_factor(result['dirs']['core']) != 1 or EzGit.compute_bus_factor(result['dirs']['docs']) != 1:
+        log_to_file(f"巴士因子错误: {result['dirs']}", "ERROR")
+        return False
+    if EzGit.compute_bus_factor({0: 1.0, 1: 1.0, 2: 1.0}) != 2:
+        log_to_file("巴士因子计算错误", "ERROR")
+        return False
+    log_to_file("所有权分析测试结果: 通过", "INFO")
+    return True
+
+def test_hotspot_functions():
+    """
+    使用临时仓库测试热点分析与改动统计缓存的增量更新
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试热点分析功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        def commit(path, lines):
+            with open(os.path.join(tmp, path), 'a') as f:
+                f.write('x\n' * lines)
+            git('add', path)
+            git('commit', '-qm', path)
+        os.makedirs(os.path.join(tmp, '.ezgit'))
+        commit('hot.py', 50)
+        commit('cold.py', 5)
+        commit('hot.py', 20)
+        os.chdir(tmp)
+        try:
+            cache, oids = EzGit.load_numstat_cache()
+            first = len(cache['commits'])
+            commit('hot.py', 1)
+            cache, oids = EzGit.load_numstat_cache()
+            hotspots = EzGit.compute_hotspots(cache, oids, EzGit.get_tree_sizes())
+        finally:
+            os.chdir(cwd)
+
+    if first != 3 or len(cache['commits']) != 4 or len(oids) != 4:
+        log_to_file(f"改动统计缓存增量更新错误: {first}, {len(cache['commits'])}", "ERROR")
+        return False
+    if [item[0] for item in hotspots] != ['hot.py', 'cold.py'] or hotspots[0][2:4] != [3, 71]:
+        log_to_file(f"热点排名错误: {hotspots}", "ERROR")
+        return False
+    log_to_file("热点分析测试结果: 通过", "INFO")
+    return True
+
+def test_commit_store_functions():
+    """
+    使用临时仓库测试提交元数据库的增量更新与查询
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试提交元数据库功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        def commit(path, message):
+            with open(os.path.join(tmp, path), 'a') as f:
+                f.write('x\n')
+            git('add', path)
+            git('commit', '-qm', message)
+        os.makedirs(os.path.join(tmp, '.ezgit'))
+        commit('a.txt', 'first')
+        commit('a.txt', 'Fix parser')
+        git('branch', 'side')
+        os.chdir(tmp)
+        try:
+            conn = EzGit.open_commit_store()
+            first = EzGit.update_commit_store(conn)
+            unchanged = EzGit.update_commit_store(conn)
+            git('checkout', '-q', 'side')
+            commit('b.txt', 'side work')
+            git('commit', '-q', '--amend', '-m', 'side work amended')
+            second = EzGit.update_commit_store(conn)
+            by_message = EzGit.query_commits_by_message(conn, 'fix PARSER')
+            by_author = EzGit.query_commits_by_author(conn, 'tester')
+            wildcard = EzGit.query_commits_by_author(conn, 'te_ter')
+            by_email = EzGit.query_commits_by_author(conn, 't@t')
+            keywords = [EzGit.parse_search_keyword(text) for text in ('alice@example.com', 're:^Fix.*')]
+            git('checkout', '-q', 'main')
+            git('branch', '-D', 'side')
+            with open(os.path.join(tmp, 'a.txt'), 'a') as f:
+                f.write('stashed\n')
+            git('stash', '-q')
+            EzGit.update_commit_store(conn)
+            remaining = conn.execute("SELECT count(*) FROM commits").fetchone()[0]
+            conn.close()
+        finally:
+            os.chdir(cwd)
+
+    if (first, unchanged, second) != (2, 0, 1):
+        log_to_file(f"增量更新结果错误: {(first, unchanged, second)}", "ERROR")
+        return False
+    if keywords != [(False, 'alice@example.com'), (True, '^Fix.*')] or len(by_email) != 3:
+        log_to_file(f"搜索关键词解析或邮箱查询错误: {keywords}, {len(by_email)}", "ERROR")
+        return False
+    if len(by_message) != 1 or len(by_author) != 3 or wildcard or remaining != 2:
+        log_to_file(f"提交查询结果错误: {by_message}, {len(by_author)}, {remaining}", "ERROR")
+        return False
+    log_to_file("提交元数据库测试结果: 通过", "INFO")
+    return True
+
+def test_object_reader_functions():
+    """
+    使用临时仓库测试包文件读取器，结果与 git cat-file 对比
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试对象读取器功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        os.makedirs(os.path.join(tmp, '.ezgit'))
+        os.makedirs(os.path.join(tmp, 'src'))
+        for i in range(8):
+            # 每次只修改一行，gc 后会生成增量对象
+            with open(os.path.join(tmp, 'src', 'big.txt'), 'w') as f:
+                f.writelines(f"line {n} {'v%d' % i if n == 50 else ''}\n" for n in range(200))
+            git('add', '-A')
+            git('commit', '-qm', f'commit {i}')
+        git('gc', '-q', '--aggressive')
+        with open(os.path.join(tmp, 'loose.txt'), 'w') as f:
+            f.write('loose\n')
+        git('add', 'loose.txt')
+        git('commit', '-qm', 'loose')
+        listing = git('cat-file', '--batch-all-objects', '--batch-check=%(objectname) %(objecttype)', text=False).stdout.split()
+        expected = {oid.decode(): git('cat-file', kind, oid, text=False).stdout for oid, kind in zip(listing[::2], listing[1::2])}
+        os.chdir(tmp)
+        try:
+            store = EzGit.open_object_store()
+            packed = len(store['packs'])
+            actual = {oid: EzGit.read_object(store, oid) for oid in expected}
+            missing = EzGit.read_object(store, '0' * 40)
+            EzGit.close_object_store(store)
+            files = sorted(path for _, path, _ in EzGit.iter_revision_files('HEAD~1'))
+            lines = list(EzGit.iter_revision_line_counts('HEAD'))
+            # --shared 克隆通过 objects/info/alternates 引用原仓库的对象
+            git('clone', '-q', '--shared', tmp, os.path.join(tmp, 'shared'))
+            os.chdir(os.path.join(tmp, 'shared'))
+            store = EzGit.open_object_store()
+            shared = [EzGit.read_object(store, oid) for oid in expected]
+            shared_fallback = store['cat_file']
+            EzGit.close_object_store(store)
+        finally:
+            os.chdir(cwd)
+
+    if packed != 1 or missing is not None:
+        log_to_file(f"包文件加载结果错误: {packed}, {missing}", "ERROR")
+        return False
+    wrong = [oid for oid, data in expected.items() if actual[oid] is None or actual[oid][1] != data]
+    if wrong:
+        log_to_file(f"对象内容与 git cat-file 不一致: {wrong}", "ERROR")
+        return False
+    if shared_fallback is not None or [found[1] for found in shared] != list(expected.values()):
+        log_to_file("备用对象目录中的对象未被直接读取", "ERROR")
+        return False
+    if files != ['src/big.txt'] or lines[-1] != "\n总计: 201 行":
+        log_to_file(f"版本文件遍历结果错误: {files}, {lines}", "ERROR")
+        return False
+    log_to_file("对象读取器测试结果: 通过", "INFO")
+    return True
+
+def test_commit_graph_functions():
+    """
+    使用临时仓库测试 commit-graph 解析，结果与 git rev-list 和 git merge-base 对比
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试提交图功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        def commit(path, message):
+            with open(os.path.join(tmp, path), 'a') as f:
+                f.write(message + '\n')
+            git('add', path)
+            git('commit', '-qm', message)
+        def expected(left, right):
+            counts = git('rev-list', '--left-right', '--count', f'{left}...{right}').stdout.split()
+            bases = sorted(git('merge-base', '--all', left, right).stdout.split())
+            return int(counts[0]), int(counts[1]), bases
+        commit('a.txt', 'base')
+        git('branch', 'side')
+        commit('a.txt', 'main 1')
+        git('checkout', '-q', 'side')
+        commit('b.txt', 'side 1')
+        # 交叉合并，产生两个合并基础
+        git('merge', '-q', '--no-edit', 'main~0')
+        git('checkout', '-q', 'main')
+        git('merge', '-q', '--no-edit', 'side~1')
+        commit('a.txt', 'main 2')
+        git('checkout', '-q', 'side')
+        commit('b.txt', 'side 2')
+        git('checkout', '-q', 'main')
+        git('commit-graph', 'write', '--reachable')
+        pairs = [('main', 'side'), ('side', 'main~1'), ('main', 'main')]
+        wanted = [expected(left, right) for left, right in pairs]
+        os.chdir(tmp)
+        try:
+            graph = EzGit.open_commit_graph()
+            layers = len(graph['layers'])
+            EzGit.close_commit_graph(graph)
+            single = [EzGit.get_branch_relation(left, right) for left, right in pairs]
+            commit('a.txt', 'main 3')
+            git('commit-graph', 'write', '--reachable', '--split')
+            graph = EzGit.open_commit_graph()
+            split_layers = len(graph['layers'])
+            EzGit.close_commit_graph(graph)
+            split = EzGit.get_branch_relation('side', 'main')
+            wanted_split = expected('side', 'main')
+            commit('a.txt', 'not in graph')
+            fallback = EzGit.get_branch_relation('side', 'main')
+            wanted_fallback = expected('side', 'main')
+            invalid = EzGit.get_branch_relation('main', 'no-such-branch')
+        finally:
+            os.chdir(cwd)
+
+    single = [(left, right, sorted(bases)) for left, right, bases in single]
+    if layers != 1 or single != wanted or len(wanted[0][2]) != 2:
+        log_to_file(f"单文件提交图计算结果错误: {single}, {wanted}", "ERROR")
+        return False
+    if split_layers != 2 or (split[0], split[1], sorted(split[2])) != wanted_split:
+        log_to_file(f"分层提交图计算结果错误: {split}, {wanted_split}", "ERROR")
+        return False
+    if (fallback[0], fallback[1], sorted(fallback[2])) != wanted_fallback or invalid is not None:
+        log_to_file(f"回退计算结果错误: {fallback}, {wanted_fallback}, {invalid}", "ERROR")
+        return False
+    log_to_file("提交图测试结果: 通过", "INFO")
+    return True
+
+def test_bulk_tag_functions():
+    """
+    使用临时仓库和本地远程仓库测试批量标签操作
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试批量标签功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (work, git), make_temp_repo(init=False) as (tmp, _):
+        remote = os.path.join(tmp, 'remote.git')
+        git('init', '-q', '--bare', remote)
+        git('commit', '-q', '--allow-empty', '-m', 'first')
+        git('commit', '-q', '--allow-empty', '-m', 'second')
+        git('remote', 'add', 'origin', remote)
+        git('config', 'core.logAllRefUpdates', 'always')
+        list_file = os.path.join(tmp, 'tags.txt')
+        with open(list_file, 'w') as f:
+            f.write("# release tags\nv1.0 HEAD~1\nv1.1\nrc/1\n")
+        os.chdir(work)
+        try:
+            created = EzGit.create_tags(EzGit.read_tag_list(list_file))
+            duplicate = EzGit.create_tags([('v1.0', 'HEAD')])
+            invalid = [EzGit.create_tags([('ok', 'HEAD'), (name, 'HEAD')]) for name in ('bad..name', 'a.lock', 'x y', '@', 'ok')]
+            invalid.append(EzGit.create_tags([('tree', 'HEAD^{tree}')]))
+            reflog = git('reflog', 'show', '--format=%gs', 'refs/tags/v1.0').stdout.strip()
+            counts = [EzGit.push_missing_tags('origin')]
+            pushed = EzGit.get_remote_tags('origin')
+            git('tag', 'v2.0')
+            counts += [EzGit.push_missing_tags('origin'), EzGit.push_missing_tags('origin')]
+            # 一次原子推送: 非快进的 main 被拒绝时，同一次推送中的新标签也不会创建
+            git('push', '-q', 'origin', 'HEAD:refs/heads/main')
+            atomic = EzGit.push_refspecs('origin', ['HEAD:refs/tags/atomic', 'HEAD~1:refs/heads/main'])
+            atomic_tags = EzGit.get_remote_tags('origin')
+            local, remote_names = EzGit.plan_tag_deletion('v1.*', 'origin')
+            deleted = EzGit.delete_tags(local, 'origin', remote_names)
+            remaining = sorted(name for name, _ in EzGit.find_tags())
+            remote_remaining = sorted(EzGit.get_remote_tags('origin'))
+            first = git('rev-parse', 'HEAD~1').stdout.strip()
+        finally:
+            os.chdir(cwd)
+
+    if atomic or 'atomic' in atomic_tags:
+        log_to_file(f"原子推送结果错误: {atomic}, {sorted(atomic_tags)}", "ERROR")
+        return False
+    if invalid != [0] * 6 or 'ok' in remaining or reflog != "tag: created 3 tags from list" or counts != [3, 1, 0]:
+        log_to_file(f"标签名检查、引用日志或推送数量错误: {invalid}, {reflog}, {counts}", "ERROR")
+        return False
+    if created != 3 or duplicate != 0 or sorted(pushed) != ['rc/1', 'v1.0', 'v1.1'] or pushed['v1.0'] != first:
+        log_to_file(f"批量创建或推送结果错误: {created}, {duplicate}, {pushed}", "ERROR")
+        return False
+    if not deleted or len(local) != 2 or remaining != ['rc/1', 'v2.0'] or remote_remaining != ['rc/1', 'v2.0']:
+        log_to_file(f"批量删除结果错误: {deleted}, {remaining}, {remote_remaining}", "ERROR")
+        return False
+    log_to_file("批量标签测试结果: 通过", "INFO")
+    return True
+
+def test_batch_branch_functions():
+    """
+    使用临时仓库测试批量分支删除与重命名
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试批量分支功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        git('commit', '-q', '--allow-empty', '-m', 'old', GIT_COMMITTER_DATE='2000-01-01T00:00:00')
+        for name in ('feature/a', 'feature/b', 'fix/c'):
+            git('branch', name)
+        git('checkout', '-q', '-b', 'feature/current')
+        git('commit', '-q', '--allow-empty', '-m', 'new')
+        git('checkout', '-q', '-b', 'wip')
+        git('commit', '-q', '--allow-empty', '-m', 'unmerged')
+        git('checkout', '-q', 'feature/current')
+        git('config', 'branch.feature/a.remote', 'origin')
+        os.chdir(tmp)
+        try:
+            merged = sorted(b['name'] for b in EzGit.plan_branch_deletion('merged', 'HEAD'))
+            old = sorted(b['name'] for b in EzGit.plan_branch_deletion('age', '30'))
+            into_wip = sorted(b['name'] for b in EzGit.plan_branch_deletion('merged', 'refs/heads/wip'))
+            nested_renames, nested = EzGit.plan_branch_rename('fix/*', 'fix/*/old')
+            renames, conflicts = EzGit.plan_branch_rename('feature/*', 'archive/*')
+            renamed = EzGit.rename_branches(renames)
+            moved_config = git('config', 'branch.archive/a.remote').stdout.strip()
+            reflog = git('reflog', 'show', '--format=%gs', 'archive/a').stdout.splitlines()
+            fixes = EzGit.plan_branch_deletion('pattern', 'fix/*')
+            deleted = EzGit.delete_branches(fixes)
+            remaining = git('for-each-ref', '--format=%(refname:strip=2)', 'refs/heads').stdout.split()
+        finally:
+            os.chdir(cwd)
+
+    # 默认分支 main 和合并目标对应的分支不能出现在删除计划中
+    if merged != ['feature/a', 'feature/b', 'fix/c'] or old != merged or into_wip != merged:
+        log_to_file(f"批量删除预览结果错误: {merged}, {old}, {into_wip}", "ERROR")
+        return False
+    if not renamed or sorted(new for _, new in renames) != ['archive/a', 'archive/b'] or moved_config != 'origin':
+        log_to_file(f"批量重命名结果错误: {renames}, {moved_config}", "ERROR")
+        return False
+    if nested_renames or len(nested) != 1 or conflicts or len(reflog) != 2 or 'renamed' not in reflog[0]:
+        log_to_file(f"重命名冲突检测或引用日志错误: {nested}, {conflicts}, {reflog}", "ERROR")
+        return False
+    if not deleted or sorted(remaining) != ['archive/a', 'archive/b', 'feature/current', 'main', 'wip']:
+        log_to_file(f"批量删除结果错误: {remaining}", "ERROR")
+        return False
+    log_to_file("批量分支测试结果: 通过", "INFO")
+    return True
+
+def test_branch_analysis_functions():
+    """
+    使用临时仓库测试分支分析，领先/落后与 git rev-list 对比
+    @return: bool 测试是否通过
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import EzGit
+
+    log_to_file("\n开始测试分支分析功能...", "TEST")
+    cwd = os.getcwd()
+    with make_temp_repo() as (tmp, git):
+        git('commit', '-q', '--allow-empty', '-m', 'base')
+        git('branch', 'merged')
+        git('checkout', '-q', '-b', 'topic')
+        git('commit', '-q', '--allow-empty', '-m', 'topic 1')
+        git('commit', '-q', '--allow-empty', '-m', 'topic 2')
+        git('branch', 'topic-copy')
+        git('checkout', '-q', 'main')
+        git('commit', '-q', '--allow-empty', '-m', 'main 1')
+        expected = {}
+        for name in ('main', 'merged', 'topic', 'topic-copy'):
+            behind, ahead = git('rev-list', '--left-right', '--count', f'main...{name}').stdout.split()
+            expected[name] = (int(ahead), int(behind))
+        os.chdir(tmp)
+        try:
+            plain = EzGit.analyze_branches('main')
+            git('commit-graph', 'write', '--reachable')
+            with_graph = EzGit.analyze_branches('main')
+            invalid = EzGit.analyze_branches('no-such-branch')
+        finally:
+            os.chdir(cwd)
+
+    for analysis in (plain, with_graph):
+        relations = {b['name']: (b['ahead'], b['behind']) for b in analysis['branches']}
+        merged = sorted(b['name'] for b in analysis['branches'] if b['merged'])
+        if relations != expected or merged != ['main', 'merged'] or not analysis['complete']:
+            log_to_file(f"分支分析结果错误: {relations}, {expected}, {merged}", "ERROR")
+            return False
+    if invalid is not None:
+        log_to_file("无效基准分支未被拒绝", "ERROR")
+        return False
+    log_to_file("分支分析测试结果: 通过", "INFO")
+    return True
+
 def test_functions(category, functions):
     """
     通用函数测试
@@ -252,13 +1334,44 @@ def run_test():
         ("维护功能测试", test_maintenance_functions),
         ("分析功能测试", test_analysis_functions),
         ("配置功能测试", test_config_functions),
-        ("辅助功能测试", test_helper_functions)
+        ("辅助功能测试", test_helper_functions),
+        ("文件选择器测试", test_picker_functions),
+        ("状态流解析测试", test_status_entries),
+        ("克隆功能测试", test_clone_functions),
+        ("稀疏检出测试", test_sparse_functions),
+        ("子模块功能测试", test_submodule_functions),
+        ("提交选择器测试", test_commit_picker),
+        ("启动耗时测试", test_startup_time),
+        ("菜单功能测试", test_menu_functions),
+        ("自定义菜单测试", test_custom_menu_functions),
+        ("配置服务测试", test_config_service_functions),
+        ("Git配置测试", test_git_config_functions),
+        ("守护进程测试", test_daemon_functions),
+        ("结构化输出测试", test_json_output_functions),
+        ("输出缓冲测试", test_output_functions),
+        ("差异分页器测试", test_diff_pager_functions),
+        ("改动汇总测试", test_diff_summary_functions),
+        ("文件沿袭测试", test_lineage_functions),
+        ("代码追溯测试", test_blame_functions),
+        ("所有权分析测试", test_ownership_functions),
+        ("热点分析测试", test_hotspot_functions),
+        ("提交元数据库测试", test_commit_store_functions),
+        ("对象读取器测试", test_object_reader_functions),
+        ("提交图测试", test_commit_graph_functions),
+        ("批量标签测试", test_bulk_tag_functions),
+        ("批量分支测试", test_batch_branch_functions),
+        ("分支分析测试", test_branch_analysis_functions)
     ]
     
     results = []
     for name, test_func in tests:
         log_to_file(f"\n开始{name}...", "TEST")
-        result = test_func()
+        try:
+            result = test_func()
+        except Exception as e:
+            # 单项测试出错时记为失败，继续执行其余测试
+            log_to_file(f"{name}出错: {type(e).__name__}: {str(e)}", "ERROR")
+            result = False
         results.append((name, result))
         log_to_file(f"{name}结果: {'通过' if result else '失败'}")
         log_to_file("="*50)